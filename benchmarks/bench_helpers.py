@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : bench_helpers.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 18:00
+
+基准测试共用的假时钟和后台调度线程, 文件名和 tests 目录中的 helpers.py 不同, 两个目录一起运行时不会导入错.
+'''
+import time
+from threading import Thread, Lock
+
+from conciseSchedules import Schedules
+from conciseSchedules.clock import Clock
+
+# 2026-01-05 00:00:00 UTC, 一个周一的零点, 所有按分钟/小时/天的规则都会在模拟的时间段内到期
+EPOCH = 1767571200.0
+
+
+class FakeClock:
+    '''
+ 由测试代码推进的时钟, 同时作为 Clock 的 wall 和 monotonic 使用.
+    '''
+
+    def __init__(self, now: float = EPOCH):
+        self.now = now
+        self.__lock = Lock()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> float:
+        with self.__lock:
+            self.now += seconds
+            return self.now
+
+
+class FakeRun:
+    '''
+ 在后台线程中以假时钟运行 run_loop. advance 推进时钟并唤醒调度线程,
+ 调度线程的等待时间按假时钟计算, 所以模拟的一小时不需要真的等一小时.
+    '''
+
+    def __init__(self, scheduler: Schedules, clock: FakeClock, backend: str):
+        self.scheduler = scheduler
+        self.clock = clock
+        self.backend = backend
+        self.thread = Thread(target=scheduler.run_loop, args=(backend,), daemon=True)
+
+    def wake(self) -> None:
+        scheduler = self.scheduler
+        if self.backend == 'poll':
+            for ticker in list(scheduler._Schedules__tickers):
+                ticker.wake()
+        else:
+            scheduler._Schedules__timer.wake()
+
+    def advance(self, seconds: float = 1) -> None:
+        self.clock.advance(seconds)
+        self.wake()
+
+    def start(self) -> None:
+        self.thread.start()
+        # 等调度线程建好定时队列
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            if self.backend == 'poll':
+                if len(self.scheduler._Schedules__tickers) == 2:
+                    break
+            elif self.scheduler._Schedules__timer_active:
+                break
+            time.sleep(0.001)
+        time.sleep(0.01)
+
+    def stop(self) -> None:
+        # 先停止调度线程再关闭线程池, 否则调度线程会向已经关闭的线程池提交任务
+        self.scheduler.stop()
+        self.thread.join()
+        if self.scheduler.pool is not None:
+            self.scheduler.pool.shutdown(wait=True)
+
+
+def make_scheduler(clock: FakeClock = None) -> Schedules:
+    '''
+    :param clock: 默认使用真实的时钟
+    :return: a Schedules whose log output is discarded
+    '''
+    scheduler = Schedules()
+    scheduler.set_timezone('UTC')
+    scheduler.set_log(sink=lambda event: None)
+    if clock is not None:
+        scheduler.clock = Clock(clock, clock)
+    return scheduler
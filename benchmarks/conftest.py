@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : conftest.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 18:00
+
+基准测试, 依赖 pytest-benchmark:
+    pip install pytest pytest-benchmark
+    pytest benchmarks --benchmark-only
+    pytest benchmarks --benchmark-autosave                 # 保存结果到 .benchmarks
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%   # 和上次保存的结果比较
+    pytest benchmarks -m slow                             # 模拟运行一小时的 test_simulated_hour, 默认不运行
+'''
+import pytest
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    collect_ignore_glob = ['test_*.py']
+
+from bench_helpers import FakeClock, FakeRun, make_scheduler
+
+
+@pytest.fixture
+def fake_run():
+    '''
+    返回一个工厂函数 fake_run(tasks_conf, backend), 测试结束时自动停止
+    '''
+    runs = []
+
+    def factory(tasks_conf: dict, backend: str = 'heap', pool_size: int = 10) -> FakeRun:
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        scheduler.set_pool_size(pool_size)
+        scheduler.set_queue(0)
+        scheduler.set_tasks(tasks_conf)
+        run = FakeRun(scheduler, clock, backend)
+        runs.append(run)
+        run.start()
+        return run
+
+    yield factory
+    for run in runs:
+        run.stop()
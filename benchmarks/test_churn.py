@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_churn.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 22:00
+
+任务不断增删时的启动延迟和注册吞吐量. 调度线程每个刻度只读一次 registry 的快照, 两者应该互不影响:
+test_fire_latency_churn 和 test_fire.py 中同样大小的结果比较, test_register_churn 和没有调度线程时比较.
+'''
+import time
+import pytest
+from threading import Thread, Event
+from test_fire import Probe
+
+SIZE = 1000
+
+
+def noop():
+    pass
+
+
+def churn_task(i: int) -> dict:
+    return {'schedule_tasks': {'crontab': '*/7 * * * * *', 'target': noop, 'id': 'churn%s' % i}}
+
+
+class Churn:
+    '''在后台线程中不停地添加和删除任务, 每次之间让出 pause 秒, 否则测到的只是 GIL 的争用'''
+
+    def __init__(self, scheduler, window: int = 100, pause: float = 0.0005):
+        self.scheduler = scheduler
+        self.window = window
+        self.pause = pause
+        self.ops = 0
+        self.stopped = Event()
+        self.thread = Thread(target=self.run, daemon=True)
+
+    def run(self) -> None:
+        i = 0
+        while not self.stopped.is_set():
+            self.scheduler.add_task(churn_task(i))
+            if i >= self.window:
+                self.scheduler.remove_task('churn%s' % (i - self.window))
+            i += 1
+            self.ops += 2
+            time.sleep(self.pause)
+
+    def __enter__(self) -> 'Churn':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+
+@pytest.mark.parametrize('backend', ['heap', 'poll'])
+def test_fire_latency_churn(benchmark, fake_run, backend):
+    probe = Probe(SIZE)
+    tasks = [{'crontab': '* * * * * *', 'target': probe, 'id': 'noop%s' % i} for i in range(SIZE)]
+    run = fake_run({'schedule_tasks': tasks}, backend)
+
+    def tick():
+        probe.reset()
+        run.advance(1)
+        assert probe.done.wait(10), 'only %s of %s tasks fired' % (probe.count, SIZE)
+
+    with Churn(run.scheduler) as churn:
+        started = time.perf_counter()
+        benchmark.pedantic(tick, rounds=50, warmup_rounds=2)
+        elapsed = time.perf_counter() - started
+    benchmark.extra_info['churn_ops_per_second'] = churn.ops / elapsed
+
+
+@pytest.mark.parametrize('running', [False, True], ids=['idle', 'running'])
+def test_register_churn(benchmark, fake_run, running):
+    '''
+    一次 add_task + remove_task, running 时调度线程同时在处理每秒到期的 SIZE 个任务
+    '''
+    tasks = [{'crontab': '* * * * * *', 'target': noop, 'id': 'noop%s' % i} for i in range(SIZE)]
+    run = fake_run({'schedule_tasks': tasks}, 'heap')
+    stopped = Event()
+
+    def ticks():
+        while not stopped.is_set():
+            run.advance(1)
+            time.sleep(0.001)
+
+    ticker = Thread(target=ticks, daemon=True)
+    if running:
+        ticker.start()
+    counter = iter(range(10 ** 9))
+    scheduler = run.scheduler
+
+    def churn():
+        i = next(counter)
+        scheduler.add_task(churn_task(i))
+        scheduler.remove_task('churn%s' % i)
+
+    try:
+        benchmark(churn)
+    finally:
+        stopped.set()
+        if running:
+            ticker.join()
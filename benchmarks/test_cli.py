@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_cli.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 01:00
+
+python -m conciseSchedules 每次启动时找出这一分钟到点的任务的开销, 任务数 1k/10k/100k.
+test_index_due 读取预先生成的索引, 应该和任务数无关; test_scan_due 是没有索引时逐个检查全部任务.
+extra_info['due'] 是到点的任务数.
+'''
+import json
+import pytest
+from conciseSchedules.cli import compile_tasks, due_tasks, load_index
+from bench_helpers import EPOCH
+from test_due import SIZES, schedule_tasks
+
+
+@pytest.fixture(scope='module', params=SIZES)
+def task_file(request, tmp_path_factory) -> str:
+    path = tmp_path_factory.mktemp('cli') / ('tasks%s.json' % request.param)
+    tasks = schedule_tasks(request.param)
+    for task in tasks:
+        task['target'] = 'os:getpid'
+    path.write_text(json.dumps({'schedule_tasks': tasks}))
+    return str(path)
+
+
+def test_index_due(benchmark, task_file):
+    index = load_index(task_file, task_file + '.db')
+    try:
+        timestamps, conf = benchmark(index.due, EPOCH, 'UTC')
+    finally:
+        index.close()
+    benchmark.extra_info['due'] = len(conf.get('schedule_tasks', ()))
+    assert timestamps
+
+
+def test_scan_due(benchmark, task_file):
+    scheduler = compile_tasks(task_file)
+    scheduler.set_timezone('UTC')
+    timestamps, conf = benchmark(due_tasks, scheduler, EPOCH)
+    benchmark.extra_info['due'] = len(conf.get('schedule_tasks', ()))
+    assert timestamps
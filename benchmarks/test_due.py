@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_due.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 18:00
+
+每个刻度检查到点任务的开销, 任务数 1k/10k/100k.
+poll 方式每个刻度扫描全部任务 (SpecMatrix, numpy 或纯 python); heap/wheel 方式只处理到期的任务并计算下一次启动时间.
+'''
+import pytest
+from datetime import datetime, timezone
+from conciseSchedules import Schedules, batch
+from conciseSchedules.batch import SpecMatrix
+from conciseSchedules.timers import TimerHeap, TimingWheel
+from bench_helpers import EPOCH, FakeClock, make_scheduler
+from test_parse import SCHEDULE_CRONTABS, SCHEDULES
+
+SIZES = [1000, 10000, 100000]
+
+
+def noop():
+    pass
+
+
+def schedule_tasks(size: int) -> list:
+    '''按常见规则循环生成 size 个 schedule_tasks, 第一个任务每秒都会到期'''
+    tasks = [{'crontab': '* * * * * *', 'target': noop}]
+    specs = [{'crontab': crontab} for crontab in SCHEDULE_CRONTABS] + [{'schedule': s} for s in SCHEDULES]
+    i = 0
+    while len(tasks) < size:
+        task = dict(specs[i % len(specs)])
+        task['target'] = noop
+        task['id'] = 'task%s' % i
+        tasks.append(task)
+        i += 1
+    return tasks
+
+
+def compiled_specs(size: int) -> list:
+    return [
+        Schedules.compile_schedule(task.get('schedule'), task.get('crontab'))
+        for task in schedule_tasks(size)
+    ]
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_match_loop(benchmark, size):
+    '''基准: 逐个任务调用 CompiledSpec.match'''
+    specs = compiled_specs(size)
+    date_time = datetime.fromtimestamp(EPOCH, timezone.utc)
+    benchmark(lambda: [i for i, spec in enumerate(specs) if spec.match(date_time)])
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_matrix_due_numpy(benchmark, size):
+    if batch.numpy() is None:
+        pytest.skip('numpy is not installed')
+    matrix = SpecMatrix(compiled_specs(size), vectorize=True)
+    date_time = datetime.fromtimestamp(EPOCH, timezone.utc)
+    benchmark(matrix.due, date_time)
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_matrix_due_python(benchmark, size):
+    matrix = SpecMatrix(compiled_specs(size), vectorize=False)
+    date_time = datetime.fromtimestamp(EPOCH, timezone.utc)
+    benchmark(matrix.due, date_time)
+
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('timer', [TimerHeap, TimingWheel], ids=['heap', 'wheel'])
+def test_timer_tick(benchmark, size, timer):
+    '''
+    一个刻度的完整处理: 推进假时钟一秒, 取出到期任务, 按 misfire 策略处理并把下一次启动时间放回队列
+    '''
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.set_tasks({'schedule_tasks': schedule_tasks(size)})
+    scheduler._Schedules__timer = queue = timer(scheduler.clock.time)
+    scheduler._Schedules__timer_active = True
+    scheduler._Schedules__reset_timer()
+    take_due = scheduler._Schedules__take_due
+    stopped = lambda: False
+
+    def tick():
+        clock.advance(1)
+        return take_due(queue.pop_due(stopped))
+
+    fires = benchmark(tick)
+    assert fires
+    scheduler._Schedules__timer_active = False
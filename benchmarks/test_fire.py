@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_fire.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 18:00
+
+端到端的启动延迟: 从假时钟走到启动时间 (并唤醒调度线程) 开始, 到所有 no-op target 开始执行为止.
+包含调度线程取出到期任务, 提交到线程池, 工作线程执行 target 的全部开销.
+'''
+import time
+import pytest
+from threading import Lock, Event
+
+TASKS = [1, 100, 1000]
+
+
+class Probe:
+    '''no-op target, 记录每个 tick 中最早和最晚的开始时间'''
+
+    def __init__(self, expected: int):
+        self.expected = expected
+        self.lock = Lock()
+        self.done = Event()
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.first = None
+        self.last = None
+        self.done.clear()
+
+    def __call__(self) -> None:
+        now = time.perf_counter()
+        with self.lock:
+            if self.first is None:
+                self.first = now
+            self.last = now
+            self.count += 1
+            if self.count >= self.expected:
+                self.done.set()
+
+
+@pytest.mark.parametrize('size', TASKS)
+@pytest.mark.parametrize('backend', ['heap', 'wheel', 'poll'])
+def test_fire_latency(benchmark, fake_run, backend, size):
+    probe = Probe(size)
+    tasks = [{'crontab': '* * * * * *', 'target': probe, 'id': 'noop%s' % i} for i in range(size)]
+    run = fake_run({'schedule_tasks': tasks}, backend)
+    first = []
+
+    def tick():
+        probe.reset()
+        started = time.perf_counter()
+        run.advance(1)
+        assert probe.done.wait(10), 'only %s of %s tasks fired' % (probe.count, size)
+        first.append(probe.first - started)
+
+    benchmark.pedantic(tick, rounds=50, warmup_rounds=2)
+    first.sort()
+    benchmark.extra_info['first_start_median'] = first[len(first) // 2]
+    benchmark.extra_info['first_start_max'] = first[-1]
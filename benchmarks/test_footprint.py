@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_footprint.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 18:00
+
+run_loop 在假时钟下模拟运行一小时的线程数和内存占用.
+每推进一秒都等调度线程处理完这一秒之后再继续, 结果记录在 extra_info 中:
+peak_threads 调度器新增的线程数峰值, peak_memory_kb / memory_growth_kb 启动之后的内存峰值和增长, fires 启动次数.
+test_task_memory 记录 set_tasks 之后每个任务的内存占用 bytes_per_task.
+'''
+import time
+import threading
+import tracemalloc
+import pytest
+from bench_helpers import make_scheduler
+from test_fire import Probe
+from test_parse import SCHEDULE_CRONTABS, SCHEDULES
+
+SIZES = [1000, 10000]
+HOUR = 3600
+
+
+def noop():
+    pass
+
+
+def hourly_tasks(size: int, probe: Probe) -> list:
+    '''分钟级和小时级规则的混合, 再加一个每秒启动的 probe 用来同步'''
+    specs = [{'crontab': crontab} for crontab in SCHEDULE_CRONTABS[1:]] + [{'schedule': s} for s in SCHEDULES[1:]]
+    tasks = [{'crontab': '* * * * * *', 'target': probe, 'id': 'probe'}]
+    for i in range(size - 1):
+        task = dict(specs[i % len(specs)])
+        task['target'] = noop
+        task['id'] = 'task%s' % i
+        tasks.append(task)
+    return tasks
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('backend', ['heap', 'wheel', 'poll'])
+def test_simulated_hour(benchmark, fake_run, backend, size):
+    probe = Probe(HOUR)
+    threads = threading.active_count()
+    tracemalloc.start()
+    try:
+        tasks = hourly_tasks(size, probe)
+        run = fake_run({'schedule_tasks': tasks}, backend)
+        baseline = tracemalloc.get_traced_memory()[0]
+        peak_threads = [threading.active_count()]
+
+        def hour():
+            for second in range(1, HOUR + 1):
+                run.advance(1)
+                deadline = time.time() + 10
+                while probe.count < second and time.time() < deadline:
+                    time.sleep(0)
+                if second % 60 == 0:
+                    peak_threads.append(threading.active_count())
+            # 先停止调度线程再关闭线程池, 否则调度线程会向已经关闭的线程池提交任务
+            run.stop()
+
+        benchmark.pedantic(hour, rounds=1, iterations=1)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    metrics = run.scheduler.metrics
+    fires = sum(metrics.counter('fires', task['id']) for task in tasks)
+    benchmark.extra_info['peak_threads'] = max(peak_threads) - threads
+    benchmark.extra_info['peak_memory_kb'] = (peak - baseline) // 1024
+    benchmark.extra_info['memory_growth_kb'] = (current - baseline) // 1024
+    benchmark.extra_info['fires'] = fires
+    assert probe.count >= HOUR
+
+
+@pytest.mark.parametrize('size', [10000, 100000])
+def test_task_memory(benchmark, size):
+    '''
+    set_tasks 之后每个任务占用的内存 (不含任务配置本身): 规则相同的任务共用一个编译好的 spec,
+    target 和 args 只保存引用, 结果记录在 extra_info['bytes_per_task'] 中
+    '''
+    specs = [{'crontab': crontab} for crontab in SCHEDULE_CRONTABS[1:]] + [{'schedule': s} for s in SCHEDULES[1:]]
+    tasks = []
+    for i in range(size):
+        task = dict(specs[i % len(specs)])
+        task['target'] = noop
+        task['args'] = (i,)
+        task['id'] = 'task%s' % i
+        tasks.append(task)
+    scheduler = make_scheduler()
+    usage = []
+
+    def load():
+        scheduler.set_tasks({'schedule_tasks': []})
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            scheduler.set_tasks({'schedule_tasks': tasks})
+            usage.append(tracemalloc.get_traced_memory()[0] - baseline)
+        finally:
+            tracemalloc.stop()
+
+    benchmark.pedantic(load, rounds=1, iterations=1)
+    benchmark.extra_info['bytes_per_task'] = usage[0] / size
+    assert len(scheduler.registry) == size
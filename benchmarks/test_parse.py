@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_parse.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 18:00
+
+crontab / schedule 语法解析的吞吐量, 每轮解析一组常见的规则.
+'''
+from conciseSchedules import Schedules, CompiledSpec
+
+CRONTABS = [
+    '* * * * *',
+    '*/5 * * * *',
+    '0 3 * * *',
+    '15,45 9-17 * * 1-5',
+    '0 0 1 * *',
+    '30 2 * * 0',
+    '*/10 8-20 * * *',
+    '0 12 15 6 *',
+]
+
+SCHEDULE_CRONTABS = [
+    '* * * * * *',
+    '*/15 * * * * *',
+    '0 */5 * * * *',
+    '30 0 9-17 * * 1-5',
+    '0 0 0 1 * *',
+]
+
+SCHEDULES = [
+    {'second': -1},
+    {'minute': -1},
+    {'second': 15, 'minute': (10, 20)},
+    {'hour': -1},
+    {'minute': 1, 'hour': 10, 'day': 1, 'month': 10},
+    {'second': -10, 'hour': (9, 17)},
+    {'weekday': 1, 'hour': 8},
+]
+
+field_crontab = Schedules._Schedules__time_field_crontab
+field_schedule = Schedules._Schedules__time_field_schedule
+default_crontab = Schedules._Schedules__default_crontab
+default_schedule = Schedules._Schedules__default_schedule
+
+
+def test_crontab_syntax_analyze(benchmark):
+    def parse():
+        for crontab in CRONTABS:
+            Schedules._crontab_syntax_analyze(field_crontab, crontab, default_crontab)
+
+    benchmark.extra_info['specs'] = len(CRONTABS)
+    benchmark(parse)
+
+
+def test_schedule_crontab_syntax_analyze(benchmark):
+    def parse():
+        for crontab in SCHEDULE_CRONTABS:
+            Schedules._crontab_syntax_analyze(field_schedule, crontab, default_schedule)
+
+    benchmark.extra_info['specs'] = len(SCHEDULE_CRONTABS)
+    benchmark(parse)
+
+
+def test_schedule_syntax_analyze(benchmark):
+    def parse():
+        for schedule in SCHEDULES:
+            Schedules._schedule_syntax_analyze(field_schedule, schedule, default_schedule)
+
+    benchmark.extra_info['specs'] = len(SCHEDULES)
+    benchmark(parse)
+
+
+def test_compile_mix(benchmark):
+    '''解析加上编译成 CompiledSpec 的完整注册开销'''
+    def compile_all():
+        for crontab in CRONTABS:
+            Schedules.compile_crontab(crontab)
+        for crontab in SCHEDULE_CRONTABS:
+            Schedules.compile_schedule(None, crontab)
+        for schedule in SCHEDULES:
+            Schedules.compile_schedule(schedule, None)
+
+    benchmark.extra_info['specs'] = len(CRONTABS) + len(SCHEDULE_CRONTABS) + len(SCHEDULES)
+    result = benchmark(compile_all)
+    assert result is None
+    assert isinstance(Schedules.compile_crontab(CRONTABS[0]), CompiledSpec)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_subsecond.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 23:00
+
+毫秒级任务在真实时钟下的迟到时间: 一个每 10 毫秒启动的任务, 同时还有 LOAD 个每秒启动的任务.
+毫秒级任务由单独的定时线程调度并且插在线程池队列的最前面, 每秒整点的一大批任务不应该让它迟到.
+迟到时间取自 'exec' 日志的 late 字段, 即工作线程开始执行时比计划时间晚了多少.
+结果记录在 extra_info 中: lateness_median_ms, lateness_p99_ms, lateness_max_ms, fires.
+'''
+import pytest
+from threading import Timer
+from bench_helpers import make_scheduler
+
+LOAD = 1000
+STEP = 0.01
+SECONDS = 2.0
+
+
+def noop():
+    pass
+
+
+def fast():
+    pass
+
+
+@pytest.mark.parametrize('backend', ['heap', 'wheel', 'poll'])
+def test_subsecond_lateness(benchmark, backend):
+    started = []
+    tasks = [{'interval': STEP, 'target': fast, 'id': 'fast'}]
+    tasks.extend({'crontab': '* * * * * *', 'target': noop, 'id': 'noop%s' % i} for i in range(LOAD))
+    scheduler = make_scheduler()
+    scheduler.set_queue(0)
+
+    def collect(event):
+        if event.event == 'exec' and event.task.startswith('fast('):
+            started.append(event.fields['late'])
+
+    scheduler.set_log(sink=collect)
+    scheduler.set_tasks({'schedule_tasks': tasks})
+
+    def run():
+        del started[:]
+        Timer(SECONDS, scheduler.stop).start()
+        scheduler.start()
+        scheduler.run_loop(backend)
+
+    benchmark.pedantic(run, rounds=1, iterations=1)
+    scheduler.pool.shutdown(wait=True)
+    scheduler.log.flush()
+    lateness = sorted(late * 1000 for late in started)
+    benchmark.extra_info['lateness_median_ms'] = lateness[len(lateness) // 2]
+    benchmark.extra_info['lateness_p99_ms'] = lateness[int(len(lateness) * 0.99)]
+    benchmark.extra_info['lateness_max_ms'] = lateness[-1]
+    benchmark.extra_info['fires'] = len(lateness)
+    assert len(lateness) >= SECONDS / STEP / 2
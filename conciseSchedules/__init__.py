@@ -20,16 +20,174 @@ __description__ = 'A Concise Schedules module -- {} for Python.'.format(__title_
 
 import re
 import sys
-import pytz
-import time
+import random
+from bisect import bisect_right
+from functools import partial
 from copy import deepcopy
-from threading import Thread
-from subprocess import Popen
-from typing import List, Dict, Any, Callable, Tuple
-from datetime import datetime
-from traceback import print_exc
-from tzlocal import get_localzone
-from multiprocessing.pool import ThreadPool as Pool
+from threading import Thread, RLock, Lock, Event
+from collections import namedtuple
+from importlib import import_module
+from typing import List, Dict, Any, Callable, Tuple, Union, TYPE_CHECKING
+from datetime import datetime, timedelta
+from traceback import print_exc, format_exc, format_exception
+from .timers import TimerHeap, TimingWheel
+from .batch import SpecMatrix
+from .clock import Clock, Snapshot, Ticker, get_timezone, localize, local_timezone
+from .subprocs import Supervisor, ProcessRecord
+from .metrics import Metrics
+from .events import EventLog, TextSink, JsonSink
+from .store import SQLiteJobStore, resolve_target
+from .registry import TaskRegistry, Task
+from .ratelimit import TokenBucket
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from .executors import BoundedExecutor, ProcessExecutor
+    from .forkserver import ForkServer, ForkRecord
+    from .cluster import Cluster
+
+# asyncio, concurrent.futures, pytz, numpy, sqlite3 这些模块导入一次要几毫秒到几十毫秒,
+# 都在第一次用到时才导入. 下面这些名字仍然可以 from conciseSchedules import, 由模块的 __getattr__ 导入
+_lazy_names = {
+    'AsyncTimerHeap': '.timers',
+    'BoundedExecutor': '.executors',
+    'ProcessExecutor': '.executors',
+    'RejectedExecution': '.executors',
+    'ForkServer': '.forkserver',
+    'ForkRecord': '.forkserver',
+    'Cluster': '.cluster',
+    'LeaseBackend': '.cluster',
+    'SQLiteLeaseBackend': '.cluster',
+    'HashRing': '.cluster',
+    'ConfigWatcher': '.config',
+    'load_config': '.config',
+}
+
+
+class CompiledSpec(namedtuple('CompiledSpec', 'second minute hour day month weekday')):
+    '''
+ 编译后的定时规则, 在任务注册时由 _crontab_syntax_analyze / _schedule_syntax_analyze 的结果生成.
+ 每个时间字段保存为一个 int bitmask, 第 n 位为 1 表示该字段取值 n 时启动; 字段为 None 表示不限制.
+ 它是不可变的, 运行时只用它来判断是否到点, 不再重复解析 crontab / schedule 语法.
+    '''
+    __slots__ = ()
+
+    @classmethod
+    def from_collec(cls, collec: dict) -> 'CompiledSpec':
+        '''
+
+        :param collec: a dict like {'second': [0, 1, ...], 'minute': [...], ...}
+        :return:
+        '''
+        masks = dict.fromkeys(cls._fields)
+        for item, values in collec.items():
+            mask = 0
+            for x in values:
+                mask |= 1 << x
+            masks[item] = mask
+        return cls(**masks)
+
+    def match(self, date_time: datetime) -> bool:
+        '''
+
+        :param date_time:
+        :return: True if every field of date_time is set in its mask
+        '''
+        second, minute, hour, day, month, weekday = self
+        return bool(
+            (second is None or second >> date_time.second & 1)
+            and (minute is None or minute >> date_time.minute & 1)
+            and (hour is None or hour >> date_time.hour & 1)
+            and (day is None or day >> date_time.day & 1)
+            and (month is None or month >> date_time.month & 1)
+            and (weekday is None or weekday >> date_time.weekday() & 1)
+        )
+
+    @staticmethod
+    def _next_bit(mask: int, start: int) -> int:
+        '''返回 mask 中 >= start 的最小的置位, 没有则返回 -1'''
+        m = mask >> start
+        if not m:
+            return -1
+        return start + (m & -m).bit_length() - 1
+
+    def next_fire(self, after: datetime, max_years: int = 8) -> datetime:
+        '''
+        计算严格晚于 after 的下一个启动时间, after 是某个时区下的墙上时间(naive datetime).
+        second 为 None (crontab_tasks) 时在每分钟的第0秒启动.
+        :param after:
+        :param max_years: 超过这个年数仍没有匹配的时间 (例如 2月30日) 则返回 None
+        :return: naive datetime or None
+        '''
+        second, minute, hour, day, month, weekday = self
+        if second is None:
+            second = 1
+        next_bit = self._next_bit
+        t = after.replace(microsecond=0) + timedelta(seconds=1)
+        limit = t.year + max_years
+        while t.year <= limit:
+            if month is not None and not month >> t.month & 1:
+                if t.month == 12:
+                    t = datetime(t.year + 1, 1, 1)
+                else:
+                    t = datetime(t.year, t.month + 1, 1)
+                continue
+            if (day is not None and not day >> t.day & 1) or (weekday is not None and not weekday >> t.weekday() & 1):
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+                continue
+            if hour is not None and not hour >> t.hour & 1:
+                h = next_bit(hour, t.hour)
+                if h < 0 or h > 23:
+                    t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+                else:
+                    t = t.replace(hour=h, minute=0, second=0)
+                continue
+            if minute is not None and not minute >> t.minute & 1:
+                m = next_bit(minute, t.minute)
+                if m < 0 or m > 59:
+                    t = t.replace(minute=0, second=0) + timedelta(hours=1)
+                else:
+                    t = t.replace(minute=m, second=0)
+                continue
+            if not second >> t.second & 1:
+                sec = next_bit(second, t.second)
+                if sec < 0 or sec > 59:
+                    t = t.replace(second=0) + timedelta(minutes=1)
+                else:
+                    t = t.replace(second=sec)
+                continue
+            return t
+        return None
+
+
+class SubSecondSpec(CompiledSpec):
+    '''
+ 毫秒级的定时规则: 在 CompiledSpec 匹配的每一秒内, 按 offsets (毫秒, 0-999) 启动;
+ 或者 interval 不为 None 时, 从 1970-01-01 起每 interval 毫秒启动一次 (不能整除 1000 的间隔).
+ 这类任务由单独的毫秒级定时线程调度, 秒级的 poll 方式不会处理它们.
+    '''
+
+    def __new__(cls, spec: CompiledSpec, offsets: tuple = (0,), interval: int = None):
+        '''
+        :param spec: 秒和秒以上的字段
+        :param offsets: 每秒内的毫秒偏移
+        :param interval: 毫秒数
+        :return:
+        '''
+        self = super().__new__(cls, *spec)
+        self.offsets = tuple(sorted(set(offsets)))
+        self.fractions = tuple(x / 1000.0 for x in self.offsets)
+        self.interval = interval
+        self.every_second = all(mask is None for mask in spec)
+        return self
+
+    def __getnewargs__(self) -> tuple:
+        return CompiledSpec(*self), self.offsets, self.interval
+
+    def __repr__(self) -> str:
+        return '%s(%s, offsets=%s, interval=%s)' % (
+            type(self).__name__, repr(CompiledSpec(*self)), self.offsets, self.interval
+        )
 
 
 class Schedules:
@@ -51,6 +209,10 @@ class Schedules:
                              'weekday': int or None or tuple(strat, end),
                          }
              'crontab': '*/1(sechond) * * * * *'
+             'millisecond': int or list or '*/250', 在 schedule/crontab 匹配的每一秒内的毫秒偏移
+             'interval': 0.25, 每隔多少秒启动一次, 可以只写 interval 不写 schedule/crontab
+             'jitter': 每次启动随机推迟 0 到 jitter 秒
+             'spread': 按任务 id 的哈希值固定推迟 0 到 spread 秒, 同一时刻的任务均匀地错开
              'target': func,
              'args': func args,
              'kwargs': func kwargs,
@@ -64,7 +226,22 @@ class Schedules:
  或者  scheduler.add_task({'schedule_tasks': {'crontab': '*/1 * * * * *', 'target': tests_run, args=(arg1,)}})
 
  类参数说明:
- Schedules.pool_size: 线程池大小
+ Schedules.pool_size: 线程池的最大线程数
+ Schedules.pool_min_size: 线程池至少保留的线程数
+ Schedules.pool_target_wait: 任务在线程池队列中等待超过这个秒数并且没有空闲线程时增加线程, None 表示有排队就增加
+ Schedules.pool_idle_timeout: 线程空闲超过这个秒数就退出 (至少保留 pool_min_size 个), None 表示不退出
+ Schedules.queue_size: 线程池提交队列的上限, 0 表示不限制
+ Schedules.overflow: 提交队列满时的策略, 'block' 阻塞等待, 'drop_oldest' 丢弃最早的任务, 'reject' 拒绝新任务
+ Schedules.max_children: crontab_tasks 同时运行的子进程上限, 0 表示不限制. 单个任务的上限用任务配置 'max_instances'
+ Schedules.output_lines: 每个子进程保留的 stdout/stderr 行数
+ Schedules.log_queue_size: 日志队列的上限, 满了之后丢弃新的日志并计数, 0 表示不限制
+ Schedules.forkserver_preload: 'runner': 'python-forkserver' 的任务共用的 python 父进程预先 import 的模块
+ Schedules.process_pool_size: 进程池大小, 给配置了 'executor': 'process' 的任务使用, None 表示 CPU 核数
+ Schedules.process_max_tasks: 进程池中每个子进程执行多少个任务后回收重建, None 表示不回收
+ Schedules.backend: run_loop 的调度方式, 'heap' 按下次启动时间排序的最小堆, 'wheel' 分层时间轮(适合十万级以上任务),
+    'poll' 每秒/每分钟轮询所有任务
+ Schedules.misfire: 默认的 misfire 策略, 任务晚于 grace 秒才执行时: 'skip' 不执行, 'fire_once' 错过多次也只补一次, 'fire_all' 每次都补
+ Schedules.misfire_grace: 默认的 grace 秒数, 迟到不超过这个时间的任务照常执行
  Schedules.__point:  默认时间点, 没有设置某时间是, 用此值
  Schedules.__time_field_crontab:  crontab的默认字段
  Schedules.__all_time_crontab:  所有的crontab时间范围
@@ -94,6 +271,25 @@ class Schedules:
 
     '''
     pool_size = 10
+    pool_min_size = 1
+    pool_target_wait = 0.05
+    pool_idle_timeout = 60.0
+    queue_size = 1000
+    overflow = 'block'
+    max_children = 0
+    output_lines = 100
+    log_queue_size = 10000
+    __log_formats = ('text', 'json')
+    forkserver_preload = ()
+    process_pool_size = None
+    process_max_tasks = None
+    __executors = ('thread', 'process')
+    __runners = ('shell', 'python-forkserver')
+    backend = 'heap'
+    misfire = 'fire_once'
+    misfire_grace = 1
+    __misfires = ('skip', 'fire_once', 'fire_all')
+    __backends = ('heap', 'wheel', 'poll')
     __point = [1]
     __time_field_crontab = 'minute hour day month weekday'.split(' ')
     __all_time_crontab = [
@@ -122,6 +318,19 @@ class Schedules:
     __tasks_key_schedule = 'schedule'
     __tasks_key_target = 'target'
     __tasks_key_kwargs = 'kwargs'
+    __tasks_key_misfire = 'misfire'
+    __tasks_key_grace = 'grace'
+    __tasks_key_executor = 'executor'
+    __tasks_key_max_instances = 'max_instances'
+    __tasks_key_runner = 'runner'
+    __tasks_key_id = 'id'
+    __tasks_key_tags = 'tags'
+    __tasks_key_millisecond = 'millisecond'
+    __tasks_key_interval = 'interval'
+    __tasks_key_jitter = 'jitter'
+    __tasks_key_spread = 'spread'
+    __tasks_key_tz = 'tz'
+    __ms_pattern = re.compile('^(\*|\d{1,3}|\d{1,3}-\d{1,3})(/\d{1,3})?$')
     __max_7 = ['weekday']
     __max_12 = ['month']
     __max_24 = ['hour']
@@ -129,12 +338,39 @@ class Schedules:
     __max_60 = ['second', 'minute']
 
     def __init__(self, tasks_conf: Dict[str, List[Dict[str, Any]]] = None):
-        if tasks_conf is None:
-            self.conf = {}
-        else:
+        self.log = EventLog(TextSink(), self.log_queue_size)
+        self.registry = TaskRegistry((self.__key_crontab_tasks, self.__key_schedule_tasks))
+        self.clock = Clock()
+        self.__timer = TimerHeap(self.clock.time)
+        self.__timer_gen = 0
+        self.__timer_active = False
+        self.__fast_timer = TimerHeap(self.clock.time)
+        self.__fast_active = False
+        self.__matrix_cache = {}
+        self.__tickers = []
+        self.store = None
+        self.__specs = {}
+        self.__resume = {}
+        self.__tasks_lock = RLock()
+        self.__store_gen = 0
+        self.cluster = None
+        self.watcher = None
+        self.__dropped = set()
+        self.limiter = None
+        self.__wakeup = Event()
+        if tasks_conf is not None:
             self.set_tasks(tasks_conf)
         self.set_timezone()
         self.pool = None
+        self.process_pool = None
+        self.supervisor = Supervisor(
+            self.max_children, self.output_lines, sink=self.__crontab_output, on_exit=self.__crontab_exit
+        )
+        self.forkserver = None
+        self.metrics = Metrics()
+        self.__register_gauges()
+        self.__process_initializer = None
+        self.__process_initargs = ()
         self.__stop = 0
 
     @classmethod
@@ -328,97 +564,220 @@ class Schedules:
 
     @classmethod
     def get_date_time(cls, tz: str = None):
-        if not tz:
-            tz = 'Asia/Shanghai'
-        timezone = pytz.timezone(tz)
-        date_time = datetime.now(timezone)
-        return date_time
+        return datetime.now(get_timezone(tz))
 
     @classmethod
-    def __start_analyze(cls, collec: dict, tz: str = None) -> Tuple[List[bool], datetime]:
+    def compile_crontab(cls, crontab: str) -> CompiledSpec:
         '''
-
-        :param collec:
-        :param tz:
+        把 crontab_tasks 的 crontab 语法 "分 时 日 月 周" 编译成 CompiledSpec
+        :param crontab: a str like '*/1 * * * *'
         :return:
         '''
-        date_time = cls.get_date_time(tz)
-        condition = []
-        for item in collec:
-            tm = getattr(date_time, item)
-            if callable(tm):
-                tm = tm()
-            if tm in collec[item]:
-                condition.append(True)
-            else:
-                condition.append(False)
-        return condition, date_time
+        c = cls._crontab_syntax_analyze(cls.__time_field_crontab, crontab, cls.__default_crontab)
+        return CompiledSpec.from_collec(c)
 
     @classmethod
-    def __crontab_start(cls, crontab: str, shell: str, tz: str = None) -> None:
+    def compile_schedule(cls, schedule: dict = None, crontab: str = None) -> CompiledSpec:
         '''
-
+        把 schedule_tasks 的 schedule 或 crontab "秒 分 时 日 月 周" 编译成 CompiledSpec
+        :param schedule:
         :param crontab:
-        :param shell:
-        :param tz:
         :return:
         '''
-        c = cls._crontab_syntax_analyze(cls.__time_field_crontab, crontab, cls.__default_crontab)
-        condition, date_time = cls.__start_analyze(c, tz)
-        tzinfo = date_time.tzinfo
-        if all(condition):
-            p = Popen(shell, shell=True)
-            print(
-                "[%s %s]" % (tzinfo, date_time.strftime('%Y-%m-%d %H:%M:%S')),
-                'exec', "[%s]" % p.args, 'start', p.pid
-            )
+        if isinstance(crontab, str):
+            c = cls._crontab_syntax_analyze(cls.__time_field_schedule, crontab, cls.__default_schedule)
+        else:
+            c = cls._schedule_syntax_analyze(cls.__time_field_schedule, schedule, cls.__default_schedule)
+        return CompiledSpec.from_collec(c)
 
     @classmethod
-    def __schedules_start(
-            cls, target: Callable,
-            schedule: dict = None,
-            crontab: str = None,
-            args: tuple = None,
-            kwargs: dict = None,
-            tz: str = None
-    ) -> None:
+    def parse_millisecond(cls, millisecond: Union[int, list, str]) -> tuple:
+        '''
+        解析 schedule_tasks 的 'millisecond': 500, [0, 500] 或者 '*/250', '100-200/50', '0,500' 这样的写法
+        :param millisecond:
+        :return: sorted offsets in 0-999
         '''
-        :param target: a callable obj
-        :param schedule: a dict like {
-                            'second': int or None or tuple(strat, end),
-                            'minute': int or None or tuple(strat, end),
-                            'hour': int or None or tuple(strat, end),
-                            'day': int or None or tuple(strat, end),
-                            'month': int or None or tuple(strat, end),
-                            'weekday': int or None or tuple(strat, end),
-                        }
-        :param crontab: a str like '*/1(sechond) * * * * *'
-        :param args: func args
-        :param kwargs: func kwargs
+        if isinstance(millisecond, bool):
+            raise TypeError('millisecond must be int, list or str, got %s' % millisecond)
+        if isinstance(millisecond, int):
+            values = [millisecond]
+        elif isinstance(millisecond, (list, tuple)) and all(
+                isinstance(x, int) and not isinstance(x, bool) for x in millisecond
+        ):
+            values = list(millisecond)
+        elif isinstance(millisecond, str):
+            values = []
+            for part in millisecond.replace(' ', '').split(','):
+                m = cls.__ms_pattern.match(part)
+                if m is None:
+                    raise TypeError('millisecond syntax error, got %s' % millisecond)
+                head, step = m.group(1), m.group(2)
+                if head == '*':
+                    start, end = 0, 999
+                elif '-' in head:
+                    start, end = (int(x) for x in head.split('-'))
+                else:
+                    start = end = int(head)
+                    if step:
+                        end = 999
+                step = int(step[1:]) if step else 1
+                if step < 1 or start > end:
+                    raise TypeError('millisecond syntax error, got %s' % millisecond)
+                values.extend(range(start, end + 1, step))
+        else:
+            raise TypeError('millisecond must be int, list or str, got %s' % millisecond)
+        if not values or any(x < 0 or x > 999 for x in values):
+            raise TypeError('millisecond must in 0-999, got %s' % millisecond)
+        return tuple(sorted(set(values)))
+
+    @classmethod
+    def compile_subsecond(cls, spec: CompiledSpec, millisecond=None, interval: float = None) -> SubSecondSpec:
+        '''
+        在秒级的编译结果上加上毫秒. 能整除 1 秒的 interval 换算成每秒内的偏移, 例如 0.25 就是 [0, 250, 500, 750];
+        不能整除的 interval 从 1970-01-01 起按固定间隔启动, 所以不能再和 schedule/crontab 一起使用.
+        :param spec: compile_schedule 的结果, 没有 schedule/crontab 时为 None
+        :param millisecond: see parse_millisecond
+        :param interval: 秒数, 最小 0.001
         :return:
         '''
-        if isinstance(crontab, str):
-            c = cls._crontab_syntax_analyze(cls.__time_field_schedule, crontab, cls.__default_schedule)
+        if millisecond is not None and interval is not None:
+            raise TypeError('millisecond and interval can not be used together')
+        if spec is None:
+            spec = CompiledSpec(*(None,) * len(CompiledSpec._fields))
+        if millisecond is not None:
+            return SubSecondSpec(spec, cls.parse_millisecond(millisecond))
+        if isinstance(interval, bool) or not isinstance(interval, (int, float)) or interval < 0.001:
+            raise TypeError('interval must be a number >= 0.001, got %s' % interval)
+        step = int(round(interval * 1000))
+        if 1000 % step == 0:
+            return SubSecondSpec(spec, range(0, 1000, step))
+        if any(mask is not None for mask in spec):
+            raise TypeError('interval %s does not divide one second, it can not be used with schedule or crontab' % interval)
+        return SubSecondSpec(spec, (0,), step)
+
+    def __crontab_exec(self, item: dict, date_time: datetime, lateness: float = 0.0) -> None:
+        '''
+        通过 Supervisor 启动 shell, 子进程的输出, 退出码和运行时间由 Supervisor 记录
+        :param item: the crontab task dict
+        :param date_time:
+        :param lateness: 实际启动时间比计划时间晚了多少秒
+        :return:
+        '''
+        shell = item[self.__tasks_key_shell]
+        key = item.get('id') or shell
+        max_instances = item.get(self.__tasks_key_max_instances) or 0
+        argv = None
+        if item.get(self.__tasks_key_runner) == 'python-forkserver':
+            from .forkserver import ForkServer, parse_python_command
+            if ForkServer.available():
+                argv = parse_python_command(shell)
+        if argv is not None:
+            runner = self._get_forkserver()
+            record = runner.spawn(key, shell, argv, max_instances=max_instances, max_children=self.max_children)
         else:
-            c = cls._schedule_syntax_analyze(cls.__time_field_schedule, schedule, cls.__default_schedule)
-        condition, date_time = cls.__start_analyze(c, tz)
-        tzinfo = date_time.tzinfo
+            runner = self.supervisor
+            record = runner.spawn(key, shell, max_instances)
+        if record is None:
+            self.metrics.inc('skips', key)
+            self.__log('reject', date_time, shell, running=runner.count(key), total=runner.count())
+            return
+        self.__log('exec', date_time, record.args, pid=record.pid, late=lateness)
+
+    def __crontab_output(self, record: ProcessRecord, stream: str, line: str) -> None:
+        '''
+        Supervisor 读到的子进程输出, 逐行写进日志
+        :param record:
+        :param stream: 'stdout' or 'stderr'
+        :param line:
+        :return:
+        '''
+        self.__log('output', None, record.args, pid=record.pid, stream=stream, line=line)
+
+    def __crontab_exit(self, record: Union[ProcessRecord, 'ForkRecord']) -> None:
+        '''
+        :param record:
+        :return:
+        '''
+        date_time = datetime.fromtimestamp(record.finished, get_timezone(self.tzinfo))
+        if getattr(record, 'cancelled', False):
+            # forkserver 意外退出, 不知道子进程的结果, 不算失败
+            self.__log('exit', date_time, record.args, pid=record.pid, cancelled=True, duration=record.duration)
+            return
+        self.metrics.observe('duration_seconds', record.key, record.duration)
+        if record.returncode != 0:
+            self.metrics.inc('failures', record.key)
+        self.__log('exit', date_time, record.args, pid=record.pid, code=record.returncode, duration=record.duration)
+
+    def __log(self, event: str, date_time: datetime = None, task: str = None, **fields) -> None:
+        '''
+        把一条结构化日志交给后台线程写出, 不会阻塞调用方
+        :param event: 'exec', 'exit', 'reject', 'misfire', 'error', 'output', 'start', 'stop'
+        :param date_time: default now
+        :param task: the task display name
+        :param fields:
+        :return:
+        '''
+        if date_time is None:
+            date_time = self.get_date_time(self.tzinfo)
+        self.log.emit(event, date_time, task, fields)
+
+    def set_log(self, fmt: str = None, queue_size: int = None, sink: Callable = None) -> None:
+        '''
+        这个方法用来设置日志的格式和队列上限
+        :param fmt: 'text' (默认) or 'json' (JSON lines)
+        :param queue_size: 队列满时丢弃新的日志, 0 表示不限制
+        :param sink: a callable(event), 自定义的输出方式, 设置了 sink 时忽略 fmt
+        :return:
+        '''
+        self.__task_assert((queue_size, int), 1)
+        if fmt is not None and fmt not in self.__log_formats:
+            raise TypeError('fmt must in %s, got %s' % (self.__log_formats, fmt))
+        if sink is not None:
+            self.log.sink = sink
+        elif fmt == 'json':
+            self.log.sink = JsonSink()
+        elif fmt == 'text':
+            self.log.sink = TextSink()
+        if queue_size is not None:
+            self.log_queue_size = self.log.max_queue = queue_size
+
+    def __target(self, item: dict) -> Callable:
+        '''
+        从存储或者配置文件加载的任务 target 是 import 路径, 第一次执行时才 import, 之后从缓存中取
+        :param item:
+        :return:
+        '''
+        target = item[self.__tasks_key_target]
+        if isinstance(target, str):
+            target = resolve_target(target)
+        return target
+
+    def __schedules_exec(
+            self, target: Callable,
+            args: tuple,
+            kwargs: dict,
+            date_time: datetime,
+            lateness: float = 0.0
+    ) -> None:
+        '''
+
+        :param target:
+        :param args:
+        :param kwargs:
+        :param date_time:
+        :param lateness: 实际启动时间比计划时间晚了多少秒
+        :return:
+        '''
         if args is None:
             args = tuple()
         if kwargs is None:
             kwargs = dict()
-        if all(condition):
-            t = Thread(target=target, args=args, kwargs=kwargs)
-            t.start()
-            if hasattr(target, '__name__'):
-                name = target.__name__
-            else:
-                name = target
-            print(
-                "[%s %s]" % (tzinfo, date_time.strftime('%Y-%m-%d %H:%M:%S')),
-                'exec', '[%s(*%s, **%s)]' % (name, args, kwargs), 'start'
-            )
-            t.join()
+        if hasattr(target, '__name__'):
+            name = target.__name__
+        else:
+            name = target
+        self.__log('exec', date_time, '%s(*%s, **%s)' % (name, args, kwargs), late=lateness)
+        target(*args, **kwargs)
 
     def set_timezone(self, tz: str = None) -> None:
         '''
@@ -427,12 +786,13 @@ class Schedules:
         :return:
         '''
         if isinstance(tz, str):
-            tz_list = self.timezone_listing()
-            if tz not in tz_list:
+            try:
+                get_timezone(tz)
+            except (KeyError, ValueError, OSError):
                 raise TypeError('tz: %s invalid, you need use self.timezone_listing(country) got timezone info' % tz)
             tzinfo = tz
         else:
-            tzinfo = get_localzone()
+            tzinfo = local_timezone()
         if not tzinfo:
             tzinfo = 'Asia/Shanghai'
         self.tzinfo = str(tzinfo)
@@ -443,14 +803,39 @@ class Schedules:
          or use self.timezon_countrys() got!
          if country is None return ALL
         :return: the country timezone city list, default cn
+        没有安装 pytz 时用 zoneinfo 和系统时区数据库里的 zone.tab
         '''
+        try:
+            import pytz
+        except ImportError:
+            pytz = None
+        if pytz is not None:
+            if country is None:
+                return pytz.common_timezones
+            return pytz.country_timezones(country)
+        from zoneinfo import available_timezones
+        from .clock import zone_table
         if country is None:
-            return pytz.common_timezones
-        return pytz.country_timezones(country)
+            return sorted(available_timezones())
+        rows = zone_table('zone.tab')
+        if not rows:
+            raise ImportError('zone.tab not found, install pytz to look up timezones by country')
+        country = country.upper()
+        return [row[2] for row in rows if len(row) > 2 and row[0] == country]
 
     def timezon_countrys(self) -> dict:
-        ''':return countrys name dict'''
-        return dict(pytz.country_names)
+        ''':return countrys name dict, 没有安装 pytz 时读系统时区数据库里的 iso3166.tab'''
+        try:
+            import pytz
+        except ImportError:
+            pytz = None
+        if pytz is not None:
+            return dict(pytz.country_names)
+        from .clock import zone_table
+        rows = zone_table('iso3166.tab')
+        if not rows:
+            raise ImportError('iso3166.tab not found, install pytz to list countries')
+        return {row[0]: row[1] for row in rows if len(row) > 1}
 
     def __task_assert(self, item, stp=0) -> None:
         '''
@@ -470,8 +855,9 @@ class Schedules:
             assert isinstance(item, dict)
             assert isinstance(item.get(self.__tasks_key_schedule), dict) or item.get(self.__tasks_key_schedule) is None
             assert isinstance(item.get(self.__tasks_key_crontab), str) or item.get(self.__tasks_key_crontab) is None
-            assert item.get(self.__tasks_key_schedule) or item.get(self.__tasks_key_crontab)
-            assert callable(item.get(self.__tasks_key_target))
+            assert item.get(self.__tasks_key_schedule) or item.get(self.__tasks_key_crontab) \
+                or item.get(self.__tasks_key_interval) is not None or item.get(self.__tasks_key_millisecond) is not None
+            assert callable(item.get(self.__tasks_key_target)) or isinstance(item.get(self.__tasks_key_target), str)
             assert isinstance(item.get(self.__tasks_key_args), tuple) or item.get(self.__tasks_key_args) is None
             assert isinstance(item.get(self.__tasks_key_kwargs), dict) or item.get(self.__tasks_key_kwargs) is None
         elif stp == 4:
@@ -480,9 +866,346 @@ class Schedules:
             assert item[0] or item[1]
 
     def set_pool_size(self, size: int) -> None:
-        '''这个方法用来重设 pool_size(默认值为10)'''
+        '''这个方法用来重设 pool_size(默认值为10), 线程池已经启动时马上生效'''
         self.__task_assert((size, int), 0)
         Schedules.pool_size = size
+        if self.pool is not None:
+            self.pool.max_workers = size
+            self.pool.min_workers = min(self.pool.min_workers, size)
+
+    def set_autoscale(self, min_size: int = None, target_wait: float = None, idle_timeout: float = None) -> None:
+        '''
+        这个方法用来设置线程池的伸缩: 线程数在 pool_min_size 和 pool_size 之间,
+        任务排队超过 target_wait 秒时增加线程, 空闲超过 idle_timeout 秒的线程退出. 线程池已经启动时马上生效.
+        :param min_size: 默认值为1
+        :param target_wait: seconds, 默认值为0.05
+        :param idle_timeout: seconds, 默认值为60
+        :return:
+        '''
+        self.__task_assert((min_size, int), 1)
+        self.__task_assert((target_wait, (int, float)), 1)
+        self.__task_assert((idle_timeout, (int, float)), 1)
+        if min_size is not None:
+            if not 0 <= min_size <= self.pool_size:
+                raise ValueError('min_size must be between 0 and pool_size(%s), got %s' % (self.pool_size, min_size))
+            self.pool_min_size = min_size
+        if target_wait is not None:
+            self.pool_target_wait = target_wait
+        if idle_timeout is not None:
+            self.pool_idle_timeout = idle_timeout
+        if self.pool is not None:
+            self.pool.min_workers = self.pool_min_size
+            self.pool.target_wait = self.pool_target_wait
+            self.pool.idle_timeout = self.pool_idle_timeout
+
+    def set_process_pool(
+            self, size: int = None,
+            max_tasks: int = None,
+            initializer: Callable = None,
+            initargs: tuple = ()
+    ) -> None:
+        '''
+        这个方法用来设置 'executor': 'process' 任务使用的进程池, 需要在 run_loop 之前调用
+        :param size: 进程数, 默认 CPU 核数
+        :param max_tasks: 每个子进程执行多少个任务后回收重建, 默认不回收
+        :param initializer: 每个子进程启动时执行一次, 用来预先 import 或预热
+        :param initargs: initializer 的参数
+        :return:
+        '''
+        self.__task_assert((size, int), 1)
+        self.__task_assert((max_tasks, int), 1)
+        self.process_pool_size = size
+        self.process_max_tasks = max_tasks
+        self.__process_initializer = initializer
+        self.__process_initargs = initargs
+
+    def _get_process_pool(self) -> 'ProcessExecutor':
+        '''
+        :return:
+        '''
+        if self.process_pool is None:
+            from .executors import ProcessExecutor
+            self.process_pool = ProcessExecutor(
+                self.process_pool_size, self.process_max_tasks,
+                self.__process_initializer, self.__process_initargs
+            )
+        return self.process_pool
+
+    def set_supervisor(
+            self, max_children: int = None,
+            output_lines: int = None,
+            sink: Callable[[ProcessRecord, str, str], None] = None
+    ) -> None:
+        '''
+        这个方法用来设置 crontab_tasks 子进程的并发上限和输出处理
+        :param max_children: 同时运行的子进程上限, 0 表示不限制
+        :param output_lines: 每个子进程在内存中保留的 stdout/stderr 行数
+        :param sink: a callable(record, stream, line), 每行输出都会交给它处理, 默认打印到标准输出
+        :return:
+        '''
+        self.__task_assert((max_children, int), 1)
+        self.__task_assert((output_lines, int), 1)
+        if max_children is not None:
+            self.max_children = self.supervisor.max_children = max_children
+        if output_lines is not None:
+            self.output_lines = self.supervisor.output_lines = output_lines
+        if sink is not None:
+            self.supervisor.sink = sink
+
+    def set_forkserver(self, preload: List[str]) -> None:
+        '''
+        这个方法用来设置 'runner': 'python-forkserver' 任务共用的 python 父进程预先 import 的模块,
+        已经启动的父进程会被关闭, 下次启动任务时按新的 preload 重新启动
+        :param preload: module names, for example ['numpy', 'pandas']
+        :return:
+        '''
+        self.__task_assert((preload, (list, tuple)), 0)
+        self.forkserver_preload = tuple(preload)
+        if self.forkserver is not None:
+            self.forkserver.close()
+            self.forkserver = None
+
+    def _get_forkserver(self) -> 'ForkServer':
+        '''
+        :return:
+        '''
+        if self.forkserver is None:
+            from .forkserver import ForkServer
+            self.forkserver = ForkServer(self.forkserver_preload, on_exit=self.__crontab_exit)
+        return self.forkserver
+
+    def set_store(self, store: SQLiteJobStore, horizon: float = 60.0) -> None:
+        '''
+        这个方法用来设置持久化的任务存储, 应该在 set_tasks 之后, run_loop 之前调用.
+        存储中有, 当前配置中没有的任务 (例如上次运行时用 add_task 添加的) 会被加载进来, 当前配置中的任务会被写入存储.
+        启动时直接使用存储中的下一次启动时间, 停机期间错过的启动按任务的 misfire 策略补执行,
+        poll 方式没有定时队列, 错过的启动在 run_loop 开始时一次补完, 之后交给轮询.
+        只有 horizon 秒之内要启动的任务在这里同步加载, 其余的由后台线程分批加载, 任务很多时也可以马上开始调度.
+        后台写入失败时 store 写一条 'store' 日志, 这一批更新保留在内存中稍后重试.
+        :param store: for example SQLiteJobStore('jobs.db')
+        :param horizon: seconds
+        :return:
+        '''
+        if store.on_error is None:
+            store.on_error = lambda traceback: self.__log('store', None, None, action='flush', traceback=traceback)
+        # 读写存储都在 batch 之外, 轮询线程读快照时只会等内存中的合并, 不会等磁盘
+        with self.__tasks_lock:
+            until = self.clock.time() + horizon
+            rows = store.load(before=until)
+            with self.registry.batch():
+                self.__store_gen += 1
+                self.store = store
+                self.__resume = {}
+                self.__dropped = set()
+                current = self.registry.tasks()
+                self.__store_merge(rows)
+            self.__store_save(current)
+            if self.__timer_active or self.__fast_active:
+                self.__reset_timer()
+        Thread(
+            target=self.__store_load_rest, args=(store, self.__store_gen, until),
+            name='conciseSchedules_store_load', daemon=True
+        ).start()
+
+    def __store_merge(self, rows: list) -> list:
+        '''
+        把存储中有, registry 中没有的任务加进来
+        :param rows: SQLiteJobStore.load 的结果
+        :return: 新加入的 Task list
+        '''
+        added = []
+        for task_id, kind, item, masks, last_fire, next_fire in rows:
+            if task_id in self.__dropped:
+                continue
+            if task_id not in self.registry:
+                if item.get(self.__tasks_key_millisecond) is not None or item.get(self.__tasks_key_interval) is not None:
+                    # 存储中只有秒级的 bitmask, 毫秒级的任务重新编译
+                    task = self.__compile_task(kind, item)
+                else:
+                    spec = self.__specs.setdefault(tuple(masks), CompiledSpec(*masks))
+                    task = Task(kind, spec, item, tags=item.get(self.__tasks_key_tags) or ())
+                task.task_id = task_id
+                self.registry.add(task)
+                added.append(task)
+            if next_fire is not None or last_fire is not None:
+                self.__resume[task_id] = (last_fire, next_fire)
+        return added
+
+    def __store_load_rest(self, store: SQLiteJobStore, gen: int, after: float, chunk: int = 5000) -> None:
+        '''
+        后台加载 horizon 之后才启动的任务, 每一批在锁内合并, 调度已经开始时直接放进定时队列
+        :param store:
+        :param gen: set_store/set_tasks 之后就不再合并
+        :param after:
+        :param chunk:
+        :return:
+        '''
+        try:
+            rows = store.load(after=after)
+        except Exception:
+            self.__log('store', None, None, action='load', traceback=format_exc())
+            return
+        for start in range(0, len(rows), chunk):
+            with self.__tasks_lock, self.registry.batch():
+                if gen != self.__store_gen:
+                    return
+                for task in self.__store_merge(rows[start:start + chunk]):
+                    self.__schedule_next(task)
+        with self.__tasks_lock:
+            if gen == self.__store_gen:
+                self.__dropped = set()
+        self.__log('store', None, None, action='load', tasks=len(rows))
+
+    def __register(self, task: Task) -> str:
+        '''
+        给编译好的任务分配 id 并放进 registry, 'id' 相同时替换原来的任务.
+        没有 'id' 并且内容完全一样的任务依次加上 '#2', '#3' 区分.
+        :param task:
+        :return: the task id
+        '''
+        item = task.item
+        task_id = SQLiteJobStore.task_id(task.kind, item)
+        if not item.get(self.__tasks_key_id):
+            base, n = task_id, 1
+            while task_id in self.registry:
+                n += 1
+                task_id = '%s#%d' % (base, n)
+        task.task_id = task_id
+        self.registry.add(task)
+        return task_id
+
+    def __store_save(self, tasks: List[Task], replace: bool = False) -> None:
+        '''
+        把任务定义写入存储, target 不能 import 的任务 (lambda, 嵌套函数, __main__ 中的函数) 只保存在内存中
+        :param tasks: 已经注册的任务
+        :param replace: 删除存储中不在 tasks 里的任务
+        :return:
+        '''
+        store = self.store
+        rows = []
+        for task in tasks:
+            if store.dump(task.item) is None:
+                self.__log('store', None, self.task_name(task.item), action='skip', reason='not persistable')
+                continue
+            rows.append((task.task_id, task.kind, task.item, task.spec))
+        store.save(rows)
+        if replace:
+            keep = set(row[0] for row in rows)
+            store.delete([task_id for task_id in store.ids() if task_id not in keep])
+
+    def __record_fire(self, task: Task, date_time: datetime) -> None:
+        '''
+        :param task:
+        :param date_time: the fire time
+        :return:
+        '''
+        if self.store is not None:
+            self.store.record(task.task_id, last_fire=date_time.timestamp())
+
+    def set_cluster(self, cluster: 'Cluster') -> None:
+        '''
+        这个方法用来设置多节点协调, 多个节点运行同样的任务配置时, 每次启动只有拿到租约的节点执行.
+        任务最好配置 'id', 没有 id 时用任务内容的哈希值, 各节点的配置必须完全一样.
+        :param cluster: for example Cluster(SQLiteLeaseBackend('leases.db'), shard=True)
+        :return:
+        '''
+        from .cluster import Cluster
+        self.__task_assert((cluster, Cluster), 1)
+        if self.cluster is not None and self.cluster is not cluster:
+            self.cluster.close()
+        self.cluster = cluster
+        if cluster is not None:
+            cluster.start()
+
+    def __claim(self, task: Task, date_time: datetime) -> bool:
+        '''
+        :param task:
+        :param date_time: the fire time
+        :return: True if this node should run this fire
+        '''
+        cluster = self.cluster
+        if cluster is None:
+            return True
+        try:
+            if cluster.claim(task.task_id, date_time.timestamp()):
+                return True
+        except Exception:
+            # 后端不可用时宁可不执行, 也不要在多个节点上重复执行
+            self.__log('error', date_time, self.task_name(task.item), reason='lease', traceback=format_exc())
+        self.metrics.inc('unclaimed', self.task_name(task.item))
+        return False
+
+    def set_rate_limit(self, rate: float = None, burst: float = 1) -> None:
+        '''
+        这个方法用来设置全局的启动速率上限 (令牌桶), 同一时刻到点的大批任务按这个速率依次启动, 计划的启动时间不变.
+        排队的启动放进毫秒级的定时队列, 不会阻塞调度线程. 毫秒级的任务不受限制.
+        :param rate: 每秒最多启动多少个任务, None 表示不限制
+        :param burst: 空闲之后最多可以连续启动多少个任务不用等待
+        :return:
+        '''
+        self.__task_assert((rate, (int, float)), 1)
+        self.__task_assert((burst, (int, float)), 0)
+        self.limiter = None if rate is None else TokenBucket(rate, burst, self.clock.monotonic)
+
+    def __throttle(self, item: dict) -> float:
+        '''
+        :param item:
+        :return: 按全局速率上限需要等待的秒数
+        '''
+        limiter = self.limiter
+        if limiter is None:
+            return 0.0
+        delay = limiter.reserve()
+        if delay > 0:
+            self.metrics.inc('throttled', self.task_name(item))
+        return delay
+
+    def __defer(self, task: Task, date_time: datetime, delay: float) -> bool:
+        '''
+        按全局速率排队: 这一次启动放进毫秒级的定时队列, 推迟 delay 秒之后再提交, 计划的启动时间不变.
+        令牌已经预留, 调度线程不用等, 同一时刻的其他任务和毫秒级的任务照常启动
+        :param task:
+        :param date_time: the fire time
+        :param delay: __throttle 的结果
+        :return: False if the timer is not running
+        '''
+        if not self.__fast_active:
+            return False
+        timer = self.__fast_timer
+        timer.push(self.clock.time() + delay, (self.__timer_gen, task, date_time.timestamp(), date_time))
+        return True
+
+    def __delay(self, task_id: str, item: dict) -> float:
+        '''
+        :param task_id:
+        :param item:
+        :return: 'spread' 和 'jitter' 加起来推迟的秒数
+        '''
+        delay = 0.0
+        spread = item.get(self.__tasks_key_spread)
+        if spread:
+            from .cluster import HashRing
+            delay += HashRing.hash(task_id) / 2.0 ** 64 * spread
+        jitter = item.get(self.__tasks_key_jitter)
+        if jitter:
+            delay += random.random() * jitter
+        return delay
+
+    def set_queue(self, size: int, overflow: str = None) -> None:
+        '''
+        这个方法用来重设提交队列的上限 queue_size(默认值为1000) 和队列满时的策略 overflow(默认值为'block'),
+        需要在 run_loop 之前调用
+        :param size: 0 表示不限制
+        :param overflow: 'block', 'drop_oldest' or 'reject'
+        :return:
+        '''
+        self.__task_assert((size, int), 0)
+        if overflow is not None:
+            from .executors import BoundedExecutor
+            if overflow not in BoundedExecutor.overflows:
+                raise TypeError('overflow must in %s, got %s' % (BoundedExecutor.overflows, overflow))
+            self.overflow = overflow
+        self.queue_size = size
 
     def set_tasks(self, tasks_conf: Dict[str, List[Dict[str, Any]]]) -> None:
         '''
@@ -512,17 +1235,246 @@ class Schedules:
         '''
         self.__task_assert((tasks_conf, dict), 0)
         self.__task_assert((self.__key_crontab_tasks, self.__key_schedule_tasks, tasks_conf), 4)
+        compiled = []
+        self.__specs = {}
         crontab_tasks = tasks_conf.get(self.__key_crontab_tasks)
         if crontab_tasks:
             self.__task_assert((crontab_tasks, list), 0)
             for item in crontab_tasks:
                 self.__task_assert(item, 2)
+                compiled.append(self.__compile_task(self.__key_crontab_tasks, item))
         schedule_tasks = tasks_conf.get(self.__key_schedule_tasks)
         if schedule_tasks:
             self.__task_assert((schedule_tasks, list), 0)
             for item in schedule_tasks:
                 self.__task_assert(item, 3)
-        self.conf = tasks_conf
+                compiled.append(self.__compile_task(self.__key_schedule_tasks, item))
+        with self.__tasks_lock:
+            with self.registry.batch():
+                self.__store_gen += 1
+                self.registry.clear()
+                for task in compiled:
+                    self.__register(task)
+            if self.store is not None:
+                self.__store_save(compiled, replace=True)
+        if self.__timer_active or self.__fast_active:
+            self.__reset_timer()
+
+    def update_tasks(self, tasks_conf: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+        '''
+        增量更新任务配置: 按任务 id 对比新旧配置, 只重新编译和调度新增, 修改和删除的任务.
+        没有变化的任务保持原来的下一次启动时间, 正在执行的任务不受影响.
+        没有配置 'id' 的任务用内容的哈希值作为 id, 内容变化相当于删除之后再新增.
+        :param tasks_conf: the same as set_tasks
+        :return: {'added': n, 'changed': n, 'removed': n}
+        '''
+        self.__task_assert((tasks_conf, dict), 0)
+        self.__task_assert((self.__key_crontab_tasks, self.__key_schedule_tasks, tasks_conf), 4)
+        stps = {self.__key_crontab_tasks: 2, self.__key_schedule_tasks: 3}
+        counts = {'added': 0, 'changed': 0, 'removed': 0}
+        fresh = []
+        paused = set()
+        seen = {}
+        with self.__tasks_lock:
+            old = {task.task_id: task for task in self.registry.tasks()}
+        for kind, stp in stps.items():
+            items = tasks_conf.get(kind) or []
+            self.__task_assert((items, list), 0)
+            for item in items:
+                self.__task_assert(item, stp)
+                task_id = SQLiteJobStore.task_id(kind, item)
+                if not item.get(self.__tasks_key_id):
+                    # 和 __register 一样给内容相同的任务编号
+                    n = seen[task_id] = seen.get(task_id, 0) + 1
+                    if n > 1:
+                        task_id = '%s#%d' % (task_id, n)
+                task = old.pop(task_id, None)
+                if task is not None and task.kind == kind and self.__task_key(task.item) == self.__task_key(item):
+                    continue
+                counts['added' if task is None else 'changed'] += 1
+                if task is not None and task.paused:
+                    paused.add(task_id)
+                fresh.append(self.__compile_task(kind, item))
+        counts['removed'] = len(old)
+        with self.__tasks_lock:
+            with self.registry.batch():
+                self.__store_gen += 1
+                for task_id in old:
+                    self.registry.remove(task_id)
+                for task in fresh:
+                    task_id = self.__register(task)
+                    if task_id in paused:
+                        self.registry.pause(task_id)
+            if self.store is not None:
+                if fresh:
+                    self.__store_save(fresh)
+                if old:
+                    self.store.delete(list(old))
+            for task in fresh:
+                self.__schedule_next(task)
+        return counts
+
+    @staticmethod
+    def __task_key(item: dict) -> dict:
+        '''
+        用来判断任务有没有变化, 重新加载的 python 配置文件中的函数是新的对象, 按模块, 名字和代码比较
+        :param item:
+        :return:
+        '''
+        key = {}
+        for k, v in item.items():
+            if callable(v):
+                v = (getattr(v, '__module__', None), getattr(v, '__qualname__', None), getattr(v, '__code__', v))
+            key[k] = v
+        return key
+
+    def watch_tasks(self, path: str, interval: float = 1.0) -> None:
+        '''
+        这个方法用来从配置文件加载任务, 并在文件变化时用 update_tasks 增量更新.
+        文件格式和 set_tasks 的参数一样, 支持 JSON, YAML (需要安装 PyYAML) 和定义了 tasks_conf 变量的 python 文件,
+        JSON 和 YAML 中的 target 写成 'module:name' 形式的 import 路径. 重新加载出错时保留原来的配置.
+        :param path: a .json, .yaml/.yml or .py file
+        :param interval: 检查文件的间隔秒数, linux 上文件一写完就会更新
+        :return:
+        '''
+        self.__task_assert((path, str), 0)
+        if self.watcher is not None:
+            self.watcher.close()
+        from .config import ConfigWatcher, load_config
+        self.update_tasks(load_config(path))
+        self.watcher = ConfigWatcher(path, self.__reload, interval)
+
+    def __reload(self, path: str) -> None:
+        from .config import load_config
+        try:
+            counts = self.update_tasks(load_config(path))
+        except Exception:
+            self.__log('error', None, path, reason='reload', traceback=format_exc())
+            return
+        self.__log('reload', None, path, **counts)
+
+    def __compile_task(self, kind: str, item: dict) -> Task:
+        '''
+        任务注册时编译一次, 运行时只使用编译结果. 规则相同的任务共用同一个 spec, 也只解析一次
+        :param kind: 'crontab_tasks' or 'schedule_tasks'
+        :param item: the task dict
+        :return: a Task without task_id, see __register
+        '''
+        misfire = item.get(self.__tasks_key_misfire)
+        if misfire is not None and misfire not in self.__misfires:
+            raise TypeError('misfire must in %s, got %s' % (self.__misfires, misfire))
+        grace = item.get(self.__tasks_key_grace)
+        if grace is not None and (not isinstance(grace, (int, float)) or grace < 0):
+            raise TypeError('grace must be a number >= 0, got %s' % grace)
+        executor = item.get(self.__tasks_key_executor)
+        if executor is not None and executor not in self.__executors:
+            raise TypeError('executor must in %s, got %s' % (self.__executors, executor))
+        runner = item.get(self.__tasks_key_runner)
+        if runner is not None and runner not in self.__runners:
+            raise TypeError('runner must in %s, got %s' % (self.__runners, runner))
+        for key in (self.__tasks_key_jitter, self.__tasks_key_spread):
+            value = item.get(key)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+                raise TypeError('%s must be a number >= 0, got %s' % (key, value))
+        tz = item.get(self.__tasks_key_tz)
+        if tz is not None:
+            # 在注册之前找出无效的时区, 否则要到第一次计算启动时间时才出错, registry 里已经有了这个任务
+            try:
+                get_timezone(tz)
+            except (KeyError, ValueError, TypeError, OSError):
+                raise TypeError('tz: %s invalid, you need use self.timezone_listing(country) got timezone info' % (tz,))
+        tags = item.get(self.__tasks_key_tags)
+        if tags is not None and (not isinstance(tags, (list, tuple)) or not all(isinstance(t, str) for t in tags)):
+            raise TypeError('tags must be a list of str, got %s' % (tags,))
+        if kind == self.__key_crontab_tasks:
+            if executor == 'process':
+                raise TypeError('crontab_tasks is already run as a shell process, executor must be thread')
+            key = (kind, item[self.__tasks_key_crontab])
+            spec = self.__specs.get(key)
+            if spec is None:
+                spec = self.__specs[key] = self.compile_crontab(item[self.__tasks_key_crontab])
+        else:
+            schedule = item.get(self.__tasks_key_schedule)
+            crontab = item.get(self.__tasks_key_crontab)
+            millisecond = item.get(self.__tasks_key_millisecond)
+            interval = item.get(self.__tasks_key_interval)
+            key = (kind, crontab, repr(sorted(schedule.items())) if schedule else None, repr(millisecond), interval)
+            spec = self.__specs.get(key)
+            if spec is None:
+                if schedule or crontab:
+                    spec = self.compile_schedule(schedule, crontab)
+                if millisecond is not None or interval is not None:
+                    spec = self.compile_subsecond(spec, millisecond, interval)
+                self.__specs[key] = spec
+        return Task(kind, spec, item, tags=tags or ())
+
+    def __misfire_policy(self, item: dict) -> Tuple[str, float]:
+        '''
+        :param item: the task dict
+        :return: (misfire, grace)
+        '''
+        misfire = item.get(self.__tasks_key_misfire) or self.misfire
+        grace = item.get(self.__tasks_key_grace)
+        if grace is None:
+            grace = self.misfire_grace
+        return misfire, grace
+
+    def __report_misfire(self, kind: str, item: dict, date_time: datetime, lateness: float) -> None:
+        '''
+        :param kind:
+        :param item:
+        :param date_time: 计划的启动时间
+        :param lateness:
+        :return:
+        '''
+        name = item.get('shell') or getattr(item.get('target'), '__name__', item.get('target'))
+        self.metrics.inc('skips', self.task_name(item))
+        self.__log('misfire', date_time, name, action='skip', late=lateness)
+
+    @classmethod
+    def task_name(cls, item: dict) -> str:
+        '''
+        任务在监控指标中使用的名字: 'id', 没有 id 时是 shell 或者 target 的函数名
+        :param item: the task dict
+        :return:
+        '''
+        name = item.get('id') or item.get(cls.__tasks_key_shell)
+        if not name:
+            target = item.get(cls.__tasks_key_target)
+            name = getattr(target, '__name__', None) or str(target)
+        return name
+
+    def __register_gauges(self) -> None:
+        '''线程池和子进程的状态在导出时才读取'''
+        metrics = self.metrics
+        metrics.gauge('queue_depth', lambda: self.pool.queue_depth if self.pool else 0, '线程池中等待执行的任务数')
+        metrics.gauge('in_flight', lambda: self.pool.in_flight if self.pool else 0, '线程池中正在执行的任务数')
+        metrics.gauge('pool_workers', lambda: self.pool.workers if self.pool else 0, '线程池当前的线程数')
+        metrics.gauge(
+            'pool_queue_wait_seconds', lambda: self.pool.queue_wait if self.pool else 0,
+            '线程池中任务排队时间的指数移动平均'
+        )
+        metrics.gauge('pool_scale_ups', lambda: self.pool.scale_ups if self.pool else 0, '线程池累计增加线程的次数')
+        metrics.gauge('pool_scale_downs', lambda: self.pool.scale_downs if self.pool else 0, '线程池累计减少线程的次数')
+        metrics.gauge(
+            'process_in_flight', lambda: self.process_pool.in_flight if self.process_pool else 0,
+            '进程池中正在执行的任务数'
+        )
+        metrics.gauge(
+            'children', lambda: self.supervisor.count() + (self.forkserver.count() if self.forkserver else 0),
+            '正在运行的 crontab_tasks 子进程数'
+        )
+        metrics.gauge('log_queue_depth', lambda: self.log.queue_depth, '等待写出的日志数')
+        metrics.gauge('log_dropped', lambda: self.log.dropped, '日志队列满时累计丢弃的日志数')
+
+    def serve_metrics(self, port: int = 9108, host: str = '127.0.0.1'):
+        '''
+        在本地启动 HTTP 端口, GET /metrics 返回 Prometheus 文本格式的指标, 也可以直接调用 self.metrics.render()
+        :param port:
+        :param host:
+        :return: the http server, server.shutdown() to stop it
+        '''
+        return self.metrics.serve(port, host)
 
     def add_task(self, t: Dict[str, dict]) -> None:
         '''
@@ -545,26 +1497,135 @@ class Schedules:
         crontab = t.get(self.__key_crontab_tasks)
         self.__task_assert((crontab, dict), 1)
         if crontab:
-            self.__task_assert(crontab, 3)
-            if not isinstance(self.conf.get(self.__key_crontab_tasks), list):
-                self.conf[self.__key_crontab_tasks] = []
-            self.conf[self.__key_crontab_tasks].append(crontab)
+            self.__task_assert(crontab, 2)
+            task = self.__compile_task(self.__key_crontab_tasks, crontab)
+            with self.__tasks_lock:
+                self.__register(task)
+                if self.store is not None:
+                    self.__store_save([task])
+                self.__schedule_next(task)
 
         schedule = t.get(self.__key_schedule_tasks)
         self.__task_assert((schedule, dict), 1)
         if schedule:
             self.__task_assert(schedule, 3)
-            if not isinstance(self.conf.get(self.__key_schedule_tasks), list):
-                self.conf[self.__key_schedule_tasks] = []
-            self.conf[self.__key_schedule_tasks].append(schedule)
+            task = self.__compile_task(self.__key_schedule_tasks, schedule)
+            with self.__tasks_lock:
+                self.__register(task)
+                if self.store is not None:
+                    self.__store_save([task])
+                self.__schedule_next(task)
+
+    @property
+    def conf(self) -> Dict[str, List[Dict[str, Any]]]:
+        '''
+        :return: 当前的任务配置, 包括暂停的任务
+        '''
+        with self.__tasks_lock:
+            return {kind: [task.item for task in self.registry.tasks(kind)] for kind in self.registry.kinds()}
 
-    def task(self, schedule: dict = None, crontab: str = None, args: tuple = None, kwargs: dict = None) -> Callable:
+    def get_task(self, task_id: str) -> dict:
+        '''
+        :param task_id: 任务配置里的 'id', 没有 id 的任务是内容的哈希值, 见 task_ids()
+        :return: the task dict, None if not found
+        '''
+        task = self.registry.get(task_id)
+        return None if task is None else task.item
+
+    def task_ids(self, tag: str = None) -> List[str]:
+        '''
+        :param tag: 只返回 'tags' 中有这个标签的任务
+        :return: task ids
+        '''
+        with self.__tasks_lock:
+            if tag is None:
+                return self.registry.ids()
+            return list(self.registry.tagged(tag))
+
+    def remove_task(self, task_id: str) -> dict:
+        '''
+        删除任务, 马上生效, 已经开始执行的不受影响
+        :param task_id:
+        :return: the removed task dict, None if not found
+        '''
+        with self.__tasks_lock:
+            task = self.registry.remove(task_id)
+            if task is None:
+                return None
+            if self.store is not None:
+                # 后台还在加载存储时, 不要再把它加回来
+                self.__dropped.add(task_id)
+                self.store.delete([task_id])
+        return task.item
+
+    def pause_task(self, task_id: str) -> bool:
+        '''
+        暂停任务, 已经放进定时队列的下一次启动也不再执行
+        :param task_id:
+        :return: False if not found
+        '''
+        with self.__tasks_lock:
+            return self.registry.pause(task_id) is not None
+
+    def resume_task(self, task_id: str) -> bool:
+        '''
+        恢复暂停的任务, 从现在开始计算下一次启动时间, 暂停期间错过的启动不补执行
+        :param task_id:
+        :return: False if not found
+        '''
+        with self.__tasks_lock:
+            task = self.registry.get(task_id)
+            if task is None:
+                return False
+            if task.paused:
+                self.__schedule_next(self.registry.resume(task_id))
+            return True
+
+    def update_task(self, task_id: str, changes: dict) -> dict:
+        '''
+        修改任务的部分配置, 重新编译并计算下一次启动时间, 暂停的任务仍然保持暂停
+        :param task_id:
+        :param changes: for example {'crontab': '*/5 * * * * *'} or {'args': (2,)}
+        :return: the new task dict, None if not found
+        '''
+        self.__task_assert((changes, dict), 0)
+        task = self.registry.get(task_id)
+        if task is None:
+            return None
+        kind = task.kind
+        item = dict(task.item)
+        item.update(changes)
+        # 没有 id 的任务用内容的哈希值作为 id, 修改之后要保持原来的 id
+        item[self.__tasks_key_id] = task_id
+        self.__task_assert(item, 2 if kind == self.__key_crontab_tasks else 3)
+        task = self.__compile_task(kind, item)
+        with self.__tasks_lock:
+            with self.registry.batch():
+                if self.registry.get(task_id) is None:
+                    return None
+                paused = self.registry.get(task_id).paused
+                self.__register(task)
+                if paused:
+                    self.registry.pause(task_id)
+            if self.store is not None:
+                self.__store_save([task])
+            self.__schedule_next(task)
+        return item
+
+    def task(
+            self, schedule: dict = None,
+            crontab: str = None,
+            args: tuple = None,
+            kwargs: dict = None,
+            **options
+    ) -> Callable:
         '''
 
         :param schedule:
         :param crontab:
         :param args:
         :param kwargs:
+        :param options: other task keys, for example misfire='skip', grace=5
         :return:
         '''
         add_task = self.add_task
@@ -578,15 +1639,15 @@ class Schedules:
         def add(func) -> Callable:
             def wrap(*params, __task__=True, **kwparams):
                 if not __task__:
-                    t = {key_schedule_tasks:
-                        {
-                            tasks_key_schedule: schedule,
-                            tasks_key_crontab: crontab,
-                            tasks_key_target: func,
-                            tasks_key_args: args,
-                            tasks_key_kwargs: kwargs,
-                        }
+                    item = {
+                        tasks_key_schedule: schedule,
+                        tasks_key_crontab: crontab,
+                        tasks_key_target: func,
+                        tasks_key_args: args,
+                        tasks_key_kwargs: kwargs,
                     }
+                    item.update(options)
+                    t = {key_schedule_tasks: item}
                     add_task(t)
                     return func
                 else:
@@ -596,164 +1657,683 @@ class Schedules:
 
         return add
 
-    def _get_pool(self) -> Pool:
+    def _get_pool(self) -> 'BoundedExecutor':
         '''
 
         :return:
         '''
-        crontab_tasks = self.conf.get(self.__key_crontab_tasks) or []
-        schedule_tasks = self.conf.get(self.__key_schedule_tasks) or []
-        task_len = len(crontab_tasks) + len(schedule_tasks)
-        if 0 < task_len < 10:
-            size = task_len
+        from .executors import BoundedExecutor
+        return BoundedExecutor(
+            self.pool_size, self.queue_size, self.overflow,
+            min_workers=min(self.pool_min_size, self.pool_size), target_wait=self.pool_target_wait,
+            idle_timeout=self.pool_idle_timeout, on_scale=self.__pool_scaled
+        )
+
+    def __pool_scaled(self, event: str, workers: int, reason: str) -> None:
+        '''
+        :param event: 'up' or 'down'
+        :param workers: 伸缩之后的线程数
+        :param reason: 'queue', 'min', 'wait' or 'idle'
+        :return:
+        '''
+        pool = self.pool
+        self.__log('scale', None, None, action=event, workers=workers, reason=reason,
+                   queue_wait=pool.queue_wait if pool is not None else 0.0)
+
+    def __submit(self, task: Task, date_time: datetime, reserved: bool = False) -> 'Future':
+        '''
+        把到点的任务交给线程池直接执行
+        :param task:
+        :param date_time:
+        :param reserved: 已经拿到租约和令牌, 被限速推迟之后再次提交
+        :return: Future, or None if rejected or throttled
+        '''
+        item = task.item
+        if not reserved:
+            if not self.__claim(task, date_time):
+                return None
+            if type(task.spec) is not SubSecondSpec:
+                delay = self.__throttle(item)
+                if delay > 0 and not self.__defer(task, date_time, delay):
+                    # 没有运行 run_loop (run 只检查一次) 时没有定时队列, 只能在这里等
+                    self.__wakeup.wait(delay)
+                elif delay > 0:
+                    return None
+        self.__record_fire(task, date_time)
+        if item.get(self.__tasks_key_executor) == 'process':
+            return self.__submit_process(task, date_time)
+        if self.pool is None:
+            self.pool = self._get_pool()
+        from .executors import RejectedExecution
+        try:
+            if type(task.spec) is SubSecondSpec:
+                future = self.pool.submit_first(self.__fire, task, date_time)
+            else:
+                future = self.pool.submit(self.__fire, task, date_time)
+        except RejectedExecution:
+            self.metrics.inc('skips', self.task_name(item))
+            name = item.get(self.__tasks_key_shell) or getattr(item.get(self.__tasks_key_target), '__name__', None)
+            self.__log('reject', date_time, name, reason='queue full', queue_depth=self.pool.queue_depth)
+            return None
+        # overflow 为 'drop_oldest' 时被挤出队列的任务会被取消
+        future.add_done_callback(lambda f: f.cancelled() and self.metrics.inc('skips', self.task_name(item)))
+        return future
+
+    def __submit_process(self, task: Task, date_time: datetime) -> 'Future':
+        '''
+        CPU 密集型的任务直接交给进程池, 不占用线程池
+        :param task:
+        :param date_time:
+        :return:
+        '''
+        item = task.item
+        target = self.__target(item)
+        args = item.get(self.__tasks_key_args) or tuple()
+        kwargs = item.get(self.__tasks_key_kwargs) or dict()
+        started = self.clock.time()
+        lateness = max(0.0, started - date_time.timestamp())
+        name = self.task_name(item)
+        self.metrics.inc('fires', name)
+        self.metrics.observe('lateness_seconds', name, lateness)
+        self.__log(
+            'exec', date_time, '%s(*%s, **%s)' % (getattr(target, '__name__', target), args, kwargs),
+            executor='process', late=lateness
+        )
+        future = self._get_process_pool().submit(target, *args, **kwargs)
+        future.add_done_callback(partial(self.__process_done, name, started))
+        return future
+
+    def __process_done(self, name: str, started: float, future: 'Future') -> None:
+        self.metrics.observe('duration_seconds', name, self.clock.time() - started)
+        error = future.exception()
+        if error is not None:
+            self.metrics.inc('failures', name)
+            self.__log('error', None, name, traceback=''.join(format_exception(type(error), error, error.__traceback__)))
+
+    def __next_deadline(self, spec: CompiledSpec, item: dict, after: float) -> float:
+        '''
+        按任务的时区计算 after 之后的下一次启动时间
+        :param spec: task.spec
+        :param item: task.item
+        :param after: a time.time() timestamp
+        :return: a time.time() timestamp or None
+        '''
+        if type(spec) is SubSecondSpec:
+            return self.__next_fine_deadline(spec, item, after)
+        timezone = get_timezone(item.get('tz', self.tzinfo))
+        wall = datetime.fromtimestamp(after, timezone).replace(tzinfo=None)
+        while 1:
+            nxt = spec.next_fire(wall)
+            if nxt is None:
+                return None
+            deadline = localize(nxt, timezone).timestamp()
+            if deadline > after:
+                return deadline
+            wall = nxt
+
+    def __next_fine_deadline(self, spec: SubSecondSpec, item: dict, after: float) -> float:
+        '''
+        毫秒级任务的下一次启动时间: 当前这一秒还有没到的偏移就用它, 否则取下一个匹配的秒加上第一个偏移
+        :param spec:
+        :param item:
+        :param after: a time.time() timestamp
+        :return: a time.time() timestamp or None
+        '''
+        # 浮点数误差不能让刚刚到期的时间再算出一次, 相差不到 1 微秒的视为同一时间
+        if spec.interval is not None:
+            step = spec.interval
+            return (int((after * 1000 + 0.001) // step) + 1) * step / 1000.0
+        second = float(int(after // 1))
+        if spec.every_second or spec.match(datetime.fromtimestamp(second, get_timezone(item.get('tz', self.tzinfo)))):
+            i = bisect_right(spec.fractions, after - second + 0.000001)
+            if i < len(spec.fractions):
+                return second + spec.fractions[i]
+        if spec.every_second:
+            nxt = second + 1
         else:
-            size = self.pool_size
-        return Pool(size)
+            nxt = self.__next_deadline(CompiledSpec(*spec), item, second)
+            if nxt is None:
+                return None
+        return nxt + spec.fractions[0]
 
-    def __start_crontab_task(self, kwargs: dict) -> None:
+    def __schedule_next(self, task: Task, after: float = None) -> None:
         '''
 
-        :param kwargs:
+        :param task:
+        :param after: a time.time() timestamp, default now
         :return:
         '''
-        kwargs.setdefault('tz', self.tzinfo)
-        try:
-            self.__crontab_start(**kwargs)
-        except Exception as e:
-            print_exc()
-            raise e
-
-    def __start__schedules_task(self, kwargs: dict) -> None:
+        spec = task.spec
+        if type(spec) is SubSecondSpec:
+            if not self.__fast_active:
+                return
+            timer = self.__fast_timer
+        elif not self.__timer_active:
+            return
+        else:
+            timer = self.__timer
+        if not self.registry.live(task):
+            return
+        if after is None:
+            after = self.clock.time()
+        deadline = stored = None
+        if self.__resume:
+            # 从存储恢复的任务直接使用保存的下一次启动时间, 已经过去的时间交给 misfire 策略处理
+            last_fire, deadline = self.__resume.pop(task.task_id, (None, None))
+            stored = deadline
+            if deadline is None and last_fire is not None:
+                deadline = self.__next_deadline(spec, task.item, last_fire)
+        if deadline is None:
+            deadline = self.__next_deadline(spec, task.item, after)
+        if deadline is not None:
+            # 定时队列中的到期时间加上 spread/jitter, 计划的启动时间 deadline 放在 item 里
+            due_at = deadline + self.__delay(task.task_id, task.item)
+            if due_at != deadline and type(timer) is TimingWheel:
+                # 时间轮的刻度是 1 秒, 推迟之后不在整秒上的任务放进毫秒级的定时队列
+                timer = self.__fast_timer
+            task.timer = (timer, timer.push(due_at, (self.__timer_gen, task, deadline)))
+            if not self.registry.live(task):
+                # 调度线程放回队列的同时任务被删除或者暂停了
+                self.registry.cancel(task)
+            self.registry.set_next(task, deadline)
+            if self.store is not None and deadline != stored:
+                self.store.record(task.task_id, next_fire=deadline)
+
+    def __reset_timer(self) -> None:
+        '''set_tasks 之后丢弃堆里旧的任务, 按新的配置重新计算下一次启动时间'''
+        with self.__tasks_lock:
+            self.__timer_gen += 1
+            self.__timer.clear()
+            self.__fast_timer.clear()
+            now = self.clock.time()
+            for kind in self.registry.kinds():
+                for task in self.registry.entries(kind):
+                    try:
+                        self.__schedule_next(task, now)
+                    except Exception:
+                        self.__dispatch_error(task)
+            if not self.__timer_active and self.__fast_active and self.__resume:
+                self.__replay_missed(now)
+
+    def __replay_missed(self, now: float) -> None:
+        '''
+        poll 方式没有定时队列, 从存储恢复的任务在停机期间错过的启动 (到 now 为止, 之后的节拍由 Ticker 处理)
+        在这里按 misfire 策略补执行, 和 heap/wheel 的 __take_due 一样: fire_all 补执行每一次,
+        fire_once 只执行一次, skip 只记一次 misfire
+        :param now:
+        :return:
+        '''
+        resume, self.__resume = self.__resume, {}
+        for task_id, (last_fire, next_fire) in resume.items():
+            task = self.registry.get(task_id)
+            if task is None or not self.registry.live(task) or type(task.spec) is SubSecondSpec:
+                continue
+            item = task.item
+            try:
+                # 上一次启动之后的下一次和保存的下一次启动时间取较晚的, 被 skip 过的不会再补
+                deadline = next_fire
+                if last_fire is not None:
+                    after = self.__next_deadline(task.spec, item, last_fire)
+                    if after is not None and (deadline is None or after > deadline):
+                        deadline = after
+                misfire, grace = self.__misfire_policy(item)
+                tz = item.get('tz', self.tzinfo)
+                while deadline is not None and deadline <= now:
+                    date_time = Snapshot(deadline).date_time(tz)
+                    lateness = now - deadline
+                    if lateness > grace:
+                        self.metrics.inc('misfires', self.task_name(item))
+                        if misfire != 'fire_all':
+                            if misfire == 'skip':
+                                self.__report_misfire(task.kind, item, date_time, lateness)
+                            else:
+                                self.__dispatch(task, date_time)
+                            break
+                    self.__dispatch(task, date_time)
+                    deadline = self.__next_deadline(task.spec, item, deadline)
+            except Exception:
+                self.__dispatch_error(task)
+
+    def __fire(self, task: Task, date_time: datetime) -> None:
         '''
 
-        :param kwargs:
+        :param task:
+        :param date_time: the fire time in the task timezone
         :return:
         '''
-        kwargs.setdefault('tz', self.tzinfo)
+        item = task.item
+        started = self.clock.time()
+        lateness = max(0.0, started - date_time.timestamp())
+        name = self.task_name(item)
+        metrics = self.metrics
+        metrics.inc('fires', name)
+        metrics.observe('lateness_seconds', name, lateness)
         try:
-            self.__schedules_start(**kwargs)
+            if task.kind == self.__key_crontab_tasks:
+                self.__crontab_exec(item, date_time, lateness)
+            else:
+                self.__schedules_exec(
+                    self.__target(item),
+                    item.get(self.__tasks_key_args), item.get(self.__tasks_key_kwargs),
+                    date_time, lateness
+                )
+                metrics.observe('duration_seconds', name, self.clock.time() - started)
         except Exception as e:
-            print_exc()
+            metrics.inc('failures', name)
+            self.__log('error', None, name, traceback=format_exc())
             raise e
 
-    def __run_tasks(self, task_fun, task_list, pool=None, is_async=False) -> None:
+    def __run_timer(self, timer: Union[TimerHeap, TimingWheel]) -> None:
         '''
-
-        :param task_fun:
-        :param task_list:
-        :param pool:
-        :param is_async:
+        只在定时队列(最小堆或时间轮)有任务到期时醒来, 只把到期的任务交给线程池.
+        毫秒级的任务在另一个线程中运行同样的循环, 不会被同一秒到期的大批秒级任务拖慢
+        :param timer: self.__timer or self.__fast_timer
         :return:
         '''
-        if self.pool is None:
-            self.pool = self._get_pool()
-        pool = self.pool
-        if is_async:
-            pool.map_async(task_fun, task_list).get()
-        else:
-            pool.map(task_fun, task_list)
+        stopped = lambda: self.__stop == 1
+        while 1:
+            if self.__stop == 1:
+                break
+            for task, date_time, reserved in self.__take_due(timer.pop_due(stopped)):
+                try:
+                    self.__submit(task, date_time, reserved)
+                except Exception:
+                    self.__dispatch_error(task, date_time)
 
-    def __run_crontab(self) -> None:
+    def __dispatch_error(self, task: Task, date_time: datetime = None) -> None:
+        '''
+        调度线程中单个任务出错 (例如时区写错了, 存储不可用) 时只记录日志, 不影响其他任务, 调度线程继续运行
+        :param task:
+        :param date_time: the fire time
+        :return:
         '''
+        name = self.task_name(task.item)
+        self.metrics.inc('failures', name)
+        self.__log('error', date_time, name, reason='dispatch', traceback=format_exc())
 
+    def __take_due(self, due: List[Tuple[float, tuple]]) -> List[Tuple[Task, datetime, bool]]:
+        '''
+        处理定时队列返回的到期任务: 按 misfire 策略决定是否执行, 并计算下一次启动时间放回队列
+        :param due: [(due_at, (gen, task, deadline)), ...], due_at 是 deadline 加上 spread/jitter.
+         被限速推迟的启动是 (gen, task, deadline, date_time), 见 __defer
+        :return: 需要执行的 [(task, date_time, reserved), ...]
+        '''
+        snapshots = {}
+        fires = []
+        now = self.clock.time()
+        for due_at, entry in due:
+            gen, task, deadline = entry[:3]
+            if gen != self.__timer_gen:
+                continue
+            if not self.registry.live(task):
+                # 已经删除, 暂停或者修改过的任务, 旧的定时不再执行. 不加锁, 只是一次字典查找
+                continue
+            if len(entry) == 4:
+                # 已经拿到令牌, 下一次启动时间也已经放回队列, 直接执行
+                fires.append((task, entry[3], True))
+                continue
+            try:
+                snapshot = snapshots.get(deadline)
+                if snapshot is None:
+                    snapshot = snapshots[deadline] = Snapshot(deadline)
+                item = task.item
+                date_time = snapshot.date_time(item.get('tz', self.tzinfo))
+                after = deadline
+                lateness = now - due_at
+                misfire, grace = self.__misfire_policy(item)
+                if lateness > grace:
+                    self.metrics.inc('misfires', self.task_name(item))
+                if lateness > grace and misfire != 'fire_all':
+                    # skip 和 fire_once 都不补错过的多次, 下一次从现在开始算
+                    after = now
+                    if misfire == 'skip':
+                        self.__report_misfire(task.kind, item, date_time, lateness)
+                        self.__schedule_next(task, after)
+                        continue
+                fires.append((task, date_time, False))
+                self.__schedule_next(task, after)
+            except Exception:
+                self.__dispatch_error(task)
+        return fires
+
+    async def __fire_async(self, task: Task, date_time: datetime) -> None:
+        '''
+        run_loop_async 的执行方式: 协程函数直接 await, 普通函数放到默认线程池,
+        shell 和 run_loop 一样交给 Supervisor (或 forkserver) 启动, 同样受 max_instances 和 max_children 限制
+        :param task:
+        :param date_time: the fire time in the task timezone
         :return:
         '''
-        while 1:
-            if self.__stop == 1:
-                break
-            interval = 60 - datetime.now().second
-            time.sleep(interval)
-            crontab_tasks = self.conf.get(self.__key_crontab_tasks)
-            if crontab_tasks:
-                self.__task_assert((crontab_tasks, list), 0)
-                Thread(
-                    target=self.__run_tasks,
-                    args=(self.__start_crontab_task, crontab_tasks),
-                    kwargs={'is_async': True}, daemon=True
-                ).start()
+        import asyncio
+        item = task.item
+        started = self.clock.time()
+        lateness = max(0.0, started - date_time.timestamp())
+        task_name = self.task_name(item)
+        metrics = self.metrics
+        metrics.inc('fires', task_name)
+        metrics.observe('lateness_seconds', task_name, lateness)
+        try:
+            if task.kind == self.__key_crontab_tasks:
+                # 退出码和运行时间由 Supervisor 的 on_exit 记录, 这里只等 fork 完成, 不等子进程结束
+                await asyncio.get_event_loop().run_in_executor(
+                    None, partial(self.__crontab_exec, item, date_time, lateness)
+                )
+                return
+            target = self.__target(item)
+            args = item.get(self.__tasks_key_args) or tuple()
+            kwargs = item.get(self.__tasks_key_kwargs) or dict()
+            name = getattr(target, '__name__', target)
+            if item.get(self.__tasks_key_executor) == 'process':
+                self.__log('exec', date_time, '%s(*%s, **%s)' % (name, args, kwargs), executor='process', late=lateness)
+                await asyncio.wrap_future(self._get_process_pool().submit(target, *args, **kwargs))
+            else:
+                self.__log('exec', date_time, '%s(*%s, **%s)' % (name, args, kwargs), late=lateness)
+                if asyncio.iscoroutinefunction(target):
+                    await target(*args, **kwargs)
+                else:
+                    await asyncio.get_event_loop().run_in_executor(None, partial(target, *args, **kwargs))
+            metrics.observe('duration_seconds', task_name, self.clock.time() - started)
+        except Exception:
+            metrics.inc('failures', task_name)
+            self.__log('error', None, task_name, traceback=format_exc())
 
-    def __run_schedule(self) -> None:
+    def __matrices(self, kind: str, vectorize: bool = None) -> List[Tuple[str, SpecMatrix, list]]:
+        '''
+        按时区把任务分组, 每组打包成一个 SpecMatrix, 任务快照或默认时区没有变化时复用上次的结果
+        :param kind: 'crontab_tasks' or 'schedule_tasks'
+        :param vectorize: 传给 SpecMatrix, run() 只检查一次, 不值得导入 numpy
+        :return: [(tz, matrix, tasks), ...]
+        '''
+        # 每个刻度只读一次 registry 的快照, 快照没有变化时直接用缓存
+        tasks = self.registry.view(kind)
+        key = (tasks, self.tzinfo, vectorize)
+        cache = self.__matrix_cache.get(kind)
+        if cache is not None and cache[0][0] is tasks and cache[0][1:] == key[1:]:
+            return cache[1]
+        groups = {}
+        for task in tasks:
+            if type(task.spec) is SubSecondSpec:
+                # 毫秒级的任务由 __fast_timer 调度
+                continue
+            groups.setdefault(task.item.get('tz', self.tzinfo), []).append(task)
+        matrices = [
+            (tz, SpecMatrix([task.spec for task in group], vectorize), group) for tz, group in groups.items()
+        ]
+        self.__matrix_cache[kind] = (key, matrices)
+        return matrices
+
+    def __dispatch_due(self, kind: str, snapshot: Snapshot) -> list:
+        '''
+        一次向量化运算找出快照时间到点的任务, 直接交给线程池
+        :param kind: 'crontab_tasks' or 'schedule_tasks'
+        :param snapshot: 本刻度的时间快照, 每个时区只转换一次
+        :return: Future list
         '''
+        results = []
+        for tz, matrix, tasks in self.__matrices(kind, False):
+            try:
+                date_time = snapshot.date_time(tz)
+            except Exception:
+                self.__log('error', None, tz, reason='timezone', tasks=len(tasks), traceback=format_exc())
+                continue
+            for i in matrix.due(date_time):
+                try:
+                    future = self.__dispatch(tasks[i], date_time)
+                except Exception:
+                    self.__dispatch_error(tasks[i], date_time)
+                    continue
+                if future is not None:
+                    results.append(future)
+        return results
+
+    def __dispatch(self, task: Task, date_time: datetime) -> 'Future':
+        '''
+        轮询方式下到点的任务, 配置了 spread/jitter 时放进毫秒级的定时队列, 推迟之后再执行
+        :param task:
+        :param date_time: the fire time
+        :return: Future, or None if rejected or delayed
+        '''
+        item = task.item
+        if self.__fast_active and (item.get(self.__tasks_key_spread) or item.get(self.__tasks_key_jitter)):
+            deadline = date_time.timestamp()
+            delay = self.__delay(task.task_id, item)
+            task.timer = (self.__fast_timer, self.__fast_timer.push(deadline + delay, (self.__timer_gen, task, deadline)))
+            return None
+        return self.__submit(task, date_time)
+
+    def __dispatch_ticks(self, kind: str, ticks: List[float]) -> None:
+        '''
+        处理 Ticker 返回的节拍, 迟到超过 grace 的节拍按任务的 misfire 策略处理
+        :param kind: 'crontab_tasks' or 'schedule_tasks'
+        :param ticks: 节拍点时间戳, 最后一个是当前节拍, 前面的是被跳过的节拍
         :return:
         '''
-        while 1:
-            if self.__stop == 1:
-                break
-            interval = 1
-            time.sleep(interval)
-            schedule_tasks = self.conf.get(self.__key_schedule_tasks)
-            if schedule_tasks:
-                self.__task_assert((schedule_tasks, list), 0)
-                Thread(
-                    target=self.__run_tasks,
-                    args=(self.__start__schedules_task, schedule_tasks),
-                    kwargs={'is_async': True}, daemon=True
-                ).start()
+        now = self.clock.time()
+        snapshots = [Snapshot(tick) for tick in ticks]
+        for tz, matrix, tasks in self.__matrices(kind):
+            pending = {}
+            for snapshot in snapshots:
+                try:
+                    date_time = snapshot.date_time(tz)
+                except Exception:
+                    # 同一时区的任务共用一个时间, 时区无效时这一组都不能执行, 其他时区照常
+                    self.__log('error', None, tz, reason='timezone', tasks=len(tasks), traceback=format_exc())
+                    break
+                lateness = now - snapshot.timestamp
+                for i in matrix.due(date_time):
+                    task = tasks[i]
+                    try:
+                        misfire, grace = self.__misfire_policy(task.item)
+                        if lateness > grace:
+                            self.metrics.inc('misfires', self.task_name(task.item))
+                        if lateness <= grace or misfire == 'fire_all':
+                            pending[i] = None
+                            self.__dispatch(task, date_time)
+                        elif misfire == 'fire_once':
+                            if pending.get(i, True) is not None:
+                                pending[i] = date_time
+                        else:
+                            self.__report_misfire(kind, task.item, date_time, lateness)
+                    except Exception:
+                        self.__dispatch_error(task, date_time)
+            for i, date_time in pending.items():
+                if date_time is not None:
+                    try:
+                        self.__dispatch(tasks[i], date_time)
+                    except Exception:
+                        self.__dispatch_error(tasks[i], date_time)
+
+    def __run_ticker(self, kind: str, period: float) -> None:
+        '''
+        轮询方式: 按 Ticker 的节拍检查到点的任务
+        :param kind: 'crontab_tasks' or 'schedule_tasks'
+        :param period: 1 for schedule_tasks, 60 for crontab_tasks
+        :return:
+        '''
+        ticker = Ticker(self.clock, period)
+        self.__tickers.append(ticker)
+        stopped = lambda: self.__stop == 1
+        try:
+            while 1:
+                if self.__stop == 1:
+                    break
+                ticks = ticker.wait(stopped)
+                if not ticks:
+                    continue
+                try:
+                    self.__dispatch_ticks(kind, ticks)
+                except Exception:
+                    # 单个任务的错误在 __dispatch_ticks 中已经处理, 这里只兜底, 不能让轮询线程退出
+                    self.__log('error', None, kind, reason='dispatch', traceback=format_exc())
+        finally:
+            self.__tickers.remove(ticker)
 
     def stop(self) -> None:
         '''
         :return:
         '''
         self.__stop = 1
+        self.__wakeup.set()
+        self.__timer.wake()
+        self.__fast_timer.wake()
+        for ticker in list(self.__tickers):
+            ticker.wake()
 
     def start(self) -> None:
         '''
         :return:
         '''
         self.__stop = 0
+        self.__wakeup.clear()
 
-    def run_loop(self) -> None:
+    def set_backend(self, backend: str) -> None:
+        '''这个方法用来设置 run_loop 的调度方式: heap(默认), wheel 或 poll'''
+        self.__task_assert((backend, str), 0)
+        if backend not in self.__backends:
+            raise TypeError('backend must in %s, got %s' % (self.__backends, backend))
+        self.backend = backend
+
+    def run_loop(self, backend: str = None) -> None:
         '''
+        :param backend: 'heap', 'wheel' or 'poll', default self.backend
         :return:
         '''
-        date_time = self.get_date_time(self.tzinfo)
-        msg = '[%s %s] %s start' % (self.tzinfo, date_time.strftime('%Y-%m-%d %H:%M:%S'), self.run_loop.__name__)
-        print(msg)
+        if backend is not None:
+            self.set_backend(backend)
+        self.__log('start', None, self.run_loop.__name__)
         t_list = []
-        t_list.append(Thread(target=self.__run_crontab))
-        t_list.append(Thread(target=self.__run_schedule))
+        # 毫秒级的任务不论哪种调度方式都使用单独的最小堆
+        self.__fast_timer = TimerHeap(self.clock.time)
+        self.__fast_active = True
+        if self.backend in ('heap', 'wheel'):
+            if self.backend == 'wheel':
+                self.__timer = TimingWheel(self.clock.time)
+            else:
+                self.__timer = TimerHeap(self.clock.time)
+            self.__timer_active = True
+            t_list.append(Thread(target=self.__run_timer, args=(self.__timer,)))
+        else:
+            t_list.append(Thread(target=self.__run_ticker, args=(self.__key_crontab_tasks, 60)))
+            t_list.append(Thread(target=self.__run_ticker, args=(self.__key_schedule_tasks, 1)))
+        self.__reset_timer()
+        t_list.append(Thread(target=self.__run_timer, args=(self.__fast_timer,)))
         for t in t_list:
             t.start()
         for t in t_list:
             t.join()
-        date_time = self.get_date_time(self.tzinfo)
-        msg = '[%s %s] %s exit' % (self.tzinfo, date_time.strftime('%Y-%m-%d %H:%M:%S'), self.run_loop.__name__)
-        print(msg)
-
-    def run(self) -> None:
+        self.__timer_active = self.__fast_active = False
+        self.__timer.clear()
+        self.__fast_timer.clear()
+        if self.store is not None:
+            self.store.flush()
+        self.__log('stop', None, self.run_loop.__name__)
+        self.log.flush()
+
+    async def run_loop_async(self) -> None:
         '''
+        在已有的 asyncio 事件循环中运行, 使用方法: await scheduler.run_loop_async()
+        schedule_tasks 的协程函数直接 await, crontab_tasks 和 run_loop 一样由 Supervisor 启动.
         :return:
         '''
-        date_time = self.get_date_time(self.tzinfo)
-        msg = '[%s %s] %s start' % (self.tzinfo, date_time.strftime('%Y-%m-%d %H:%M:%S'), self.run.__name__)
-        print(msg)
-        t_list = []
-        crontab_tasks = self.conf.get(self.__key_crontab_tasks)
-        if crontab_tasks:
-            t_list.append(
-                Thread(
-                    target=self.__run_tasks,
-                    args=(self.__start_crontab_task, crontab_tasks)
-                )
-            )
-        schedule_tasks = self.conf.get(self.__key_schedule_tasks)
-        if schedule_tasks:
-            t_list.append(
-                Thread(
-                    target=self.__run_tasks,
-                    args=(self.__start__schedules_task, schedule_tasks)
-                )
-            )
-        for t in t_list:
-            t.start()
-        for t in t_list:
-            t.join()
-        date_time = self.get_date_time(self.tzinfo)
-        msg = '[%s %s] %s exit' % (self.tzinfo, date_time.strftime('%Y-%m-%d %H:%M:%S'), self.run.__name__)
-        print(msg)
+        import asyncio
+        from .timers import AsyncTimerHeap
+        loop = asyncio.get_event_loop()
+        self.__log('start', None, self.run_loop_async.__name__)
+        timer = self.__timer = self.__fast_timer = AsyncTimerHeap(loop, self.clock.time)
+        self.__timer_active = self.__fast_active = True
+        self.__reset_timer()
+        running = set()
+        stopped = lambda: self.__stop == 1
+        try:
+            while 1:
+                if self.__stop == 1:
+                    break
+                for task, date_time, reserved in self.__take_due(await timer.pop_due(stopped)):
+                    if not reserved:
+                        if not self.__claim(task, date_time):
+                            continue
+                        if type(task.spec) is not SubSecondSpec:
+                            delay = self.__throttle(task.item)
+                            if delay > 0 and self.__defer(task, date_time, delay):
+                                continue
+                    try:
+                        self.__record_fire(task, date_time)
+                    except Exception:
+                        self.__dispatch_error(task, date_time)
+                        continue
+                    future = asyncio.ensure_future(self.__fire_async(task, date_time))
+                    running.add(future)
+                    future.add_done_callback(running.discard)
+        finally:
+            self.__timer_active = self.__fast_active = False
+            self.__timer.clear()
+        if self.store is not None:
+            self.store.flush()
+        self.__log('stop', None, self.run_loop_async.__name__)
+        await asyncio.get_event_loop().run_in_executor(None, self.log.flush)
+
+    def run(self, timestamps: List[float] = None) -> None:
+        '''
+        :param timestamps: 依次检查这些时间点到点的任务, 还没到的时间点先等到那个时间, 默认只检查现在.
+         crontab_tasks 的颗粒度是分钟, 同一分钟内的多个时间点只检查一次
+        :return:
+        '''
+        self.__log('start', None, self.run.__name__)
+        results = []
+        minute = None
+        for timestamp in timestamps or (None,):
+            if timestamp is not None:
+                delay = timestamp - self.clock.time()
+                if delay > 0 and self.__wakeup.wait(delay):
+                    break
+            snapshot = self.clock.snapshot(timestamp)
+            if snapshot.timestamp // 60 != minute:
+                minute = snapshot.timestamp // 60
+                results.extend(self.__dispatch_due(self.__key_crontab_tasks, snapshot))
+            results.extend(self.__dispatch_due(self.__key_schedule_tasks, snapshot))
+        if results:
+            from concurrent.futures import wait
+            wait(results)
+        self.supervisor.join()
+        if self.forkserver is not None:
+            self.forkserver.join()
+        if self.store is not None:
+            self.store.flush()
+        self.__log('stop', None, self.run.__name__)
+        self.log.flush()
+
+
+_scheduler = None
+_scheduler_lock = Lock()
+
+
+def get_scheduler() -> Schedules:
+    '''
+    模块级的默认 scheduler, 第一次用到时才创建, 只 import 不使用的进程不需要查找本机时区
+    :return:
+    '''
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Schedules()
+                globals()['scheduler'] = _scheduler
+    return _scheduler
 
 
-scheduler = Schedules()
+def __getattr__(name: str) -> Any:
+    '''
+    python 3.7+ 的模块级 __getattr__: conciseSchedules.scheduler 第一次访问时才创建, _lazy_names 中的名字第一次访问时才导入
+    :param name:
+    :return:
+    '''
+    if name == 'scheduler':
+        return get_scheduler()
+    module = _lazy_names.get(name)
+    if module is None:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    value = globals()[name] = getattr(import_module(module, __name__), name)
+    return value
 
 
 def set_timezone(tz: str) -> None:
@@ -762,7 +2342,7 @@ def set_timezone(tz: str) -> None:
     :param tz:
     :return:
     '''
-    return scheduler.set_timezone(tz)
+    return get_scheduler().set_timezone(tz)
 
 
 def timezone_listing(country: str = None) -> list:
@@ -771,12 +2351,12 @@ def timezone_listing(country: str = None) -> list:
     if country is None return ALL
     :return: the country timezone city list, default cn
     '''
-    return scheduler.timezone_listing(country)
+    return get_scheduler().timezone_listing(country)
 
 
 def timezon_countrys() -> dict:
     ''':return countrys name dict'''
-    return scheduler.timezon_countrys()
+    return get_scheduler().timezon_countrys()
 
 
 def set_tasks(tasks_conf: Dict[str, List[Dict[str, Any]]]) -> None:
@@ -785,7 +2365,7 @@ def set_tasks(tasks_conf: Dict[str, List[Dict[str, Any]]]) -> None:
     :param tasks_conf:
     :return:
     '''
-    return scheduler.set_tasks(tasks_conf)
+    return get_scheduler().set_tasks(tasks_conf)
 
 
 def add_task(t: Dict[str, dict]) -> None:
@@ -794,19 +2374,70 @@ def add_task(t: Dict[str, dict]) -> None:
             or {'schedule_tasks': {'crontab': '*/1 * * * * *', 'target': tests_run, args=(1,)}}
     :return:
     '''
-    return scheduler.add_task(t)
+    return get_scheduler().add_task(t)
+
+
+def remove_task(task_id: str) -> dict:
+    '''
+    :param task_id:
+    :return: the removed task dict, None if not found
+    '''
+    return get_scheduler().remove_task(task_id)
+
+
+def pause_task(task_id: str) -> bool:
+    '''
+    :param task_id:
+    :return: False if not found
+    '''
+    return get_scheduler().pause_task(task_id)
+
+
+def resume_task(task_id: str) -> bool:
+    '''
+    :param task_id:
+    :return: False if not found
+    '''
+    return get_scheduler().resume_task(task_id)
+
+
+def update_task(task_id: str, changes: dict) -> dict:
+    '''
+    :param task_id:
+    :param changes: for example {'crontab': '*/5 * * * * *'}
+    :return: the new task dict, None if not found
+    '''
+    return get_scheduler().update_task(task_id, changes)
+
+
+def update_tasks(tasks_conf: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+    '''
+    :param tasks_conf:
+    :return: {'added': n, 'changed': n, 'removed': n}
+    '''
+    return get_scheduler().update_tasks(tasks_conf)
+
+
+def watch_tasks(path: str, interval: float = 1.0) -> None:
+    '''
+    :param path: a .json, .yaml/.yml or .py file
+    :param interval:
+    :return:
+    '''
+    return get_scheduler().watch_tasks(path, interval)
 
 
-def task(schedule: dict = None, crontab: str = None, args: tuple = None, kwargs: dict = None) -> Callable:
+def task(schedule: dict = None, crontab: str = None, args: tuple = None, kwargs: dict = None, **options) -> Callable:
     '''
 
     :param schedule:
     :param crontab:
     :param args:
     :param kwargs:
+    :param options: other task keys, for example misfire='skip', grace=5, executor='process'
     :return:
     '''
-    return scheduler.task(schedule, crontab, args, kwargs)
+    return get_scheduler().task(schedule, crontab, args, kwargs, **options)
 
 
 def stop() -> None:
@@ -814,7 +2445,7 @@ def stop() -> None:
 
     :return:
     '''
-    return scheduler.stop()
+    return get_scheduler().stop()
 
 
 def start() -> None:
@@ -822,20 +2453,46 @@ def start() -> None:
 
     :return:
     '''
-    return scheduler.start()
+    return get_scheduler().start()
 
 
-def run_loop() -> None:
+def set_backend(backend: str) -> None:
     '''
 
+    :param backend: 'heap', 'wheel' or 'poll'
     :return:
     '''
-    return scheduler.run_loop()
+    return get_scheduler().set_backend(backend)
 
 
-def run() -> None:
+def run_loop(backend: str = None) -> None:
     '''
 
+    :param backend: 'heap', 'wheel' or 'poll'
     :return:
     '''
-    return scheduler.run()
+    return get_scheduler().run_loop(backend)
+
+
+def run_loop_async():
+    '''
+    await conciseSchedules.run_loop_async()
+    :return: a coroutine
+    '''
+    return get_scheduler().run_loop_async()
+
+
+def run(timestamps: List[float] = None) -> None:
+    '''
+
+    :param timestamps: default now
+    :return:
+    '''
+    return get_scheduler().run(timestamps)
+
+
+if sys.version_info < (3, 7):
+    # 3.7 之前模块没有 __getattr__, 只能在 import 时全部导入并创建 scheduler
+    for _name in _lazy_names:
+        __getattr__(_name)
+    get_scheduler()
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : __main__.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 01:00
+'''
+import sys
+from .cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : batch.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 10:00
+'''
+from datetime import datetime
+from typing import Sequence
+
+np = None
+_np_checked = False
+
+
+def numpy():
+    '''
+    第一次用到时才导入 numpy, 导入一次要几十毫秒, 任务很少或者只运行一次 run() 时用不上
+    :return: the numpy module, None if it is not installed
+    '''
+    global np, _np_checked
+    if not _np_checked:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        _np_checked = True
+    return np
+
+
+class SpecMatrix:
+    '''
+ 把一组编译后的定时规则打包成一个矩阵, 每个任务一行, 每个时间字段一列 (second minute hour day month weekday),
+ 每个元素是该字段的 bitmask, 字段为 None 时视为全部时间.
+ due 用一次向量化运算算出当前时间所有到点任务的下标. 没有安装 numpy 或者行数很少时退化为逐行的 python 循环.
+    '''
+    __all_bits = (1 << 64) - 1
+    # 少于这么多行时 python 循环比 numpy 快
+    numpy_rows = 64
+
+    def __init__(self, specs: Sequence[tuple], vectorize: bool = None):
+        '''
+        :param specs: CompiledSpec list
+        :param vectorize: None 表示行数不少于 numpy_rows 时使用 numpy, False 表示不导入 numpy
+        '''
+        all_bits = self.__all_bits
+        self.rows = [tuple(all_bits if mask is None else mask for mask in spec) for spec in specs]
+        self.masks = None
+        if vectorize is None:
+            vectorize = len(self.rows) >= self.numpy_rows
+        if vectorize and numpy() is not None:
+            self.masks = np.array(self.rows, dtype=np.uint64).reshape(len(self.rows), 6)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def due(self, date_time: datetime) -> Sequence[int]:
+        '''
+        :param date_time:
+        :return: 到点任务的下标, numpy 可用时是 ndarray, 否则是 list
+        '''
+        values = (date_time.second, date_time.minute, date_time.hour,
+                  date_time.day, date_time.month, date_time.weekday())
+        if self.masks is not None:
+            bits = np.left_shift(np.uint64(1), np.array(values, dtype=np.uint64))
+            return np.flatnonzero((self.masks & bits).all(axis=1))
+        bits = [1 << v for v in values]
+        b0, b1, b2, b3, b4, b5 = bits
+        return [
+            i for i, (m0, m1, m2, m3, m4, m5) in enumerate(self.rows)
+            if m0 & b0 and m1 & b1 and m2 & b2 and m3 & b3 and m4 & b4 and m5 & b5
+        ]
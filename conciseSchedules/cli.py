@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : cli.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 01:00
+
+python -m conciseSchedules tasks.json
+在系统 crontab 中每分钟运行一次: 只执行任务文件中这一分钟到点的任务, 执行完之后退出.
+'''
+import os
+import sys
+import hashlib
+import argparse
+from datetime import datetime
+from typing import Dict, List, Tuple
+from . import Schedules, CompiledSpec
+from .clock import get_timezone
+from .config import load_config
+from .index import ScheduleIndex, source_key, bits
+
+
+def default_cache(path: str) -> str:
+    '''
+    :param path: the task file
+    :return: $XDG_CACHE_HOME/conciseSchedules/<hash of the path>.db
+    '''
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    name = hashlib.sha1(os.path.realpath(path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(base, 'conciseSchedules', name + '.db')
+
+
+def compile_tasks(path: str) -> Schedules:
+    '''
+    :param path: the task file
+    :return: a Schedules with all the tasks in the file
+    '''
+    scheduler = Schedules()
+    scheduler.set_tasks(load_config(path))
+    return scheduler
+
+
+def load_index(path: str, cache: str) -> ScheduleIndex:
+    '''
+    任务文件没有变化时直接打开上次生成的索引, 否则重新编译全部任务并生成索引
+    :param path: the task file
+    :param cache: the index file
+    :return: None if the tasks can not be indexed
+    '''
+    key = source_key(path)
+    if os.path.exists(cache):
+        try:
+            index = ScheduleIndex(cache)
+            if index.key == key:
+                return index
+            index.close()
+        except Exception:
+            pass
+    tasks = []
+    skipped = 0
+    for task in compile_tasks(path).registry.tasks():
+        if type(task.spec) is CompiledSpec:
+            tasks.append((task.kind, task.item, task.spec))
+        else:
+            skipped += 1
+    if skipped:
+        sys.stderr.write('conciseSchedules: %s millisecond/interval tasks need run_loop, skipped\n' % skipped)
+    try:
+        return ScheduleIndex.build(cache, key, tasks)
+    except ValueError as e:
+        sys.stderr.write('conciseSchedules: %s, running without the index\n' % e)
+        return None
+
+
+def due_tasks(scheduler: Schedules, timestamp: float) -> Tuple[List[float], Dict[str, List[dict]]]:
+    '''
+    没有索引时逐个检查全部任务
+    :param scheduler: compile_tasks 的结果
+    :param timestamp: 检查这个时间戳所在的一分钟
+    :return: (这一分钟内到点的时间戳, 到点的 tasks_conf)
+    '''
+    start = timestamp // 60 * 60
+    seconds = set()
+    conf = {}
+    for task in scheduler.registry.tasks():
+        spec = task.spec
+        if type(spec) is not CompiledSpec:
+            continue
+        date_time = datetime.fromtimestamp(start, get_timezone(task.item.get('tz', scheduler.tzinfo)))
+        if CompiledSpec(None, *spec[1:]).match(date_time):
+            seconds.update(bits(spec.second, 60) if spec.second is not None else (0,))
+            conf.setdefault(task.kind, []).append(task.item)
+    return [start + second for second in sorted(seconds)], conf
+
+
+def main(argv: List[str] = None) -> int:
+    '''
+    :param argv: default sys.argv[1:]
+    :return: exit code
+    '''
+    parser = argparse.ArgumentParser(
+        prog='conciseSchedules',
+        description='执行任务文件中这一分钟到点的任务, 执行完之后退出. 在系统 crontab 中每分钟运行一次: '
+                    '* * * * * python -m conciseSchedules /path/to/tasks.json'
+    )
+    parser.add_argument('path', help='a .json, .yaml/.yml or .py task file, the same format as set_tasks')
+    parser.add_argument('--cache', help='the index file, default $XDG_CACHE_HOME/conciseSchedules/<hash>.db')
+    parser.add_argument('--no-cache', action='store_true', help='compile all the tasks every time')
+    parser.add_argument('--tz', help='timezone of the tasks without "tz", default the local timezone')
+    parser.add_argument('--log', choices=('text', 'json'), help='log format, default text')
+    parser.add_argument('--at', type=float, help='run the minute of this timestamp instead of now')
+    args = parser.parse_args(argv)
+
+    scheduler = Schedules()
+    if args.tz:
+        scheduler.set_timezone(args.tz)
+    if args.log:
+        scheduler.set_log(args.log)
+    timestamp = scheduler.clock.time() if args.at is None else args.at
+    index = None
+    if not args.no_cache:
+        index = load_index(args.path, args.cache or default_cache(args.path))
+    if index is not None:
+        timestamps, conf = index.due(timestamp, scheduler.tzinfo)
+        index.close()
+    else:
+        compiled = compile_tasks(args.path)
+        compiled.set_timezone(scheduler.tzinfo)
+        timestamps, conf = due_tasks(compiled, timestamp)
+    if not timestamps:
+        return 0
+    scheduler.set_tasks(conf)
+    scheduler.run(timestamps)
+    return 0
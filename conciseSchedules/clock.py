@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : clock.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 11:00
+'''
+import os
+import math
+import time
+from datetime import datetime
+from threading import Event
+from functools import lru_cache
+from typing import Callable, List
+
+DEFAULT_TZ = 'Asia/Shanghai'
+
+
+@lru_cache(maxsize=None)
+def get_timezone(tz: str = None):
+    '''
+    时区对象缓存, 同一个时区名只查找一次. python 3.9+ 使用标准库的 zoneinfo, 否则使用 pytz, 都在第一次用到时才导入.
+    zoneinfo 找不到时区 (例如 windows 上没有安装 tzdata) 时也退回到自带时区数据的 pytz
+    :param tz: a timezone name, default Asia/Shanghai
+    :return: tzinfo, raise KeyError if tz is unknown
+    '''
+    if not tz:
+        tz = DEFAULT_TZ
+    try:
+        from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    except ImportError:
+        import pytz
+        return pytz.timezone(tz)
+    try:
+        return ZoneInfo(tz)
+    except ZoneInfoNotFoundError:
+        try:
+            import pytz
+        except ImportError:
+            pytz = None
+        if pytz is None:
+            raise
+        return pytz.timezone(tz)
+
+
+def zone_table(name: str) -> List[list]:
+    '''
+    读系统时区数据库里的 tab 文件 (zone.tab, iso3166.tab), 没有 pytz 时用它查国家和时区的对应关系
+    :param name: tab file name
+    :return: rows split by tab, empty list if the file is not found
+    '''
+    from zoneinfo import TZPATH
+    for folder in TZPATH:
+        path = os.path.join(folder, name)
+        if not os.path.isfile(path):
+            continue
+        with open(path, encoding='utf-8') as f:
+            return [line.rstrip('\n').split('\t') for line in f if line.strip() and not line.startswith('#')]
+    return []
+
+
+def localize(date_time: datetime, tzinfo) -> datetime:
+    '''
+    把不带时区的 datetime 放到 tzinfo 时区, pytz 的时区必须用 localize, 不能直接 replace
+    :param date_time: a naive datetime
+    :param tzinfo: get_timezone 的返回值
+    :return: aware datetime
+    '''
+    localize = getattr(tzinfo, 'localize', None)
+    if localize is not None:
+        return localize(date_time)
+    return date_time.replace(tzinfo=tzinfo)
+
+
+def local_timezone() -> str:
+    '''
+    本机的时区名. 先看 TZ 环境变量和 /etc/localtime 链接, 这两个都没有时才导入 tzlocal
+    :return: a timezone name, None if unknown
+    '''
+    tz = os.environ.get('TZ', '').lstrip(':')
+    if tz and not os.path.isabs(tz):
+        try:
+            get_timezone(tz)
+            return tz
+        except (KeyError, ValueError, OSError):
+            pass
+    try:
+        path = os.path.realpath('/etc/localtime')
+    except OSError:
+        path = ''
+    _, found, tz = path.partition('/zoneinfo/')
+    if found and tz:
+        for prefix in ('posix/', 'right/'):
+            if tz.startswith(prefix):
+                tz = tz[len(prefix):]
+        return tz
+    try:
+        from tzlocal import get_localzone
+    except ImportError:
+        return None
+    return str(get_localzone()) or None
+
+
+class Snapshot:
+    '''
+ 一个刻度的时间快照. 同一个刻度内的所有任务共用同一个时间戳,
+ 每个不同的时区只转换一次 datetime.
+    '''
+    __slots__ = ('timestamp', '_date_times')
+
+    def __init__(self, timestamp: float):
+        self.timestamp = timestamp
+        self._date_times = {}
+
+    def date_time(self, tz: str = None) -> datetime:
+        '''
+        :param tz: a timezone name
+        :return: aware datetime
+        '''
+        date_time = self._date_times.get(tz)
+        if date_time is None:
+            date_time = datetime.fromtimestamp(self.timestamp, get_timezone(tz))
+            self._date_times[tz] = date_time
+        return date_time
+
+
+class Clock:
+    '''
+ 以 time.monotonic() 为基准的时钟: 启动时记录一次墙上时间和 monotonic 时间,
+ 之后的时间都由 monotonic 推算, 不受墙上时间的小幅跳动影响;
+ 和墙上时间相差超过 max_skew 秒时 (例如手动改了系统时间) 重新对齐.
+    '''
+
+    def __init__(
+            self,
+            wall: Callable[[], float] = time.time,
+            monotonic: Callable[[], float] = time.monotonic,
+            max_skew: float = 1.0
+    ):
+        self.wall = wall
+        self.monotonic = monotonic
+        self.max_skew = max_skew
+        self.resync()
+
+    def resync(self) -> None:
+        '''
+        :return:
+        '''
+        self.__wall0 = self.wall()
+        self.__mono0 = self.monotonic()
+
+    def time(self) -> float:
+        '''
+        :return: a time.time() like timestamp
+        '''
+        now = self.__wall0 + (self.monotonic() - self.__mono0)
+        if abs(self.wall() - now) > self.max_skew:
+            self.resync()
+            now = self.__wall0
+        return now
+
+    def snapshot(self, timestamp: float = None) -> Snapshot:
+        '''
+        :param timestamp: default self.time()
+        :return:
+        '''
+        if timestamp is None:
+            timestamp = self.time()
+        return Snapshot(timestamp)
+
+
+class Ticker:
+    '''
+ 以 Clock 为基准的节拍器. 节拍点是 period 的整数倍 (和墙上时间对齐), 每次都按下一个节拍点重新计算睡眠时间, 不会累积漂移.
+ wait 返回上次返回之后经过的所有节拍点, 返回多个时说明中间有节拍被跳过了, 由调用方按 misfire 策略处理.
+    '''
+
+    def __init__(self, clock: Clock, period: float = 1, max_ticks: int = None):
+        '''
+        :param clock:
+        :param period: 节拍间隔, 单位秒
+        :param max_ticks: 一次最多返回的节拍数, 默认一天, 更早的节拍直接丢弃
+        '''
+        self.clock = clock
+        self.period = period
+        self.max_ticks = max_ticks or max(1, int(86400 // period))
+        self.__event = Event()
+        self.__index = self.__index_of(clock.time()) + 1
+
+    def __index_of(self, timestamp: float) -> int:
+        return int(math.floor(timestamp / self.period))
+
+    def wake(self) -> None:
+        '''唤醒正在 wait 中睡眠的线程, 让它重新检查是否需要退出'''
+        self.__event.set()
+
+    def wait(self, stopped: Callable[[], bool]) -> List[float]:
+        '''
+        睡到下一个节拍点
+        :param stopped: 返回 True 时立即返回空列表
+        :return: 经过的节拍点时间戳列表
+        '''
+        period = self.period
+        while not stopped():
+            delay = self.__index * period - self.clock.time()
+            if delay > period * 2:
+                # 时钟被往回调了, 从当前时间重新对齐
+                self.__index = self.__index_of(self.clock.time()) + 1
+                continue
+            if delay > 0:
+                self.__event.wait(delay)
+                self.__event.clear()
+                continue
+            current = self.__index_of(self.clock.time())
+            start = max(self.__index, current - self.max_ticks + 1)
+            self.__index = current + 1
+            return [i * period for i in range(start, current + 1)]
+        return []
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : cluster.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 20:00
+'''
+import os
+import time
+import socket
+import sqlite3
+import hashlib
+from abc import ABC, abstractmethod
+from bisect import bisect
+from threading import Thread, Lock, Event
+from typing import List, Iterable
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS leases (
+    task_id TEXT NOT NULL,
+    fire_time REAL NOT NULL,
+    node TEXT NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (task_id, fire_time)
+);
+CREATE INDEX IF NOT EXISTS leases_expires ON leases (expires);
+CREATE TABLE IF NOT EXISTS nodes (
+    node TEXT PRIMARY KEY,
+    expires REAL NOT NULL
+);
+'''
+
+
+class LeaseBackend(ABC):
+    '''
+ 租约后端的接口. 实现 claim 和 heartbeat 就可以接入别的存储 (数据库, redis, etcd 等),
+ 没有实现这两个方法的子类不能实例化.
+    '''
+
+    @abstractmethod
+    def claim(self, task_id: str, fire_time: float, node: str, ttl: float) -> bool:
+        '''
+        原子地占用 (task_id, fire_time), 同一个键只有一个节点能够成功
+        :param task_id:
+        :param fire_time: 计划的启动时间, 所有节点算出来的都一样
+        :param node: 本节点的名字
+        :param ttl: 租约保留多少秒, 过期之后可以被清理
+        :return: True if this node got the lease
+        '''
+
+    @abstractmethod
+    def heartbeat(self, node: str, ttl: float) -> List[str]:
+        '''
+        登记本节点还活着
+        :param node:
+        :param ttl: 超过这么多秒没有心跳的节点视为已经离开
+        :return: 所有活着的节点
+        '''
+
+    def leave(self, node: str) -> None:
+        '''
+        :param node: 主动离开的节点
+        :return:
+        '''
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    '''
+ 基于 SQLite 的租约后端, 依靠 SQLite 的文件锁保证同一台机器上多个进程之间的原子性,
+ 适合单机测试和共享本地磁盘的部署. 不要放在 NFS 之类的网络文件系统上.
+    '''
+
+    def __init__(self, path: str, timeout: float = 5.0, purge_interval: float = 60.0):
+        '''
+        :param path: the sqlite database file, 所有节点使用同一个文件
+        :param timeout: 等待其他进程释放锁的秒数
+        :param purge_interval: 每隔多少秒清理一次过期的租约
+        '''
+        self.path = path
+        self.purge_interval = purge_interval
+        self.__conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self.__conn.execute('PRAGMA journal_mode=WAL')
+        self.__conn.execute('PRAGMA synchronous=NORMAL')
+        self.__conn.executescript(SCHEMA)
+        self.__lock = Lock()
+        self.__purged = 0.0
+
+    def claim(self, task_id: str, fire_time: float, node: str, ttl: float) -> bool:
+        now = time.time()
+        with self.__lock:
+            if now - self.__purged > self.purge_interval:
+                self.__purged = now
+                self.__conn.execute('DELETE FROM leases WHERE expires < ?', (now,))
+            cursor = self.__conn.execute(
+                'INSERT OR IGNORE INTO leases (task_id, fire_time, node, expires) VALUES (?, ?, ?, ?)',
+                (task_id, fire_time, node, now + ttl)
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, node: str, ttl: float) -> List[str]:
+        now = time.time()
+        with self.__lock:
+            conn = self.__conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('INSERT OR REPLACE INTO nodes (node, expires) VALUES (?, ?)', (node, now + ttl))
+                conn.execute('DELETE FROM nodes WHERE expires < ?', (now,))
+                nodes = [row[0] for row in conn.execute('SELECT node FROM nodes ORDER BY node')]
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+        return nodes
+
+    def leave(self, node: str) -> None:
+        with self.__lock:
+            self.__conn.execute('DELETE FROM nodes WHERE node=?', (node,))
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__conn.close()
+
+
+class HashRing:
+    '''
+ 一致性哈希环, 每个节点放 replicas 个虚拟节点. 节点加入或离开时只有大约 1/N 的任务换节点.
+    '''
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64):
+        '''
+        :param nodes: node names
+        :param replicas: 每个节点的虚拟节点数
+        '''
+        self.replicas = replicas
+        self.nodes = ()
+        self.__keys = []  # type: List[int]
+        self.__owners = []  # type: List[str]
+        self.set_nodes(nodes)
+
+    @staticmethod
+    def hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+    def set_nodes(self, nodes: Iterable[str]) -> None:
+        '''
+        :param nodes: node names
+        :return:
+        '''
+        nodes = tuple(sorted(set(nodes)))
+        if nodes == self.nodes:
+            return
+        points = sorted((self.hash('%s#%d' % (node, i)), node) for node in nodes for i in range(self.replicas))
+        # 先准备好两个列表再一起替换, owner 不需要加锁
+        self.__keys, self.__owners, self.nodes = [p[0] for p in points], [p[1] for p in points], nodes
+
+    def owner(self, key: str) -> str:
+        '''
+        :param key: the task id
+        :return: the node name, None if the ring is empty
+        '''
+        keys, owners = self.__keys, self.__owners
+        if not keys:
+            return None
+        return owners[bisect(keys, self.hash(key)) % len(keys)]
+
+
+class Cluster:
+    '''
+ 多个节点运行同样的任务配置时, 每次启动之前先用 (task_id, 计划启动时间) 向后端申请租约,
+ 只有拿到租约的节点执行, 所以每次启动只会执行一次.
+ shard=True 时按一致性哈希把任务分给活着的节点, 每个节点只申请自己负责的任务, 节点变化时租约保证不会重复执行.
+    '''
+
+    def __init__(
+            self, backend: LeaseBackend, node: str = None, shard: bool = False,
+            ttl: float = 3600.0, heartbeat: float = 5.0, replicas: int = 64
+    ):
+        '''
+        :param backend: for example SQLiteLeaseBackend('leases.db')
+        :param node: 本节点的名字, 默认是 'hostname:pid'
+        :param shard: 按一致性哈希分配任务
+        :param ttl: 租约保留的秒数, 应该大于任务的 misfire grace
+        :param heartbeat: 心跳间隔的秒数, 三次没有心跳的节点视为已经离开
+        :param replicas: 哈希环上每个节点的虚拟节点数
+        '''
+        self.backend = backend
+        self.node = node or '%s:%s' % (socket.gethostname(), os.getpid())
+        self.shard = shard
+        self.ttl = ttl
+        self.heartbeat = heartbeat
+        self.ring = HashRing((), replicas)
+        self.__closed = Event()
+        self.__thread = None
+        self.__lock = Lock()
+
+    @property
+    def members(self) -> tuple:
+        '''
+        :return: 上一次心跳时活着的节点
+        '''
+        return self.ring.nodes
+
+    def start(self) -> None:
+        '''登记本节点并启动心跳线程, 第一次 claim 时会自动调用'''
+        with self.__lock:
+            if self.__thread is not None:
+                return
+            self.beat()
+            self.__thread = Thread(target=self.__loop, name='conciseSchedules_cluster', daemon=True)
+            self.__thread.start()
+
+    def beat(self) -> None:
+        '''发送一次心跳并更新哈希环'''
+        self.ring.set_nodes(self.backend.heartbeat(self.node, self.heartbeat * 3))
+
+    def __loop(self) -> None:
+        while not self.__closed.wait(self.heartbeat):
+            try:
+                self.beat()
+            except Exception:
+                # 后端暂时不可用时保留上一次的节点列表, 租约仍然保证不会重复执行
+                pass
+
+    def owns(self, task_id: str) -> bool:
+        '''
+        :param task_id:
+        :return: True if this node is responsible for the task
+        '''
+        if not self.shard:
+            return True
+        owner = self.ring.owner(task_id)
+        return owner is None or owner == self.node
+
+    def claim(self, task_id: str, fire_time: float) -> bool:
+        '''
+        :param task_id:
+        :param fire_time: 计划的启动时间戳
+        :return: True if this node should run this fire
+        '''
+        if self.__thread is None:
+            self.start()
+        if not self.owns(task_id):
+            return False
+        return self.backend.claim(task_id, fire_time, self.node, self.ttl)
+
+    def close(self) -> None:
+        '''停止心跳并离开集群, 其他节点的哈希环会在下一次心跳时更新'''
+        self.__closed.set()
+        if self.__thread is not None:
+            self.__thread.join()
+        try:
+            self.backend.leave(self.node)
+        finally:
+            self.backend.close()
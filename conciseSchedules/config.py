@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : config.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 21:00
+'''
+import os
+import json
+import runpy
+import select
+from threading import Thread, Event
+from functools import lru_cache
+from typing import Any, Callable, Dict, List
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+
+
+@lru_cache(maxsize=None)
+def libc():
+    '''
+    第一次启动 ConfigWatcher 时才加载 libc, find_library 会启动 ldconfig 子进程, 不能放在 import 时
+    :return: the libc with inotify_init1, None if not available
+    '''
+    try:
+        import ctypes
+        import ctypes.util
+        lib = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        lib.inotify_init1
+    except (ImportError, OSError, AttributeError, TypeError):
+        return None
+    return lib
+
+
+def load_config(path: str) -> Dict[str, List[Dict[str, Any]]]:
+    '''
+    读取任务配置文件, 格式和 set_tasks 的参数一样. JSON 和 YAML 中的 target 写成 'module:name' 形式的 import 路径,
+    python 文件执行之后取其中的 tasks_conf 变量.
+    :param path: a .json, .yaml/.yml or .py file
+    :return: tasks_conf
+    '''
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.py':
+        conf = runpy.run_path(path).get('tasks_conf')
+    elif ext in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError('reading %s requires PyYAML, pip install pyyaml' % path)
+        with open(path, encoding='utf-8') as f:
+            conf = yaml.safe_load(f)
+    else:
+        with open(path, encoding='utf-8') as f:
+            conf = json.load(f)
+    if not isinstance(conf, dict):
+        raise TypeError('%s must define a dict of tasks, got %s' % (path, type(conf).__name__))
+    for tasks in conf.values():
+        for item in tasks or ():
+            if isinstance(item, dict):
+                restore_tuples(item)
+    return conf
+
+
+def restore_tuples(item: dict) -> dict:
+    '''
+    JSON 和 YAML 没有 tuple, 把 args 和 schedule 中 (start, end) 形式的范围还原成 tuple
+    :param item: the task dict, changed in place
+    :return: item
+    '''
+    if isinstance(item.get('args'), list):
+        item['args'] = tuple(item['args'])
+    schedule = item.get('schedule')
+    if isinstance(schedule, dict):
+        for field, value in schedule.items():
+            if isinstance(value, list):
+                schedule[field] = tuple(value)
+    return item
+
+
+class ConfigWatcher:
+    '''
+ 在后台线程中监视配置文件, 文件的 mtime 或者大小变化时调用 callback(path).
+ linux 上用 inotify 监视所在的目录, 文件一写完就醒来; 其他平台每 interval 秒检查一次 mtime.
+    '''
+
+    def __init__(self, path: str, callback: Callable, interval: float = 1.0):
+        '''
+        :param path: the config file
+        :param callback: callback(path), 在监视线程中调用
+        :param interval: 检查 mtime 的间隔秒数
+        '''
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.interval = interval
+        self.__stamp = self.stamp()
+        self.__closed = Event()
+        self.__fd = self.__inotify()
+        self.__thread = Thread(target=self.__loop, name='conciseSchedules_config', daemon=True)
+        self.__thread.start()
+
+    def stamp(self) -> tuple:
+        '''
+        :return: (mtime_ns, size), None if the file does not exist
+        '''
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def __inotify(self) -> int:
+        '''
+        :return: the inotify fd, None if not available
+        '''
+        lib = libc()
+        if lib is None:
+            return None
+        fd = lib.inotify_init1(IN_NONBLOCK)
+        if fd < 0:
+            return None
+        # 监视目录而不是文件, 编辑器先写临时文件再改名的方式也能收到
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if lib.inotify_add_watch(fd, os.path.dirname(self.path).encode(), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def __wait(self) -> None:
+        fd = self.__fd
+        if fd is None:
+            self.__closed.wait(self.interval)
+            return
+        try:
+            if select.select([fd], [], [], self.interval)[0]:
+                os.read(fd, 65536)
+                # 一次保存往往有好几个事件, 稍等一下再读取文件
+                self.__closed.wait(0.05)
+        except OSError:
+            self.__closed.wait(self.interval)
+
+    def __loop(self) -> None:
+        while not self.__closed.is_set():
+            self.__wait()
+            stamp = self.stamp()
+            if stamp is None or stamp == self.__stamp or self.__closed.is_set():
+                continue
+            self.__stamp = stamp
+            self.callback(self.path)
+
+    def close(self) -> None:
+        self.__closed.set()
+        self.__thread.join()
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : events.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 17:00
+'''
+import sys
+import json
+from collections import deque
+from datetime import datetime
+from threading import Thread, Lock, Condition
+from typing import Callable, TextIO
+
+
+class Event:
+    '''
+ 一条结构化的日志记录. date_time 是事件对应的时间 (启动类事件是计划的启动时间), task 是任务的显示名,
+ fields 是其余的字段, 例如 pid, late, code, duration.
+    '''
+    __slots__ = ('event', 'date_time', 'task', 'fields')
+
+    def __init__(self, event: str, date_time: datetime, task: str = None, fields: dict = None):
+        self.event = event
+        self.date_time = date_time
+        self.task = task
+        self.fields = fields or {}
+
+    def to_dict(self) -> dict:
+        '''
+        :return: a json serializable dict
+        '''
+        record = {
+            'time': self.date_time.isoformat(),
+            'tz': str(self.date_time.tzinfo),
+            'event': self.event,
+        }
+        if self.task is not None:
+            record['task'] = self.task
+        record.update(self.fields)
+        return record
+
+
+class TextSink:
+    '''
+ 文本格式: "[时区 时间] event [task] key value ...", 和原来 print 的格式一致. 浮点数保留3位小数,
+ 字段 line (子进程的输出) 和 traceback (异常堆栈) 原样输出在最后.
+    '''
+
+    def __init__(self, stream: TextIO = None):
+        '''
+        :param stream: default sys.stdout
+        '''
+        self.stream = stream
+
+    def __call__(self, event: Event) -> None:
+        date_time = event.date_time
+        parts = ["[%s %s]" % (date_time.tzinfo, date_time.strftime('%Y-%m-%d %H:%M:%S')), event.event]
+        if event.task is not None:
+            parts.append('[%s]' % event.task)
+        tail = []
+        for key, value in event.fields.items():
+            if key in ('line', 'traceback'):
+                tail.append(str(value).rstrip('\n'))
+            elif isinstance(value, float):
+                parts.append('%s %.3f' % (key, value))
+            else:
+                parts.append('%s %s' % (key, value))
+        line = ' '.join(parts + tail[:1])
+        if len(tail) > 1:
+            line = '\n'.join([line] + tail[1:])
+        (self.stream or sys.stdout).write(line + '\n')
+
+    def flush(self) -> None:
+        '''每批记录写完之后调用一次'''
+        (self.stream or sys.stdout).flush()
+
+
+class JsonSink(TextSink):
+    '''
+ JSON lines 格式, 每条记录一行, 方便交给日志收集程序处理.
+    '''
+
+    def __call__(self, event: Event) -> None:
+        (self.stream or sys.stdout).write(json.dumps(event.to_dict(), ensure_ascii=False, default=str) + '\n')
+
+
+class EventLog:
+    '''
+ 非阻塞的日志管道: emit 只把记录放进有上限的队列, 由后台线程批量交给 sink 写出,
+ 调度线程和工作线程不会因为 stdout 慢 (例如管道另一端的日志收集程序) 而阻塞.
+ 队列满时丢弃新的记录, dropped 是累计的丢弃数.
+    '''
+
+    def __init__(self, sink: Callable[[Event], None] = None, max_queue: int = 10000):
+        '''
+        :param sink: a callable(event), 可以有 flush() 方法, 默认 TextSink()
+        :param max_queue: 0 表示不限制
+        '''
+        self.sink = sink or TextSink()
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.written = 0
+        self.__queue = deque()
+        self.__busy = False
+        self.__thread = None
+        self.__lock = Lock()
+        self.__not_empty = Condition(self.__lock)
+        self.__idle = Condition(self.__lock)
+
+    @property
+    def queue_depth(self) -> int:
+        '''等待写出的记录数'''
+        return len(self.__queue)
+
+    def emit(self, event: str, date_time: datetime, task: str = None, fields: dict = None) -> bool:
+        '''
+        :param event: the event name, for example 'exec', 'exit', 'misfire'
+        :param date_time: an aware datetime
+        :param task:
+        :param fields:
+        :return: False if the queue is full and the event is dropped
+        '''
+        record = Event(event, date_time, task, fields)
+        with self.__lock:
+            if self.max_queue and len(self.__queue) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self.__queue.append(record)
+            if self.__thread is None:
+                self.__thread = Thread(target=self.__loop, name='conciseSchedules_log', daemon=True)
+                self.__thread.start()
+            self.__not_empty.notify()
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        '''
+        等待队列中的记录全部写出
+        :param timeout: None 表示一直等待
+        :return: True if the queue is drained
+        '''
+        with self.__lock:
+            return self.__idle.wait_for(lambda: not self.__queue and not self.__busy, timeout)
+
+    def __loop(self) -> None:
+        queue = self.__queue
+        while 1:
+            with self.__lock:
+                while not queue:
+                    self.__not_empty.wait()
+                batch = list(queue)
+                queue.clear()
+                self.__busy = True
+            sink = self.sink
+            for record in batch:
+                try:
+                    sink(record)
+                except Exception:
+                    pass
+            flush = getattr(sink, 'flush', None)
+            if flush is not None:
+                try:
+                    flush()
+                except Exception:
+                    pass
+            with self.__lock:
+                self.written += len(batch)
+                self.__busy = False
+                if not queue:
+                    self.__idle.notify_all()
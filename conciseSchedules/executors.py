@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : executors.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 13:00
+'''
+from time import monotonic
+from collections import deque
+from threading import Thread, Lock, Condition, current_thread
+from concurrent.futures import Executor, Future
+from typing import Callable
+
+
+class RejectedExecution(Exception):
+    '''提交队列已满, 并且 overflow 策略为 'reject' 时抛出'''
+
+
+class _WorkItem:
+    __slots__ = ('future', 'fn', 'args', 'kwargs', 'queued')
+
+    def __init__(self, future: Future, fn: Callable, args: tuple, kwargs: dict):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.queued = monotonic()
+
+    def run(self) -> None:
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+
+
+class BoundedExecutor(Executor):
+    '''
+ 固定上限的线程池, 任务直接在工作线程中执行, 不再为每次启动单独创建线程.
+ 提交队列有上限 max_queue (0 表示不限制), 队列满时按 overflow 策略处理:
+ 'block' 阻塞提交方直到有空位, 'drop_oldest' 丢弃队列中最早的任务, 'reject' 抛出 RejectedExecution.
+ queue_depth 和 in_flight 可以作为监控指标使用, dropped 和 rejected 是累计的丢弃/拒绝次数.
+ target_wait 为 None 时, 队列中的任务比空闲线程多就增加线程, 直到 max_workers.
+ 设置了 target_wait 时按排队时间伸缩: 队列中最早的任务等待超过 target_wait 秒并且没有空闲线程时才增加一个线程,
+ 空闲超过 idle_timeout 秒的线程退出, 至少保留 min_workers 个. 每次伸缩调用 on_scale(event, workers, reason),
+ scale_ups / scale_downs 是累计次数, queue_wait 是最近任务排队时间的指数移动平均.
+    '''
+    overflows = ('block', 'drop_oldest', 'reject')
+
+    def __init__(self, max_workers: int = 10, max_queue: int = 0, overflow: str = 'block',
+                 name: str = 'conciseSchedules', min_workers: int = 0, target_wait: float = None,
+                 idle_timeout: float = None, on_scale: Callable = None):
+        if max_workers <= 0:
+            raise ValueError('max_workers must be greater than 0')
+        if not 0 <= min_workers <= max_workers:
+            raise ValueError('min_workers must be between 0 and max_workers')
+        if overflow not in self.overflows:
+            raise TypeError('overflow must in %s, got %s' % (self.overflows, overflow))
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.name = name
+        self.min_workers = min_workers
+        self.target_wait = target_wait
+        self.idle_timeout = idle_timeout
+        self.on_scale = on_scale
+        self.in_flight = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.scale_ups = 0
+        self.scale_downs = 0
+        self.queue_wait = 0.0
+        self.__queue = deque()
+        self.__threads = set()
+        self.__idle = 0
+        self.__seq = 0
+        self.__monitor = None
+        self.__shutdown = False
+        self.__lock = Lock()
+        self.__not_empty = Condition(self.__lock)
+        self.__not_full = Condition(self.__lock)
+        self.__backlog = Condition(self.__lock)
+
+    @property
+    def queue_depth(self) -> int:
+        '''等待执行的任务数'''
+        return len(self.__queue)
+
+    @property
+    def workers(self) -> int:
+        '''当前的工作线程数'''
+        return len(self.__threads)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        '''
+        :param fn:
+        :param args:
+        :param kwargs:
+        :return:
+        '''
+        with self.__lock:
+            if self.__shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            queue = self.__queue
+            while self.max_queue and len(queue) >= self.max_queue:
+                if self.overflow == 'reject':
+                    self.rejected += 1
+                    raise RejectedExecution('%s queue is full (%s)' % (self.name, self.max_queue))
+                if self.overflow == 'drop_oldest':
+                    queue.popleft().future.cancel()
+                    self.dropped += 1
+                    break
+                self.__not_full.wait()
+                if self.__shutdown:
+                    raise RuntimeError('cannot schedule new futures after shutdown')
+            future = Future()
+            queue.append(_WorkItem(future, fn, args, kwargs))
+            self.__not_empty.notify()
+            self.__scale()
+            if self.target_wait is not None and self.__idle < len(queue):
+                if self.__monitor is None:
+                    self.__monitor = Thread(target=self.__watch, name='%s_monitor' % self.name, daemon=True)
+                    self.__monitor.start()
+                self.__backlog.notify()
+        return future
+
+    def submit_first(self, fn: Callable, *args, **kwargs) -> Future:
+        '''
+        插到队列的最前面, 不受 max_queue 限制. 给毫秒级的任务使用, 不会排在同一时刻提交的一大批任务后面
+        :param fn:
+        :param args:
+        :param kwargs:
+        :return:
+        '''
+        with self.__lock:
+            if self.__shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            future = Future()
+            self.__queue.appendleft(_WorkItem(future, fn, args, kwargs))
+            self.__not_empty.notify()
+            self.__scale()
+        return future
+
+    def __scale(self) -> None:
+        '''调用时已经持有锁, 需要时增加一个线程'''
+        queue = self.__queue
+        workers = len(self.__threads)
+        if not queue or self.__idle >= len(queue) or workers >= self.max_workers:
+            return
+        if self.target_wait is None or workers == 0:
+            reason = 'queue'
+        elif workers < self.min_workers:
+            reason = 'min'
+        elif monotonic() - queue[0].queued > self.target_wait:
+            reason = 'wait'
+        else:
+            return
+        self.__seq += 1
+        t = Thread(target=self.__worker, name='%s_%s' % (self.name, self.__seq), daemon=True)
+        self.__threads.add(t)
+        t.start()
+        self.scale_ups += 1
+        if self.on_scale is not None:
+            self.on_scale('up', workers + 1, reason)
+
+    def __watch(self) -> None:
+        '''
+        所有线程都在执行耗时的任务时没有新的提交和出队, 由这个线程定期检查排队时间
+        '''
+        with self.__lock:
+            while not self.__shutdown:
+                if self.__idle >= len(self.__queue):
+                    self.__backlog.wait()
+                    continue
+                self.__backlog.wait(self.target_wait / 2)
+                self.__scale()
+
+    def __worker(self) -> None:
+        queue = self.__queue
+        while 1:
+            with self.__lock:
+                while not queue and not self.__shutdown:
+                    self.__idle += 1
+                    notified = self.__not_empty.wait(self.idle_timeout)
+                    self.__idle -= 1
+                    if not notified and not queue and len(self.__threads) > self.min_workers:
+                        # 空闲超时, 线程退出
+                        self.__threads.discard(current_thread())
+                        self.scale_downs += 1
+                        if self.on_scale is not None:
+                            self.on_scale('down', len(self.__threads), 'idle')
+                        return
+                if not queue:
+                    return
+                item = queue.popleft()
+                wait = monotonic() - item.queued
+                self.queue_wait += (wait - self.queue_wait) * 0.2
+                self.in_flight += 1
+                self.__not_full.notify()
+                self.__scale()
+            try:
+                item.run()
+            finally:
+                with self.__lock:
+                    self.in_flight -= 1
+
+    def shutdown(self, wait: bool = True) -> None:
+        '''
+        :param wait: 等待队列中的任务执行完
+        :return:
+        '''
+        with self.__lock:
+            self.__shutdown = True
+            self.__not_empty.notify_all()
+            self.__not_full.notify_all()
+            self.__backlog.notify_all()
+            threads = list(self.__threads)
+        if wait:
+            for t in threads:
+                t.join()
+
+
+class ProcessExecutor(Executor):
+    '''
+ 常驻的进程池, 给 CPU 密集型的 schedule_tasks 使用 (task 配置 'executor': 'process').
+ target, args, kwargs 会被 pickle 之后发送到子进程, 所以 target 必须是模块级的函数.
+ max_tasks_per_child: 每个子进程执行多少个任务之后被回收重建, None 表示不回收.
+ initializer/initargs: 每个子进程启动时执行一次, 可以用来预先 import 模块或者预热缓存.
+    '''
+
+    def __init__(self, max_workers: int = None, max_tasks_per_child: int = None,
+                 initializer: Callable = None, initargs: tuple = ()):
+        from multiprocessing import cpu_count
+        from multiprocessing.pool import Pool as ProcessPool
+        self.max_workers = max_workers or cpu_count()
+        self.max_tasks_per_child = max_tasks_per_child
+        self.in_flight = 0
+        self.__lock = Lock()
+        self.__pool = ProcessPool(self.max_workers, initializer, initargs, max_tasks_per_child)
+
+    def __done(self, future: Future, result=None, error: BaseException = None) -> None:
+        with self.__lock:
+            self.in_flight -= 1
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        '''
+        :param fn: a picklable callable
+        :param args:
+        :param kwargs:
+        :return:
+        '''
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self.__lock:
+            self.in_flight += 1
+        try:
+            self.__pool.apply_async(
+                fn, args, kwargs,
+                callback=lambda result: self.__done(future, result),
+                error_callback=lambda error: self.__done(future, error=error)
+            )
+        except Exception as e:
+            self.__done(future, error=e)
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        '''
+        :param wait: 等待正在执行的任务执行完
+        :return:
+        '''
+        self.__pool.close()
+        if wait:
+            self.__pool.join()
+        else:
+            self.__pool.terminate()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : forkserver.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 15:00
+
+预先 fork 的 python 启动器.
+ForkServer 启动一个常驻的 python 父进程, 父进程先 import 好 preload 中的模块,
+之后每个 'python xxx.py' 任务都从这个父进程 fork 一个子进程, 在子进程中用 runpy 执行脚本,
+省去每次启动解释器和 import 大型库的时间.
+这个文件会被当作脚本直接运行, 所以服务端只能使用标准库, 不能 import conciseSchedules.
+'''
+import os
+import sys
+import json
+import time
+import shlex
+import socket
+import select
+import signal
+from collections import deque
+from threading import Thread, Lock, Condition, Event
+from typing import Callable, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from subprocess import Popen
+
+__python_names = ('python', 'python3')
+__shell_chars = set('|&;<>()$`\\*?[]#~{}\n')
+
+
+def parse_python_command(shell: str) -> List[str]:
+    '''
+    判断 shell 是不是一条简单的 "python xxx.py args" 或 "python -m module args" 命令
+    :param shell:
+    :return: argv without the interpreter, for example ['xxx.py', 'args'] or ['-m', 'module', 'args'], None if not
+    '''
+    if set(shell) & __shell_chars:
+        return None
+    try:
+        argv = shlex.split(shell)
+    except ValueError:
+        return None
+    if len(argv) < 2:
+        return None
+    name = os.path.basename(argv[0])
+    if not (name in __python_names or name.startswith('python3.')):
+        return None
+    if argv[1] == '-m':
+        return argv[1:] if len(argv) > 2 else None
+    if argv[1].startswith('-') or not argv[1].endswith('.py'):
+        return None
+    return argv[1:]
+
+
+class ForkRecord:
+    '''
+ ForkServer 启动的一个子进程的记录, 属性和 subprocs.ProcessRecord 一致.
+ 服务端进程意外退出时拿不到子进程的退出码, cancelled 为 True, returncode 为 None.
+    '''
+    __slots__ = ('key', 'args', 'pid', 'started', 'finished', 'returncode', 'cancelled', '_started_event', '_sock')
+
+    def __init__(self, key: str, args: str):
+        self.key = key
+        self.args = args
+        self.pid = None
+        self.started = time.time()
+        self.finished = None
+        self.returncode = None
+        self.cancelled = False
+        self._started_event = Event()
+        self._sock = None
+
+    @property
+    def duration(self) -> float:
+        '''运行时间, 单位秒, 还没结束时是到现在为止的时间'''
+        return (self.finished or time.time()) - self.started
+
+
+class ForkServer:
+    '''
+ preforked python 启动器的客户端. 第一次 spawn 时启动服务端进程.
+ 服务端进程的 stdout/stderr 继承自 scheduler, 子进程的输出和直接 Popen 时一样.
+ on_exit(record) 在每个子进程退出时调用.
+    '''
+
+    def __init__(self, preload: List[str] = None, on_exit: Callable[[ForkRecord], None] = None,
+                 history: int = 1000):
+        self.preload = list(preload or [])
+        self.on_exit = on_exit
+        self.running = {}
+        self.finished = deque(maxlen=history)
+        self.__per_key = {}
+        self.__jobs = {}
+        self.__lock = Lock()
+        self.__idle = Condition(self.__lock)
+        self.__sock = None
+        self.__process = None
+
+    @staticmethod
+    def available() -> bool:
+        ''':return: 当前平台是否支持 fork'''
+        return hasattr(os, 'fork')
+
+    def count(self, key: str = None) -> int:
+        '''
+        :param key: None 表示全部
+        :return: 正在运行的子进程数
+        '''
+        if key is None:
+            return len(self.__jobs)
+        return self.__per_key.get(key, 0)
+
+    def join(self, timeout: float = None) -> bool:
+        '''
+        等待所有子进程退出
+        :param timeout: None 表示一直等待
+        :return: True if no child is running
+        '''
+        with self.__lock:
+            return self.__idle.wait_for(lambda: not self.__jobs, timeout)
+
+    def __start(self) -> None:
+        from subprocess import Popen, DEVNULL
+        parent, child = socket.socketpair()
+        self.__process = Popen(
+            [sys.executable, os.path.abspath(__file__), str(child.fileno()), ','.join(self.preload)],
+            pass_fds=(child.fileno(),), stdin=DEVNULL
+        )
+        child.close()
+        self.__sock = parent
+        Thread(
+            target=self.__reader, args=(parent, self.__process), name='conciseSchedules_forkserver', daemon=True
+        ).start()
+
+    def __reader(self, sock: socket.socket, process: 'Popen') -> None:
+        for line in sock.makefile('r', encoding='utf-8'):
+            message = json.loads(line)
+            with self.__lock:
+                record = self.__jobs.get(message['id'])
+            if record is None:
+                continue
+            if 'pid' in message:
+                record.pid = message['pid']
+                record.started = time.time()
+                with self.__lock:
+                    self.running[record.pid] = record
+                record._started_event.set()
+            elif 'exit' in message:
+                self.__finish(record, message['exit'])
+        # close 之后服务端会等所有子进程退出并发回退出码才退出, 走到这里还没有结果的任务是服务端意外退出了,
+        # 子进程可能还在运行, 退出码已经拿不到, 记为取消而不是失败
+        process.wait()
+        sock.close()
+        with self.__lock:
+            if self.__sock is sock:
+                self.__sock = None
+            jobs = [record for record in self.__jobs.values() if record._sock is sock]
+        for record in jobs:
+            record._started_event.set()
+            self.__finish(record, None, cancelled=True)
+
+    def __finish(self, record: ForkRecord, returncode: int, cancelled: bool = False) -> None:
+        with self.__lock:
+            if self.__jobs.pop(id(record), None) is None:
+                return
+            record.returncode = returncode
+            record.cancelled = cancelled
+            record.finished = time.time()
+            self.running.pop(record.pid, None)
+            left = self.__per_key.get(record.key, 1) - 1
+            if left:
+                self.__per_key[record.key] = left
+            else:
+                self.__per_key.pop(record.key, None)
+        self.finished.append(record)
+        if self.on_exit is not None:
+            try:
+                self.on_exit(record)
+            except Exception:
+                pass
+        with self.__lock:
+            if not self.__jobs:
+                self.__idle.notify_all()
+
+    def spawn(self, key: str, shell: str, argv: List[str], cwd: str = None, max_instances: int = 0,
+              max_children: int = 0, timeout: float = 10) -> ForkRecord:
+        '''
+        :param key: 任务的标识, 用于 max_instances 计数
+        :param shell: 原始的 shell 命令, 用于日志
+        :param argv: parse_python_command 的返回值
+        :param cwd: 子进程的工作目录, 默认为当前目录
+        :param max_instances: 同一个 key 的并发上限, 0 表示不限制
+        :param max_children: 全部子进程的并发上限, 0 表示不限制
+        :param timeout: 等待服务端返回子进程 pid 的时间
+        :return: ForkRecord, or None if the concurrency limit is reached
+        '''
+        with self.__lock:
+            if max_children and len(self.__jobs) >= max_children:
+                return None
+            if max_instances and self.__per_key.get(key, 0) >= max_instances:
+                return None
+            if self.__sock is None:
+                self.__start()
+            record = ForkRecord(key, shell)
+            record._sock = self.__sock
+            self.__jobs[id(record)] = record
+            self.__per_key[key] = self.__per_key.get(key, 0) + 1
+            message = {'id': id(record), 'argv': argv, 'cwd': cwd or os.getcwd()}
+            self.__sock.sendall((json.dumps(message) + '\n').encode('utf-8'))
+        record._started_event.wait(timeout)
+        return record
+
+    def close(self, wait: bool = False) -> None:
+        '''
+        关闭服务端进程: 服务端不再接收新的任务, 等已经启动的子进程都退出并发回退出码之后自己退出.
+        之后的 spawn 会启动一个新的服务端
+        :param wait: 等待服务端和它的子进程都退出
+        :return:
+        '''
+        with self.__lock:
+            sock, self.__sock = self.__sock, None
+            process = self.__process
+        if sock is not None:
+            # 只关闭写的一端, 服务端读到 EOF, 还可以继续发回子进程的退出码, 由 reader 线程读完之后关闭 socket
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+        if wait and process is not None:
+            process.wait()
+
+
+def _run_child(argv: List[str], cwd: str) -> None:
+    '''在 fork 出来的子进程中执行脚本或模块, 执行完直接 os._exit'''
+    import runpy
+    import traceback
+    code = 0
+    try:
+        os.chdir(cwd)
+        if argv[0] == '-m':
+            sys.argv = argv[1:]
+            sys.path[0] = os.getcwd()
+            runpy.run_module(argv[1], run_name='__main__', alter_sys=True)
+        else:
+            sys.argv = list(argv)
+            sys.path[0] = os.path.dirname(os.path.abspath(argv[0]))
+            runpy.run_path(argv[0], run_name='__main__')
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def serve(fd: int, preload: List[str]) -> None:
+    '''
+    服务端主循环: 读取 json 请求, fork 子进程, 回收子进程并返回退出码
+    :param fd: 和客户端通信的 socket
+    :param preload: 需要预先 import 的模块
+    :return:
+    '''
+    import importlib
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print('forkserver preload %s failed: %r' % (name, e), file=sys.stderr)
+    sock = socket.socket(fileno=fd)
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    children = {}
+    buffer = b''
+    closed = False
+    gone = False
+    while not closed or children:
+        readable = select.select([wake_r] if closed else [sock, wake_r], [], [])[0]
+        if wake_r in readable:
+            try:
+                os.read(wake_r, 4096)
+            except BlockingIOError:
+                pass
+        if sock in readable:
+            data = sock.recv(65536)
+            if not data:
+                closed = True
+            buffer += data
+            while b'\n' in buffer:
+                line, buffer = buffer.split(b'\n', 1)
+                message = json.loads(line.decode('utf-8'))
+                pid = os.fork()
+                if pid == 0:
+                    sock.close()
+                    signal.set_wakeup_fd(-1)
+                    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                    _run_child(message['argv'], message['cwd'])
+                children[pid] = message['id']
+                sock.sendall((json.dumps({'id': message['id'], 'pid': pid}) + '\n').encode('utf-8'))
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            job = children.pop(pid, None)
+            if job is None:
+                continue
+            if os.WIFSIGNALED(status):
+                code = -os.WTERMSIG(status)
+            else:
+                code = os.WEXITSTATUS(status)
+            # 客户端 close 之后只是不再发送新的任务, 退出码仍然发回去; 客户端进程已经退出时才放弃
+            if not gone:
+                try:
+                    sock.sendall((json.dumps({'id': job, 'exit': code}) + '\n').encode('utf-8'))
+                except OSError:
+                    gone = True
+
+
+if __name__ == '__main__':
+    # 作为脚本运行时 sys.path[0] 是本包的目录, 换成工作目录, 以免包内的模块名遮住同名的模块
+    sys.path[0] = os.getcwd()
+    serve(int(sys.argv[1]), [name for name in sys.argv[2].split(',') if name])
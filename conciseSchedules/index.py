@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : index.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 01:00
+'''
+import os
+import json
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from .clock import get_timezone
+from .config import restore_tuples
+from .store import SQLiteJobStore
+
+VERSION = 1
+
+SCHEMA = '''
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE specs (
+    id INTEGER PRIMARY KEY,
+    zone TEXT NOT NULL,
+    second INTEGER,
+    day INTEGER,
+    month INTEGER,
+    weekday INTEGER
+);
+CREATE TABLE slots (zone TEXT NOT NULL, slot INTEGER NOT NULL, spec INTEGER NOT NULL, PRIMARY KEY (zone, slot, spec)) WITHOUT ROWID;
+CREATE TABLE tasks (spec INTEGER NOT NULL, kind TEXT NOT NULL, task TEXT NOT NULL);
+CREATE INDEX tasks_spec ON tasks (spec);
+'''
+
+
+def source_key(path: str) -> str:
+    '''
+    :param path: the task file
+    :return: 文件的路径, 修改时间和大小, 文件改动之后就不一样
+    '''
+    st = os.stat(path)
+    return '%s:%s:%s:%s' % (VERSION, os.path.realpath(path), st.st_mtime_ns, st.st_size)
+
+
+def bits(mask: int, size: int) -> List[int]:
+    '''
+    :param mask: None 表示全部
+    :param size: 60 for minute, 24 for hour
+    :return: 为 1 的位
+    '''
+    return [i for i in range(size) if mask is None or mask >> i & 1]
+
+
+class ScheduleIndex:
+    '''
+ 预先编译好的任务索引, 保存在一个 sqlite 文件中, 给每分钟由系统 cron 启动一次的命令行使用.
+ 规则相同的任务共用一行 spec, 按 (时区, 一天中的第几分钟) 建立索引, day/month/weekday/second 的 bitmask 保存在 spec 中.
+ due 只读取这一分钟可能到点的 spec 和真正到点的任务, 耗时和任务文件的大小无关.
+ target 和 SQLiteJobStore 一样保存为 import 路径, 执行时才 import.
+    '''
+
+    def __init__(self, path: str):
+        '''
+        :param path: build 生成的索引文件
+        '''
+        self.path = path
+        self.__conn = sqlite3.connect(path)
+        self.__meta = dict(self.__conn.execute('SELECT key, value FROM meta'))
+
+    @property
+    def key(self) -> str:
+        '''source_key(task file) when the index was built'''
+        return self.__meta.get('key')
+
+    @classmethod
+    def build(cls, path: str, key: str, tasks: Iterable[tuple]) -> 'ScheduleIndex':
+        '''
+        生成新的索引文件, 先写到临时文件再替换, 同时运行的其他进程不会读到写了一半的索引
+        :param path:
+        :param key: source_key(task file)
+        :param tasks: [(kind, item, spec), ...], spec is a CompiledSpec
+        :return: the index, raise ValueError if a task can not be saved
+        '''
+        specs = {}  # type: Dict[tuple, int]
+        slots = []
+        rows = []
+        zones = set()
+        for kind, item, spec in tasks:
+            text = SQLiteJobStore.dump(item)
+            if text is None:
+                raise ValueError('task %r can not be saved, target must be importable' % (item,))
+            zone = item.get('tz') or ''
+            second, minute, hour, day, month, weekday = spec
+            spec_id = specs.get((zone, spec))
+            if spec_id is None:
+                spec_id = specs[(zone, spec)] = len(specs)
+                zones.add(zone)
+                slots.extend((zone, h * 60 + m, spec_id) for h in bits(hour, 24) for m in bits(minute, 60))
+            rows.append((spec_id, kind, text))
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = '%s.%s.tmp' % (path, os.getpid())
+        conn = sqlite3.connect(tmp)
+        try:
+            conn.executescript(SCHEMA)
+            conn.executemany(
+                'INSERT INTO specs (id, zone, second, day, month, weekday) VALUES (?, ?, ?, ?, ?, ?)',
+                [(spec_id, zone, spec[0], spec[3], spec[4], spec[5]) for (zone, spec), spec_id in specs.items()]
+            )
+            conn.executemany('INSERT INTO slots (zone, slot, spec) VALUES (?, ?, ?)', slots)
+            conn.executemany('INSERT INTO tasks (spec, kind, task) VALUES (?, ?, ?)', rows)
+            conn.executemany('INSERT INTO meta (key, value) VALUES (?, ?)', [
+                ('key', key), ('zones', json.dumps(sorted(zones))), ('tasks', str(len(rows)))
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp, path)
+        return cls(path)
+
+    def due(self, timestamp: float, tz: str) -> Tuple[List[float], Dict[str, List[dict]]]:
+        '''
+        :param timestamp: 检查这个时间戳所在的一分钟
+        :param tz: 没有配置 'tz' 的任务使用的时区
+        :return: (这一分钟内到点的时间戳, 到点的 tasks_conf)
+        '''
+        start = timestamp // 60 * 60
+        seconds = set()
+        conf = {}
+        for zone in json.loads(self.__meta.get('zones', '[]')):
+            date_time = datetime.fromtimestamp(start, get_timezone(zone or tz))
+            rows = self.__conn.execute(
+                'SELECT specs.id, specs.second, specs.day, specs.month, specs.weekday FROM slots '
+                'JOIN specs ON specs.id = slots.spec WHERE slots.zone = ? AND slots.slot = ?',
+                (zone, date_time.hour * 60 + date_time.minute)
+            ).fetchall()
+            for spec_id, second, day, month, weekday in rows:
+                if not (
+                    (day is None or day >> date_time.day & 1)
+                    and (month is None or month >> date_time.month & 1)
+                    and (weekday is None or weekday >> date_time.weekday() & 1)
+                ):
+                    continue
+                # crontab_tasks 没有秒, 在这一分钟开始时检查
+                seconds.update(bits(second, 60) if second is not None else (0,))
+                for kind, text in self.__conn.execute('SELECT kind, task FROM tasks WHERE spec = ?', (spec_id,)):
+                    conf.setdefault(kind, []).append(restore_tuples(json.loads(text)))
+        return [start + second for second in sorted(seconds)], conf
+
+    def close(self) -> None:
+        self.__conn.close()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : metrics.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 16:00
+'''
+from bisect import bisect_left
+from threading import Thread, Lock
+from typing import Callable, Dict, Sequence, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from http.server import HTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+class Histogram:
+    '''
+ Prometheus 风格的直方图: counts[i] 是落在 (buckets[i-1], buckets[i]] 中的观测数,
+ 最后一个元素是大于所有桶上限的观测数, 导出时再累加成 le 桶.
+    '''
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        '''
+        :param value:
+        :return:
+        '''
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    '''
+ 调度器的指标注册表: 按任务名分组的计数器和直方图, 以及在导出时才取值的 gauge.
+ render() 返回 Prometheus 的文本格式, serve() 在本地启动一个 HTTP 端口提供 /metrics.
+    '''
+    counters = {
+        'fires': '任务启动次数',
+        'failures': '任务执行失败次数 (抛出异常或者 shell 退出码不为0)',
+        'skips': '到点但没有执行的次数 (misfire 策略为 skip, 队列已满或者达到并发上限)',
+        'misfires': '迟到超过 grace 的次数',
+        'unclaimed': '多节点运行时由其他节点执行, 本节点没有执行的次数',
+        'throttled': '超过全局启动速率上限, 推迟启动的次数',
+    }
+    histograms = {
+        'lateness_seconds': '实际启动时间比计划时间晚了多少秒',
+        'duration_seconds': '任务的执行时间',
+    }
+
+    def __init__(self, prefix: str = 'conciseSchedules', buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self.__lock = Lock()
+        self.__counters = {name: {} for name in self.counters}  # type: Dict[str, Dict[str, float]]
+        self.__histograms = {name: {} for name in self.histograms}  # type: Dict[str, Dict[str, Histogram]]
+        self.__gauges = {}  # type: Dict[str, tuple]
+
+    def inc(self, name: str, task: str, value: float = 1) -> None:
+        '''
+        :param name: one of Metrics.counters
+        :param task: the task name
+        :param value:
+        :return:
+        '''
+        with self.__lock:
+            counter = self.__counters[name]
+            counter[task] = counter.get(task, 0) + value
+
+    def observe(self, name: str, task: str, value: float) -> None:
+        '''
+        :param name: one of Metrics.histograms
+        :param task: the task name
+        :param value: seconds
+        :return:
+        '''
+        with self.__lock:
+            histograms = self.__histograms[name]
+            histogram = histograms.get(task)
+            if histogram is None:
+                histogram = histograms[task] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def gauge(self, name: str, func: Callable[[], float], help: str = '') -> None:
+        '''
+        注册一个 gauge, 导出时调用 func 取值
+        :param name:
+        :param func: a callable return a number
+        :param help:
+        :return:
+        '''
+        self.__gauges[name] = (func, help)
+
+    def counter(self, name: str, task: str) -> float:
+        '''
+        :return: the counter value of the task
+        '''
+        return self.__counters[name].get(task, 0)
+
+    def histogram(self, name: str, task: str) -> Histogram:
+        '''
+        :return: the histogram of the task, or None
+        '''
+        return self.__histograms[name].get(task)
+
+    def render(self) -> str:
+        '''
+        :return: Prometheus text exposition format
+        '''
+        prefix = self.prefix
+        lines = []
+        with self.__lock:
+            for name, help in self.counters.items():
+                metric = '%s_%s_total' % (prefix, name)
+                lines.append('# HELP %s %s' % (metric, help))
+                lines.append('# TYPE %s counter' % metric)
+                for task, value in self.__counters[name].items():
+                    lines.append('%s{task="%s"} %s' % (metric, _escape(task), _number(value)))
+            for name, help in self.histograms.items():
+                metric = '%s_%s' % (prefix, name)
+                lines.append('# HELP %s %s' % (metric, help))
+                lines.append('# TYPE %s histogram' % metric)
+                for task, histogram in self.__histograms[name].items():
+                    task = _escape(task)
+                    total = 0
+                    for bound, count in zip(self.buckets + (float('inf'),), histogram.counts):
+                        total += count
+                        lines.append('%s_bucket{task="%s",le="%s"} %s' % (metric, task, _number(bound), total))
+                    lines.append('%s_sum{task="%s"} %s' % (metric, task, _number(histogram.sum)))
+                    lines.append('%s_count{task="%s"} %s' % (metric, task, histogram.count))
+        for name, (func, help) in list(self.__gauges.items()):
+            metric = '%s_%s' % (prefix, name)
+            try:
+                value = func()
+            except Exception:
+                continue
+            lines.append('# HELP %s %s' % (metric, help))
+            lines.append('# TYPE %s gauge' % metric)
+            lines.append('%s %s' % (metric, _number(value)))
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int = 9108, host: str = '127.0.0.1') -> 'HTTPServer':
+        '''
+        在后台线程中启动 HTTP 服务, GET /metrics 返回 render() 的结果
+        :param port: 0 表示随机端口, 实际端口是 server.server_address[1]
+        :param host: 默认只监听本机
+        :return: the server, server.shutdown() to stop it
+        '''
+        from http.server import HTTPServer, BaseHTTPRequestHandler
+        render = self.render
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = HTTPServer((host, port), Handler)
+        Thread(target=server.serve_forever, name='conciseSchedules_metrics', daemon=True).start()
+        return server
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : ratelimit.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 23:00
+'''
+import time
+from threading import Lock
+from typing import Callable
+
+
+class TokenBucket:
+    '''
+ 令牌桶: 每秒补充 rate 个令牌, 最多攒 burst 个.
+ reserve 立即取走令牌 (不够时透支), 返回调用方需要等待的秒数, 所以多个调用方按调用的先后排队, 不会有人一直等不到.
+    '''
+
+    def __init__(self, rate: float, burst: float = 1, clock: Callable[[], float] = time.monotonic):
+        '''
+        :param rate: 每秒的令牌数
+        :param burst: 桶的容量, 空闲之后最多可以连续取走这么多个不用等待
+        :param clock: a monotonic clock
+        '''
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.__tokens = float(burst)
+        self.__last = clock()
+        self.__lock = Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        '''
+        :param tokens:
+        :return: 需要等待的秒数, 0 表示可以马上执行
+        '''
+        with self.__lock:
+            now = self.clock()
+            self.__tokens = min(self.burst, self.__tokens + (now - self.__last) * self.rate)
+            self.__last = now
+            self.__tokens -= tokens
+            if self.__tokens >= 0:
+                return 0.0
+            return -self.__tokens / self.rate
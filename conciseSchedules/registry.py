@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : registry.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 22:00
+'''
+from types import MappingProxyType
+from threading import Lock, RLock
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Mapping, Set, Tuple
+
+
+class Task:
+    '''
+ 一个编译好的任务, 既是 registry 中的记录, 也是放进定时队列的对象.
+ spec 是编译后的规则, 每个时间字段一个 int bitmask, 规则相同的任务共用同一个 spec;
+ item 是任务配置, target, args, kwargs 等都只保存引用, 不复制.
+ 恢复暂停或者修改之后换一个新的 Task, 定时队列中的旧对象不再执行.
+ timer 是最近一次放进定时队列的 (timer, TimerHandle), 删除, 暂停或者替换时从定时队列中取消.
+    '''
+    __slots__ = ('task_id', 'kind', 'spec', 'item', 'tags', 'paused', 'next_fire', 'timer')
+
+    def __init__(self, kind: str, spec: tuple, item: dict, task_id: str = None, tags: Iterable[str] = ()):
+        '''
+        :param kind: 'crontab_tasks' or 'schedule_tasks'
+        :param spec: a CompiledSpec
+        :param item: the task dict
+        :param task_id: 注册时由 Schedules 分配
+        :param tags:
+        '''
+        self.task_id = task_id
+        self.kind = kind
+        self.spec = spec
+        self.item = item
+        self.tags = tuple(tags)
+        self.paused = False
+        self.next_fire = None
+        self.timer = None
+
+    def __repr__(self) -> str:
+        return 'Task(%r, %r, %r)' % (self.task_id, self.kind, self.spec)
+
+
+class TaskRegistry:
+    '''
+ 按任务 id 索引的任务表, 另外按标签和下一次启动时间所在的时间段 (bucket 秒) 建立索引.
+ 添加, 删除, 暂停, 恢复和查找都是 O(1), 按类型遍历时只返回没有暂停的任务.
+ 定时队列中的 Task 只有仍然是 registry 中有效的 Task 时才执行, 删除, 暂停或者替换时同时取消它的定时,
+ 不会在定时队列中越积越多.
+ 调度线程只读 view(kind): 每种任务一个不可变的 tuple. 修改时只把任务类型标记为已修改, 不重新打包,
+ 下一次读的时候才打包一次, 频繁添加删除任务时每个刻度最多打包一次. 没有修改时读的一方不加锁;
+ 有修改时和修改的一方用同一把锁, 不会看到修改了一半的任务表 (或者 batch 中修改了一部分的任务表).
+    '''
+
+    def __init__(self, kinds: Iterable[str], bucket: float = 60.0):
+        '''
+        :param kinds: ('crontab_tasks', 'schedule_tasks')
+        :param bucket: 下一次启动时间索引的时间段秒数
+        '''
+        self.bucket = bucket
+        self.__records = {}  # type: Dict[str, Task]
+        self.__active = {kind: OrderedDict() for kind in kinds}  # type: Dict[str, OrderedDict]
+        self.__tags = {}  # type: Dict[str, Set[str]]
+        self.__buckets = {}  # type: Dict[int, Set[str]]
+        self.__next_lock = Lock()
+        self.__lock = RLock()
+        self.__dirty = set()
+        self.__views = {kind: () for kind in self.__active}  # type: Dict[str, tuple]
+
+    def __len__(self) -> int:
+        return len(self.__records)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self.__records
+
+    def get(self, task_id: str) -> Task:
+        '''
+        :param task_id:
+        :return: the task, None if not found
+        '''
+        return self.__records.get(task_id)
+
+    def ids(self) -> List[str]:
+        return list(self.__records)
+
+    def kinds(self) -> List[str]:
+        return list(self.__active)
+
+    def entries(self, kind: str) -> List[Task]:
+        '''
+        :param kind: 'crontab_tasks' or 'schedule_tasks'
+        :return: 没有暂停的任务, 调度线程应该读 view(kind)
+        '''
+        return list(self.__active[kind].values())
+
+    @contextmanager
+    def batch(self):
+        '''
+        批量修改, 结束之前调度线程读到的仍然是修改之前的任务表
+        '''
+        with self.__lock:
+            yield self
+
+    def view(self, kind: str) -> tuple:
+        '''
+        :param kind: 'crontab_tasks' or 'schedule_tasks'
+        :return: 没有暂停的任务组成的 tuple, 上次读之后有修改时才重新打包
+        '''
+        if kind in self.__dirty:
+            with self.__lock:
+                if kind in self.__dirty:
+                    self.__views[kind] = tuple(self.__active[kind].values())
+                    self.__dirty.discard(kind)
+        return self.__views[kind]
+
+    @property
+    def snapshot(self) -> Mapping[str, tuple]:
+        '''
+        :return: {kind: view(kind)}
+        '''
+        return MappingProxyType({kind: self.view(kind) for kind in self.__active})
+
+    def publish(self) -> None:
+        '''马上把修改过的任务类型重新打包, 不需要调用, view 会在读的时候打包'''
+        for kind in list(self.__dirty):
+            self.view(kind)
+
+    def tasks(self, kind: str = None) -> List[Task]:
+        '''
+        :param kind: None for all kinds
+        :return: all tasks, including paused ones
+        '''
+        return [task for task in self.__records.values() if kind is None or task.kind == kind]
+
+    def live(self, task: Task) -> bool:
+        '''
+        :param task: 定时队列中的 Task
+        :return: True if it is still the active task of its id
+        '''
+        return not task.paused and self.__records.get(task.task_id) is task
+
+    def tagged(self, tag: str) -> Set[str]:
+        '''
+        :param tag:
+        :return: task ids with the tag
+        '''
+        return set(self.__tags.get(tag, ()))
+
+    def add(self, task: Task) -> Task:
+        '''
+        添加任务, id 已经存在时替换原来的任务
+        :param task: task.task_id 已经分配好
+        :return: the replaced task, None if the id is new
+        '''
+        task_id = task.task_id
+        with self.__lock:
+            old = self.remove(task_id)
+            self.__records[task_id] = task
+            for tag in task.tags:
+                self.__tags.setdefault(tag, set()).add(task_id)
+            self.__activate(task)
+        return old
+
+    def remove(self, task_id: str) -> Task:
+        '''
+        :param task_id:
+        :return: the removed task, None if not found
+        '''
+        with self.__lock:
+            task = self.__records.pop(task_id, None)
+            if task is None:
+                return None
+            self.__deactivate(task)
+            for tag in task.tags:
+                ids = self.__tags.get(tag)
+                if ids is not None:
+                    ids.discard(task_id)
+                    if not ids:
+                        del self.__tags[tag]
+        self.set_next(task, None)
+        self.cancel(task)
+        return task
+
+    def pause(self, task_id: str) -> Task:
+        '''
+        :param task_id:
+        :return: the task, None if not found
+        '''
+        with self.__lock:
+            task = self.__records.get(task_id)
+            if task is None or task.paused:
+                return task
+            self.__deactivate(task)
+            task.paused = True
+        self.set_next(task, None)
+        self.cancel(task)
+        return task
+
+    def resume(self, task_id: str) -> Task:
+        '''
+        恢复时换一个新的 Task 对象, 暂停之前放进定时队列的旧对象不会再执行
+        :param task_id:
+        :return: the new task, None if not found
+        '''
+        with self.__lock:
+            task = self.__records.get(task_id)
+            if task is not None and task.paused:
+                task = self.__records[task_id] = Task(task.kind, task.spec, task.item, task_id, task.tags)
+                self.__activate(task)
+        return task
+
+    @staticmethod
+    def cancel(task: Task) -> None:
+        '''
+        从定时队列中取消任务的下一次启动
+        :param task:
+        :return:
+        '''
+        timer = task.timer
+        if timer is not None:
+            task.timer = None
+            timer[0].cancel(timer[1])
+
+    def __activate(self, task: Task) -> None:
+        if task.paused:
+            return
+        self.__active[task.kind][task.task_id] = task
+        self.__dirty.add(task.kind)
+
+    def __deactivate(self, task: Task) -> None:
+        if task.paused:
+            return
+        self.__active[task.kind].pop(task.task_id, None)
+        self.__dirty.add(task.kind)
+
+    def set_next(self, task: Task, next_fire: float) -> None:
+        '''
+        更新下一次启动时间的索引, 调度线程也会调用, 所以这个索引单独加锁
+        :param task:
+        :param next_fire: a time.time() timestamp, None to drop it from the index
+        :return:
+        '''
+        with self.__next_lock:
+            if task.next_fire is not None:
+                key = int(task.next_fire // self.bucket)
+                ids = self.__buckets.get(key)
+                if ids is not None:
+                    ids.discard(task.task_id)
+                    if not ids:
+                        del self.__buckets[key]
+            task.next_fire = next_fire
+            if next_fire is not None:
+                self.__buckets.setdefault(int(next_fire // self.bucket), set()).add(task.task_id)
+
+    def due_between(self, start: float, end: float) -> List[Tuple[float, str]]:
+        '''
+        :param start: a time.time() timestamp
+        :param end:
+        :return: 下一次启动时间在 [start, end) 之间的 [(next_fire, task_id), ...], 按时间排序
+        '''
+        result = []
+        with self.__next_lock:
+            for key in range(int(start // self.bucket), int(end // self.bucket) + 1):
+                for task_id in self.__buckets.get(key, ()):
+                    task = self.__records.get(task_id)
+                    if task is not None and task.next_fire is not None and start <= task.next_fire < end:
+                        result.append((task.next_fire, task_id))
+        result.sort()
+        return result
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__records.clear()
+            for kind, active in self.__active.items():
+                active.clear()
+                self.__dirty.add(kind)
+            self.__tags.clear()
+        with self.__next_lock:
+            self.__buckets.clear()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : store.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 19:00
+'''
+import sys
+import json
+import hashlib
+import importlib
+from functools import lru_cache
+from traceback import format_exc
+from threading import Thread, Lock, Condition
+from typing import Callable, Dict, List, Tuple
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    task TEXT NOT NULL,
+    second INTEGER,
+    minute INTEGER,
+    hour INTEGER,
+    day INTEGER,
+    month INTEGER,
+    weekday INTEGER,
+    last_fire REAL,
+    next_fire REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_next_fire ON tasks (next_fire);
+'''
+
+
+def target_path(target: Callable) -> str:
+    '''
+    :param target: a module level function or class
+    :return: 'module:qualname', None if the target can not be imported back
+    '''
+    module = getattr(target, '__module__', None)
+    qualname = getattr(target, '__qualname__', None)
+    if not module or not qualname or '<' in qualname or module == '__main__' or module not in sys.modules:
+        return None
+    return '%s:%s' % (module, qualname)
+
+
+@lru_cache(maxsize=None)
+def resolve_target(path: str) -> Callable:
+    '''
+    :param path: 'module:qualname'
+    :return: the imported object
+    '''
+    module, qualname = path.split(':', 1)
+    obj = importlib.import_module(module)
+    for name in qualname.split('.'):
+        obj = getattr(obj, name)
+    return obj
+
+
+class SQLiteJobStore:
+    '''
+ 本地 SQLite (WAL 模式) 的任务存储: 任务定义 (target 保存为 import 路径), 编译后的 bitmask, 上一次和下一次的启动时间.
+ 每次启动后的时间更新先放在内存中, 由后台线程每 flush_interval 秒或者攒够 batch_size 条时在一个事务中批量写入.
+ 写入失败 (例如数据库被其他进程锁住) 时这一批更新放回内存, 下一次再写, 错误交给 on_error.
+ load 不解析任何语法, 也不计算下一次启动时间, 可以按下一次启动时间分批读取.
+    '''
+
+    def __init__(
+            self, path: str, batch_size: int = 500, flush_interval: float = 1.0, on_error: Callable = None
+    ):
+        '''
+        :param path: the sqlite database file
+        :param batch_size: 攒够这么多条更新时立即写入
+        :param flush_interval: 最长多少秒写入一次, 写入失败之后也是隔这么久重试
+        :param on_error: on_error(traceback), 后台线程写入失败时调用, 默认写到 stderr.
+         set_store 时没有设置的话改为写入 scheduler 的日志
+        '''
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_error = on_error
+        import sqlite3
+        self.__conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__conn.execute('PRAGMA journal_mode=WAL')
+        self.__conn.execute('PRAGMA synchronous=NORMAL')
+        self.__conn.executescript(SCHEMA)
+        self.__pending = {}  # type: Dict[str, list]
+        self.__lock = Lock()
+        self.__db_lock = Lock()
+        self.__cond = Condition(self.__lock)
+        self.__thread = None
+        self.__closed = False
+
+    @staticmethod
+    def dump(item: dict) -> str:
+        '''
+        :param item: the task dict
+        :return: json text, None if the task can not be persisted
+        '''
+        task = dict(item)
+        target = task.get('target')
+        if target is not None and not isinstance(target, str):
+            task['target'] = target_path(target)
+            if task['target'] is None:
+                return None
+        try:
+            return json.dumps(task, sort_keys=True, separators=(',', ':'))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def task_id(kind: str, item: dict, text: str = None) -> str:
+        '''
+        任务配置里的 'id', 没有时用任务内容的哈希值, 同样的配置重启之后得到同样的 id
+        :param kind: 'crontab_tasks' or 'schedule_tasks'
+        :param item:
+        :param text: dump(item) 的结果
+        :return:
+        '''
+        if item.get('id'):
+            return str(item['id'])
+        if text is None:
+            text = SQLiteJobStore.dump(item) or repr(sorted(item.items(), key=lambda kv: kv[0]))
+        return hashlib.sha1(('%s\n%s' % (kind, text)).encode('utf-8')).hexdigest()[:16]
+
+    def __execute(self, sql: str, rows: list = None) -> None:
+        with self.__db_lock:
+            conn = self.__conn
+            conn.execute('BEGIN')
+            try:
+                if rows is None:
+                    conn.execute(sql)
+                else:
+                    conn.executemany(sql, rows)
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def save(self, tasks: List[Tuple[str, str, dict, tuple]]) -> None:
+        '''
+        新增或更新任务定义, 已有的启动时间保持不变
+        :param tasks: [(task_id, kind, item, spec), ...], spec is a CompiledSpec
+        :return:
+        '''
+        rows = []
+        for task_id, kind, item, spec in tasks:
+            text = self.dump(item)
+            if text is not None:
+                rows.append((task_id, kind, text) + tuple(spec))
+        if not rows:
+            return
+        with self.__db_lock:
+            conn = self.__conn
+            conn.execute('BEGIN')
+            try:
+                conn.executemany(
+                    'UPDATE tasks SET kind=?2, task=?3, second=?4, minute=?5, hour=?6, day=?7, month=?8, weekday=?9 '
+                    'WHERE id=?1', rows
+                )
+                conn.executemany(
+                    'INSERT OR IGNORE INTO tasks (id, kind, task, second, minute, hour, day, month, weekday) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows
+                )
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def delete(self, task_ids: List[str]) -> None:
+        '''
+        :param task_ids:
+        :return:
+        '''
+        with self.__lock:
+            for task_id in task_ids:
+                self.__pending.pop(task_id, None)
+        self.__execute('DELETE FROM tasks WHERE id=?', [(task_id,) for task_id in task_ids])
+
+    def ids(self) -> List[str]:
+        '''
+        :return: all task ids in the store
+        '''
+        with self.__db_lock:
+            return [row[0] for row in self.__conn.execute('SELECT id FROM tasks')]
+
+    def load(self, before: float = None, after: float = None) -> List[Tuple[str, str, dict, tuple, float, float]]:
+        '''
+        读取任务, target 仍然是 import 路径的字符串, 第一次执行时才 import
+        :param before: 只读取下一次启动时间在这之前 (或者还没有记录) 的任务
+        :param after: 只读取下一次启动时间在这之后的任务
+        :return: [(task_id, kind, item, masks, last_fire, next_fire), ...]
+        '''
+        self.flush()
+        sql = 'SELECT id, kind, task, second, minute, hour, day, month, weekday, last_fire, next_fire FROM tasks'
+        params = ()
+        if before is not None:
+            sql += ' WHERE next_fire IS NULL OR next_fire <= ?'
+            params = (before,)
+        elif after is not None:
+            sql += ' WHERE next_fire > ?'
+            params = (after,)
+        with self.__db_lock:
+            rows = self.__conn.execute(sql, params).fetchall()
+        # config 只在这里用到, 不要让 import conciseSchedules 时就加载它
+        from .config import restore_tuples
+        loads = json.loads
+        result = []
+        for row in rows:
+            result.append((row[0], row[1], restore_tuples(loads(row[2])), row[3:9], row[9], row[10]))
+        return result
+
+    def record(self, task_id: str, last_fire: float = None, next_fire: float = None) -> None:
+        '''
+        记录一次启动或者新的下一次启动时间, 不会阻塞, 由后台线程批量写入
+        :param task_id:
+        :param last_fire: None 表示不变
+        :param next_fire: None 表示不变
+        :return:
+        '''
+        with self.__lock:
+            pending = self.__pending.get(task_id)
+            if pending is None:
+                self.__pending[task_id] = [last_fire, next_fire]
+            else:
+                if last_fire is not None:
+                    pending[0] = last_fire
+                if next_fire is not None:
+                    pending[1] = next_fire
+            if self.__thread is None and not self.__closed:
+                self.__thread = Thread(target=self.__loop, name='conciseSchedules_store', daemon=True)
+                self.__thread.start()
+            if len(self.__pending) >= self.batch_size:
+                self.__cond.notify()
+
+    def flush(self) -> None:
+        '''把内存中的更新立即写入, 失败时放回内存并抛出异常'''
+        with self.__lock:
+            pending, self.__pending = self.__pending, {}
+        if not pending:
+            return
+        rows = [(last_fire, next_fire, task_id) for task_id, (last_fire, next_fire) in pending.items()]
+        try:
+            self.__execute(
+                'UPDATE tasks SET last_fire=COALESCE(?, last_fire), next_fire=COALESCE(?, next_fire) WHERE id=?', rows
+            )
+        except Exception:
+            self.__requeue(pending)
+            raise
+
+    def __requeue(self, pending: Dict[str, list]) -> None:
+        '''
+        把没有写入的一批更新放回内存, 写入期间又记录了新值的字段保留新值
+        :param pending: {task_id: [last_fire, next_fire]}
+        :return:
+        '''
+        with self.__lock:
+            current = self.__pending
+            for task_id, values in pending.items():
+                newer = current.get(task_id)
+                if newer is None:
+                    current[task_id] = values
+                else:
+                    for i in (0, 1):
+                        if newer[i] is None:
+                            newer[i] = values[i]
+
+    def __loop(self) -> None:
+        import sqlite3
+        failed = False
+        while 1:
+            with self.__lock:
+                if self.__closed:
+                    return
+                if failed or len(self.__pending) < self.batch_size:
+                    self.__cond.wait(self.flush_interval)
+            try:
+                self.flush()
+                failed = False
+            except sqlite3.Error:
+                # 这一批已经放回内存, 隔 flush_interval 秒再重试
+                failed = True
+                on_error = self.on_error
+                if on_error is None:
+                    sys.stderr.write('conciseSchedules: store flush failed\n%s' % format_exc())
+                else:
+                    on_error(format_exc())
+
+    def close(self) -> None:
+        '''写入剩余的更新并关闭数据库'''
+        with self.__lock:
+            self.__closed = True
+            self.__cond.notify()
+        try:
+            self.flush()
+        finally:
+            with self.__db_lock:
+                self.__conn.close()
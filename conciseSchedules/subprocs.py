@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : subprocs.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 14:00
+'''
+import os
+import time
+import selectors
+from collections import deque
+from threading import Thread, Lock, Condition, Event
+from typing import Callable, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from subprocess import Popen
+
+
+class ProcessRecord:
+    '''
+ Supervisor 启动的一个子进程的记录: 启动/结束时间, 退出码, 以及 stdout/stderr 最后若干行.
+    '''
+    __slots__ = ('key', 'args', 'pid', 'process', 'started', 'finished', 'returncode',
+                 'stdout', 'stderr', 'pidfd', 'registered', '_partial')
+
+    def __init__(self, key: str, process: 'Popen', output_lines: int):
+        self.key = key
+        self.args = process.args
+        self.pid = process.pid
+        self.process = process
+        self.started = time.time()
+        self.finished = None
+        self.returncode = None
+        self.stdout = deque(maxlen=output_lines)
+        self.stderr = deque(maxlen=output_lines)
+        self.pidfd = None
+        self.registered = False
+        self._partial = {'stdout': b'', 'stderr': b''}
+
+    @property
+    def duration(self) -> float:
+        '''运行时间, 单位秒, 还没结束时是到现在为止的时间'''
+        return (self.finished or time.time()) - self.started
+
+
+def print_output(record: ProcessRecord, stream: str, line: str) -> None:
+    '''默认的输出处理: 带上进程号打印到 scheduler 的标准输出'''
+    print('[%s %s]' % (record.pid, stream), line)
+
+
+class Supervisor:
+    '''
+ shell 任务的子进程管理器.
+ 子进程的 stdout/stderr 不再继承 scheduler 的管道, 而是读进每个进程自己的环形缓冲区 (最多 output_lines 行),
+ 并逐行交给 sink(record, stream, line) 处理.
+ 后台线程用 selectors 监听输出管道和 pidfd (Linux 3.9+), 子进程退出后立即非阻塞地回收, 不会留下僵尸进程;
+ 没有 pidfd 的平台上, 以及不读取输出 (capture 为 False, 例如 Windows) 时每 poll_interval 秒检查一次.
+ max_children 是全局的并发子进程上限, spawn 的 max_instances 是同一个 key 的并发上限, 0 表示不限制.
+ on_exit(record) 在每个子进程退出时调用, 可以用来记录退出码和运行时间.
+    '''
+
+    def __init__(
+            self,
+            max_children: int = 0,
+            output_lines: int = 100,
+            sink: Callable[[ProcessRecord, str, str], None] = print_output,
+            on_exit: Callable[[ProcessRecord], None] = None,
+            history: int = 1000,
+            poll_interval: float = 0.2
+    ):
+        self.max_children = max_children
+        self.output_lines = output_lines
+        self.sink = sink
+        self.on_exit = on_exit
+        self.poll_interval = poll_interval
+        self.running = {}  # type: Dict[int, ProcessRecord]
+        self.finished = deque(maxlen=history)
+        self.capture = os.name != 'nt'
+        self.__per_key = {}
+        self.__lock = Lock()
+        self.__idle = Condition(self.__lock)
+        self.__pending = []
+        self.__thread = None
+        self.__selector = None
+        self.__wake_r = self.__wake_w = None
+        self.__event = Event()
+        self.__use_pidfd = hasattr(os, 'pidfd_open')
+
+    def count(self, key: str = None) -> int:
+        '''
+        :param key: None 表示全部
+        :return: 正在运行的子进程数
+        '''
+        if key is None:
+            return len(self.running)
+        return self.__per_key.get(key, 0)
+
+    def join(self, timeout: float = None) -> bool:
+        '''
+        等待所有子进程退出并被回收
+        :param timeout: None 表示一直等待
+        :return: True if no child is running
+        '''
+        with self.__lock:
+            return self.__idle.wait_for(lambda: not self.running, timeout)
+
+    def spawn(self, key: str, shell: str, max_instances: int = 0) -> ProcessRecord:
+        '''
+        :param key: 任务的标识, 用于 max_instances 计数
+        :param shell:
+        :param max_instances: 同一个 key 的并发上限, 0 表示不限制
+        :return: ProcessRecord, or None if the concurrency limit is reached
+        '''
+        from subprocess import Popen, PIPE, DEVNULL
+        with self.__lock:
+            if self.max_children and len(self.running) >= self.max_children:
+                return None
+            if max_instances and self.__per_key.get(key, 0) >= max_instances:
+                return None
+            if self.capture:
+                p = Popen(shell, shell=True, stdin=DEVNULL, stdout=PIPE, stderr=PIPE, close_fds=True)
+            else:
+                p = Popen(shell, shell=True)
+            record = ProcessRecord(key, p, self.output_lines)
+            self.running[p.pid] = record
+            self.__per_key[key] = self.__per_key.get(key, 0) + 1
+            self.__pending.append(record)
+            self.__ensure_thread()
+        self.__wake()
+        return record
+
+    def __ensure_thread(self) -> None:
+        if self.__thread is not None:
+            return
+        self.__selector = selectors.DefaultSelector()
+        if self.capture:
+            self.__wake_r, self.__wake_w = os.pipe()
+            os.set_blocking(self.__wake_r, False)
+            self.__selector.register(self.__wake_r, selectors.EVENT_READ, None)
+        self.__thread = Thread(target=self.__loop, name='conciseSchedules_supervisor', daemon=True)
+        self.__thread.start()
+
+    def __wake(self) -> None:
+        if self.__wake_w is None:
+            self.__event.set()
+            return
+        try:
+            os.write(self.__wake_w, b'x')
+        except OSError:
+            pass
+
+    def __register(self, record: ProcessRecord) -> None:
+        p = record.process
+        selector = self.__selector
+        for name in ('stdout', 'stderr'):
+            stream = getattr(p, name)
+            if stream is not None:
+                os.set_blocking(stream.fileno(), False)
+                selector.register(stream, selectors.EVENT_READ, (record, name))
+        if self.__use_pidfd and self.capture:
+            try:
+                record.pidfd = os.pidfd_open(record.pid)
+                selector.register(record.pidfd, selectors.EVENT_READ, (record, None))
+            except OSError:
+                record.pidfd = None
+        record.registered = True
+
+    def __read(self, record: ProcessRecord, name: str, final: bool = False) -> None:
+        stream = getattr(record.process, name)
+        if stream is None or stream.closed:
+            return
+        chunks = []
+        while 1:
+            try:
+                data = os.read(stream.fileno(), 65536)
+            except BlockingIOError:
+                break
+            if not data:
+                final = True
+                break
+            chunks.append(data)
+            if not final:
+                break
+        data = record._partial[name] + b''.join(chunks)
+        lines = data.split(b'\n')
+        if final:
+            record._partial[name] = b''
+            if not lines[-1]:
+                lines.pop()
+            self.__selector.unregister(stream)
+            stream.close()
+        else:
+            record._partial[name] = lines.pop()
+        buffer = getattr(record, name)
+        for line in lines:
+            text = line.decode('utf-8', 'replace')
+            buffer.append(text)
+            if self.sink is not None:
+                try:
+                    self.sink(record, name, text)
+                except Exception:
+                    pass
+
+    def __reap(self, record: ProcessRecord) -> None:
+        if record.finished is not None:
+            return
+        returncode = record.process.poll()
+        if returncode is None:
+            return
+        record.returncode = returncode
+        record.finished = time.time()
+        if record.pidfd is not None:
+            self.__selector.unregister(record.pidfd)
+            os.close(record.pidfd)
+            record.pidfd = None
+        # 子进程已经退出, 读完剩下的输出; 如果管道还被孙进程持有, 也不再等待
+        for name in ('stdout', 'stderr'):
+            self.__read(record, name, final=True)
+        with self.__lock:
+            self.running.pop(record.pid, None)
+            left = self.__per_key.get(record.key, 1) - 1
+            if left:
+                self.__per_key[record.key] = left
+            else:
+                self.__per_key.pop(record.key, None)
+        self.finished.append(record)
+        if self.on_exit is not None:
+            try:
+                self.on_exit(record)
+            except Exception:
+                pass
+        with self.__lock:
+            if not self.running:
+                self.__idle.notify_all()
+
+    def __loop(self) -> None:
+        selector = self.__selector
+        while 1:
+            with self.__lock:
+                pending, self.__pending = self.__pending, []
+            for record in pending:
+                self.__register(record)
+            polling = [r for r in list(self.running.values()) if r.registered and r.pidfd is None]
+            timeout = self.poll_interval if polling else None
+            if self.capture:
+                events = selector.select(timeout)
+            else:
+                # 没有要监听的管道, 等新的子进程或者到了检查的时间
+                self.__event.wait(timeout)
+                self.__event.clear()
+                events = []
+            for key, mask in events:
+                if key.data is None:
+                    try:
+                        os.read(self.__wake_r, 4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                record, name = key.data
+                if name is None:
+                    self.__reap(record)
+                else:
+                    self.__read(record, name)
+            for record in polling:
+                self.__reap(record)
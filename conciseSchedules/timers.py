@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : timers.py
+@Author: ChenXinqun
+@Date  : 2026/10/18 09:00
+'''
+import math
+import time
+import heapq
+from itertools import count
+from threading import Condition, Lock, get_ident
+from typing import Any, Callable, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class TimerHandle:
+    '''
+ push 返回的句柄, 用来 cancel 已经放进定时队列的任务.
+ slot 是它在定时队列中的位置 (堆中的 entry 或者时间轮的格子), 到期出队之后为 None.
+    '''
+    __slots__ = ('deadline', 'item', 'slot', 'cancelled')
+
+    def __init__(self, deadline: float, item: Any):
+        self.deadline = deadline
+        self.item = item
+        self.slot = None
+        self.cancelled = False
+
+
+class TimerHeap:
+    '''
+ 最小堆定时队列, 按到期时间 (time.time() 时间戳) 排序.
+ 调度线程在 pop_due 中一直睡到最早的到期时间, push 了更早的到期时间或者调用 wake 时会被提前唤醒.
+ 唤醒次数只和实际到期的任务数量有关, 和注册的任务总数无关.
+ cancel 只做标记, 被标记的任务在出堆时丢弃; 被标记的超过一半时整体重建一次, 频繁删除和修改任务时堆不会越积越大.
+    '''
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.__heap = []
+        self.__seq = count()
+        self.__cond = Condition()
+        self.__cancelled = 0
+
+    def __len__(self) -> int:
+        return len(self.__heap) - self.__cancelled
+
+    def push(self, deadline: float, item: Any) -> TimerHandle:
+        '''
+
+        :param deadline: a time.time() timestamp
+        :param item:
+        :return:
+        '''
+        handle = TimerHandle(deadline, item)
+        with self.__cond:
+            entry = handle.slot = (deadline, next(self.__seq), handle)
+            heapq.heappush(self.__heap, entry)
+            if self.__heap[0] is entry:
+                self.__cond.notify_all()
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> None:
+        '''
+        :param handle:
+        :return:
+        '''
+        with self.__cond:
+            if handle.cancelled:
+                return
+            handle.cancelled = True
+            if handle.slot is None:
+                # 已经出堆了
+                return
+            self.__cancelled += 1
+            heap = self.__heap
+            if self.__cancelled > 64 and self.__cancelled * 2 > len(heap):
+                self.__heap = [entry for entry in heap if not entry[2].cancelled]
+                heapq.heapify(self.__heap)
+                for entry in heap:
+                    if entry[2].cancelled:
+                        entry[2].slot = None
+                self.__cancelled = 0
+
+    def __pop(self) -> TimerHandle:
+        handle = heapq.heappop(self.__heap)[2]
+        handle.slot = None
+        if handle.cancelled:
+            self.__cancelled -= 1
+        return handle
+
+    def clear(self) -> None:
+        '''
+        :return:
+        '''
+        with self.__cond:
+            for entry in self.__heap:
+                entry[2].slot = None
+            self.__heap = []
+            self.__cancelled = 0
+            self.__cond.notify_all()
+
+    def wake(self) -> None:
+        '''唤醒正在 pop_due 中等待的线程, 让它重新检查是否需要退出'''
+        with self.__cond:
+            self.__cond.notify_all()
+
+    def pop_due(self, stopped: Callable[[], bool]) -> List[Tuple[float, Any]]:
+        '''
+        阻塞直到至少有一个任务到期, 返回所有已到期的 (deadline, item)
+        :param stopped: 返回 True 时立即返回空列表
+        :return:
+        '''
+        with self.__cond:
+            while not stopped():
+                heap = self.__heap
+                while heap and heap[0][2].cancelled:
+                    self.__pop()
+                if not heap:
+                    self.__cond.wait()
+                    continue
+                delay = heap[0][0] - self.clock()
+                if delay > 0:
+                    self.__cond.wait(delay)
+                    continue
+                now = self.clock()
+                due = []
+                while heap and heap[0][0] <= now:
+                    handle = self.__pop()
+                    if not handle.cancelled:
+                        due.append((handle.deadline, handle.item))
+                return due
+            return []
+
+
+class TimingWheel:
+    '''
+ 分层时间轮定时队列, 时间刻度为1秒, 共四层: 秒(60格), 分(60格), 时(24格), 天(days格).
+ 超过 days 天的任务先放在 overflow 中, 每天重新分配一次.
+ push, cancel 和每个刻度的到期处理都是 O(1) (不计到期任务本身), 适合十万级别以上的任务数量.
+ 每一秒推进一个刻度, 高层的格子到点时把其中的任务重新插入到低层.
+    '''
+
+    def __init__(self, clock: Callable[[], float] = time.time, days: int = 366):
+        self.clock = clock
+        self.days = days
+        self.__spans = (1, 60, 3600, 86400)
+        self.__sizes = (60, 60, 24, days)
+        self.__cond = Condition()
+        self.__reset()
+
+    def __reset(self) -> None:
+        self.__wheels = [[set() for _ in range(size)] for size in self.__sizes]
+        self.__overflow = set()
+        self.__ready = []
+        self.__count = 0
+        self.__current = int(self.clock())
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __place(self, handle: TimerHandle) -> None:
+        '''按到期刻度和当前刻度的距离, 把 handle 放进对应层的格子'''
+        tick = int(math.ceil(handle.deadline))
+        delta = tick - self.__current
+        if delta <= 0:
+            handle.slot = None
+            self.__ready.append(handle)
+            return
+        for level, span in enumerate(self.__spans):
+            size = self.__sizes[level]
+            if delta < span * size:
+                slot = self.__wheels[level][(tick // span) % size]
+                break
+        else:
+            slot = self.__overflow
+        handle.slot = slot
+        slot.add(handle)
+
+    def __cascade(self, slot: set) -> None:
+        if not slot:
+            return
+        handles = list(slot)
+        slot.clear()
+        for handle in handles:
+            self.__place(handle)
+
+    def __advance(self) -> None:
+        '''推进一个刻度, 到期的任务放进 ready'''
+        self.__current += 1
+        current = self.__current
+        if current % 86400 == 0:
+            self.__cascade(self.__overflow)
+            self.__cascade(self.__wheels[3][(current // 86400) % self.days])
+        if current % 3600 == 0:
+            self.__cascade(self.__wheels[2][(current // 3600) % 24])
+        if current % 60 == 0:
+            self.__cascade(self.__wheels[1][(current // 60) % 60])
+        slot = self.__wheels[0][current % 60]
+        if slot:
+            for handle in slot:
+                handle.slot = None
+            self.__ready.extend(slot)
+            slot.clear()
+
+    def push(self, deadline: float, item: Any) -> TimerHandle:
+        '''
+
+        :param deadline: a time.time() timestamp
+        :param item:
+        :return:
+        '''
+        handle = TimerHandle(deadline, item)
+        with self.__cond:
+            self.__place(handle)
+            self.__count += 1
+            if handle.slot is None:
+                self.__cond.notify_all()
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> None:
+        '''
+        :param handle:
+        :return:
+        '''
+        with self.__cond:
+            if handle.cancelled:
+                return
+            handle.cancelled = True
+            if handle.slot is not None:
+                handle.slot.discard(handle)
+                handle.slot = None
+                self.__count -= 1
+
+    def clear(self) -> None:
+        '''
+        :return:
+        '''
+        with self.__cond:
+            self.__reset()
+            self.__cond.notify_all()
+
+    def wake(self) -> None:
+        '''唤醒正在 pop_due 中等待的线程, 让它重新检查是否需要退出'''
+        with self.__cond:
+            self.__cond.notify_all()
+
+    def pop_due(self, stopped: Callable[[], bool]) -> List[Tuple[float, Any]]:
+        '''
+        阻塞直到至少有一个任务到期, 返回所有已到期的 (deadline, item)
+        :param stopped: 返回 True 时立即返回空列表
+        :return:
+        '''
+        with self.__cond:
+            while not stopped():
+                now = int(self.clock())
+                while self.__current < now:
+                    self.__advance()
+                if self.__ready:
+                    ready = self.__ready
+                    self.__ready = []
+                    self.__count -= len(ready)
+                    due = [(handle.deadline, handle.item) for handle in ready if not handle.cancelled]
+                    if due:
+                        return due
+                    continue
+                self.__cond.wait(self.__current + 1 - self.clock())
+            return []
+
+
+class AsyncTimerHeap:
+    '''
+ 给 asyncio 用的最小堆定时队列, 接口和 TimerHeap 一样, 只是 pop_due 是协程.
+ push/cancel/wake 可以在任意线程调用, 不在事件循环线程时通过 call_soon_threadsafe 唤醒.
+ asyncio 在创建时才导入, 只使用线程方式的进程不需要导入它.
+    '''
+
+    def __init__(self, loop: 'asyncio.AbstractEventLoop', clock: Callable[[], float] = time.time):
+        import asyncio
+        self.clock = clock
+        self.loop = loop
+        self.__heap = []
+        self.__seq = count()
+        self.__lock = Lock()
+        self.__event = asyncio.Event()
+        self.__thread = get_ident()
+        self.__cancelled = 0
+
+    def __len__(self) -> int:
+        return len(self.__heap) - self.__cancelled
+
+    def __notify(self) -> None:
+        if get_ident() == self.__thread:
+            self.__event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.__event.set)
+
+    def push(self, deadline: float, item: Any) -> TimerHandle:
+        '''
+
+        :param deadline: a time.time() timestamp
+        :param item:
+        :return:
+        '''
+        handle = TimerHandle(deadline, item)
+        with self.__lock:
+            entry = handle.slot = (deadline, next(self.__seq), handle)
+            heapq.heappush(self.__heap, entry)
+            earliest = self.__heap[0] is entry
+        if earliest:
+            self.__notify()
+        return handle
+
+    def cancel(self, handle: TimerHandle) -> None:
+        '''
+        :param handle:
+        :return:
+        '''
+        with self.__lock:
+            if handle.cancelled:
+                return
+            handle.cancelled = True
+            if handle.slot is None:
+                return
+            self.__cancelled += 1
+            heap = self.__heap
+            if self.__cancelled > 64 and self.__cancelled * 2 > len(heap):
+                self.__heap = [entry for entry in heap if not entry[2].cancelled]
+                heapq.heapify(self.__heap)
+                for entry in heap:
+                    if entry[2].cancelled:
+                        entry[2].slot = None
+                self.__cancelled = 0
+
+    def __pop(self) -> TimerHandle:
+        handle = heapq.heappop(self.__heap)[2]
+        handle.slot = None
+        if handle.cancelled:
+            self.__cancelled -= 1
+        return handle
+
+    def clear(self) -> None:
+        '''
+        :return:
+        '''
+        with self.__lock:
+            for entry in self.__heap:
+                entry[2].slot = None
+            self.__heap = []
+            self.__cancelled = 0
+        self.__notify()
+
+    def wake(self) -> None:
+        '''唤醒正在 pop_due 中等待的协程, 让它重新检查是否需要退出'''
+        self.__notify()
+
+    async def pop_due(self, stopped: Callable[[], bool]) -> List[Tuple[float, Any]]:
+        '''
+        等待直到至少有一个任务到期, 返回所有已到期的 (deadline, item)
+        :param stopped: 返回 True 时立即返回空列表
+        :return:
+        '''
+        import asyncio
+        while not stopped():
+            with self.__lock:
+                heap = self.__heap
+                while heap and heap[0][2].cancelled:
+                    self.__pop()
+                delay = heap[0][0] - self.clock() if heap else None
+                if delay is not None and delay <= 0:
+                    now = self.clock()
+                    due = []
+                    while heap and heap[0][0] <= now:
+                        handle = self.__pop()
+                        if not handle.cancelled:
+                            due.append((handle.deadline, handle.item))
+                    return due
+            try:
+                await asyncio.wait_for(self.__event.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self.__event.clear()
+        return []
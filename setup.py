@@ -32,6 +32,12 @@ install_requires = [
     'tzlocal',
 ]
 
+extras_require = {
+    'numpy': ['numpy'],
+    'yaml': ['pyyaml'],
+    'bench': ['pytest', 'pytest-benchmark'],
+}
+
 args = dict(
     long_description=read('README.md'),
     long_description_content_type='text/markdown',
@@ -62,6 +68,10 @@ args = dict(
     packages=find_packages(exclude=["*.tests", "*.tests.*", "tests.*", "tests"]),
     python_requires='>=3.5.0',
     install_requires=install_requires,
+    extras_require=extras_require,
+    entry_points={
+        'console_scripts': ['conciseSchedules = conciseSchedules.cli:main'],
+    },
     include_package_data=True,
 )
 
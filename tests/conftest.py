@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : conftest.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+功能测试, 只依赖 pytest:
+    pip install pytest
+    pytest              # setup.cfg 中 testpaths 只包含 tests, benchmarks 需要单独运行
+调度线程使用由测试代码推进的假时钟, 不需要真的等到任务的启动时间.
+'''
+import pytest
+from conciseSchedules import Schedules
+from helpers import FakeClock, Loop, make_scheduler
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def events() -> list:
+    return []
+
+
+@pytest.fixture
+def scheduler(clock, events) -> Schedules:
+    return make_scheduler(clock, events)
+
+
+@pytest.fixture
+def loop(scheduler, clock):
+    '''
+    返回一个函数 loop(backend), 在后台启动 run_loop, 测试结束时自动停止
+    '''
+    loops = []
+
+    def factory(backend: str = 'heap') -> Loop:
+        run = Loop(scheduler, clock, backend).start()
+        loops.append(run)
+        return run
+
+    yield factory
+    for run in loops:
+        run.stop()
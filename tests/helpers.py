@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : helpers.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+功能测试共用的假时钟和后台调度线程. 不放在 conftest.py 中, 因为 benchmarks 目录也有 conftest.py,
+两个目录一起运行时 "from conftest import" 会导入到另一个.
+'''
+import time
+from threading import Thread, Lock
+from typing import Callable
+
+from conciseSchedules import Schedules
+from conciseSchedules.clock import Clock
+
+# 2026-01-05 00:00:00 UTC, 一个周一的零点
+EPOCH = 1767571200.0
+
+
+class FakeClock:
+    '''
+ 由测试代码推进的时钟, 同时作为 Clock 的 wall 和 monotonic 使用.
+    '''
+
+    def __init__(self, now: float = EPOCH):
+        self.now = now
+        self.__lock = Lock()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> float:
+        with self.__lock:
+            self.now += seconds
+            return self.now
+
+
+def wait_until(predicate: Callable[[], bool], timeout: float = 5.0) -> bool:
+    '''
+    :param predicate:
+    :param timeout: 真实时间的秒数
+    :return: predicate 最后一次的结果
+    '''
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.001)
+    return predicate()
+
+
+class Loop:
+    '''
+ 在后台线程中以假时钟运行 run_loop, advance 推进时钟并唤醒调度线程.
+    '''
+
+    def __init__(self, scheduler: Schedules, clock: FakeClock, backend: str):
+        self.scheduler = scheduler
+        self.clock = clock
+        self.backend = backend
+        self.thread = Thread(target=scheduler.run_loop, args=(backend,), daemon=True)
+
+    def wake(self) -> None:
+        scheduler = self.scheduler
+        for ticker in list(scheduler._Schedules__tickers):
+            ticker.wake()
+        scheduler._Schedules__timer.wake()
+        scheduler._Schedules__fast_timer.wake()
+
+    def advance(self, seconds: float = 1, step: float = 1) -> None:
+        '''
+        按 step 一步一步推进, 每一步都唤醒调度线程
+        :param seconds:
+        :param step:
+        :return:
+        '''
+        n = int(round(seconds / step))
+        for _ in range(n):
+            self.clock.advance(step)
+            self.wake()
+            time.sleep(0.005)
+
+    def start(self) -> 'Loop':
+        self.thread.start()
+        scheduler = self.scheduler
+        if self.backend == 'poll':
+            wait_until(lambda: len(scheduler._Schedules__tickers) == 2)
+        else:
+            wait_until(lambda: scheduler._Schedules__timer_active)
+        wait_until(lambda: scheduler._Schedules__fast_active)
+        time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        # 先停止调度线程, 再关闭线程池, 否则调度线程会向已经关闭的线程池提交任务
+        self.scheduler.stop()
+        self.thread.join()
+        if self.scheduler.pool is not None:
+            self.scheduler.pool.shutdown(wait=True)
+
+
+def make_scheduler(clock: FakeClock = None, events: list = None) -> Schedules:
+    '''
+    :param clock: 默认使用真实的时钟
+    :param events: 日志事件追加到这个 list 中, 默认丢弃
+    :return:
+    '''
+    scheduler = Schedules()
+    scheduler.set_timezone('UTC')
+    scheduler.set_log(sink=events.append if events is not None else (lambda event: None))
+    if clock is not None:
+        scheduler.clock = Clock(clock, clock)
+    return scheduler
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_clock.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+时区查找: zoneinfo 找不到时退回到 pytz; 没有 pytz 时的时区列表.
+'''
+import sys
+import types
+import pytest
+from conciseSchedules.clock import get_timezone
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    get_timezone.cache_clear()
+    yield
+    get_timezone.cache_clear()
+
+
+def test_zoneinfo():
+    assert str(get_timezone('Asia/Shanghai')) == 'Asia/Shanghai'
+
+
+def test_unknown_without_pytz(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pytz', None)
+    with pytest.raises(KeyError):
+        get_timezone('Bad/Zone')
+
+
+def test_fallback_to_pytz(monkeypatch):
+    # 模拟自带时区数据的 pytz, 系统的时区数据库里没有的时区由它提供
+    pytz = types.ModuleType('pytz')
+    pytz.timezone = lambda tz: 'pytz:%s' % tz
+    monkeypatch.setitem(sys.modules, 'pytz', pytz)
+    assert get_timezone('Bad/Zone') == 'pytz:Bad/Zone'
+    assert str(get_timezone('Asia/Shanghai')) == 'Asia/Shanghai'
+
+
+def test_listing_without_pytz(monkeypatch):
+    from conciseSchedules import Schedules
+    monkeypatch.setitem(sys.modules, 'pytz', None)
+    schedules = Schedules()
+    assert 'Asia/Shanghai' in schedules.timezone_listing()
+    assert 'Asia/Shanghai' in schedules.timezone_listing('cn')
+    assert schedules.timezon_countrys()['CN'] == 'China'
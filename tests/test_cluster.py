@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_cluster.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+多个节点共用一个租约后端, 每次启动只有一个节点执行.
+'''
+import pytest
+from collections import Counter
+from conciseSchedules.cluster import Cluster, HashRing, LeaseBackend, SQLiteLeaseBackend
+from helpers import make_scheduler
+
+
+def test_claim_once(tmp_path):
+    path = str(tmp_path / 'leases.db')
+    a, b = SQLiteLeaseBackend(path), SQLiteLeaseBackend(path)
+    try:
+        assert a.claim('job', 100.0, 'a', 60) is True
+        assert b.claim('job', 100.0, 'b', 60) is False
+        assert b.claim('job', 101.0, 'b', 60) is True
+        assert a.heartbeat('a', 60) == ['a'] and b.heartbeat('b', 60) == ['a', 'b']
+        a.leave('a')
+        assert b.heartbeat('b', 60) == ['b']
+    finally:
+        a.close()
+        b.close()
+
+
+def test_backend_interface():
+    class ClaimOnly(LeaseBackend):
+        def claim(self, task_id, fire_time, node, ttl):
+            return True
+
+    class Memory(ClaimOnly):
+        def heartbeat(self, node, ttl):
+            return [node]
+
+    with pytest.raises(TypeError):
+        LeaseBackend()
+    with pytest.raises(TypeError):
+        ClaimOnly()
+    cluster = Cluster(Memory(), node='a')
+    assert cluster.claim('job', 100.0) and cluster.members == ('a',)
+    cluster.close()
+
+
+def test_two_schedulers(tmp_path, clock):
+    path = str(tmp_path / 'leases.db')
+    fires = []
+    nodes = []
+    for name in ('a', 'b'):
+        scheduler = make_scheduler(clock)
+        scheduler.set_tasks({'schedule_tasks': [
+            {'crontab': '* * * * * *', 'target': fires.append, 'args': (name,), 'id': 'job'}
+        ]})
+        scheduler.set_cluster(Cluster(SQLiteLeaseBackend(path), node=name))
+        nodes.append(scheduler)
+    try:
+        for _ in range(3):
+            for scheduler in nodes:
+                scheduler.run()
+            clock.advance(1)
+    finally:
+        for scheduler in nodes:
+            scheduler.cluster.close()
+    assert len(fires) == 3
+    assert sum(scheduler.metrics.counter('unclaimed', 'job') for scheduler in nodes) == 3
+
+
+def test_hash_ring():
+    ring = HashRing(['a', 'b', 'c'])
+    keys = ['task-%d' % i for i in range(3000)]
+    before = {key: ring.owner(key) for key in keys}
+    assert set(Counter(before.values())) == {'a', 'b', 'c'}
+    ring.set_nodes(['a', 'b', 'c', 'd'])
+    moved = [key for key in keys if ring.owner(key) != before[key]]
+    # 只有新节点接手的任务换了节点
+    assert all(ring.owner(key) == 'd' for key in moved)
+    assert len(moved) < len(keys) / 2
+    assert HashRing().owner('x') is None
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_command.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+python -m conciseSchedules tasks.json: 只执行这一分钟到点的任务.
+'''
+import json
+import pytest
+from conciseSchedules import cli
+from helpers import EPOCH
+
+FIRES = []
+
+
+def record(name):
+    FIRES.append(name)
+
+
+@pytest.fixture
+def tasks(tmp_path):
+    del FIRES[:]
+    path = tmp_path / 'tasks.json'
+    path.write_text(json.dumps({'schedule_tasks': [
+        {'crontab': '0 0 * * * *', 'target': '%s:record' % __name__, 'args': ['hourly']},
+        {'crontab': '0 */2 * * * *', 'target': '%s:record' % __name__, 'args': ['two minutes']},
+    ]}))
+    return str(path)
+
+
+@pytest.mark.parametrize('cache', [True, False])
+def test_due_tasks(tasks, tmp_path, cache):
+    options = ['--cache', str(tmp_path / 'index.db')] if cache else ['--no-cache']
+    # 时间点都已经过去, 不需要等待
+    assert cli.main([tasks, '--tz', 'UTC', '--at', str(EPOCH)] + options) == 0
+    assert sorted(FIRES) == ['hourly', 'two minutes']
+    del FIRES[:]
+    assert cli.main([tasks, '--tz', 'UTC', '--at', str(EPOCH + 120)] + options) == 0
+    assert FIRES == ['two minutes']
+    del FIRES[:]
+    assert cli.main([tasks, '--tz', 'UTC', '--at', str(EPOCH + 60)] + options) == 0
+    assert FIRES == []
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_config.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+配置文件的读取和热加载.
+'''
+import os
+import sys
+import json
+import pytest
+import subprocess
+from conciseSchedules.config import load_config
+from helpers import wait_until
+
+
+def write(path, conf: dict) -> None:
+    tmp = str(path) + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(conf, f)
+    os.replace(tmp, str(path))
+
+
+def test_load_json(tmp_path):
+    path = tmp_path / 'tasks.json'
+    write(path, {'schedule_tasks': [{'schedule': {'second': [0, 10]}, 'target': 'os:getpid', 'args': [1]}]})
+    item = load_config(str(path))['schedule_tasks'][0]
+    # JSON 没有 tuple, 读出来之后还原
+    assert item['args'] == (1,) and item['schedule']['second'] == (0, 10)
+
+
+def test_load_python(tmp_path):
+    path = tmp_path / 'tasks.py'
+    path.write_text("import os\ntasks_conf = {'schedule_tasks': [{'crontab': '0 * * * * *', 'target': os.getpid}]}\n")
+    assert callable(load_config(str(path))['schedule_tasks'][0]['target'])
+    path.write_text('x = 1\n')
+    with pytest.raises(TypeError):
+        load_config(str(path))
+
+
+def test_import_is_cheap():
+    # find_library 会启动 ldconfig 子进程, 只有启动 ConfigWatcher 时才加载 libc
+    code = (
+        'import sys, subprocess\n'
+        'subprocess.Popen.__init__ = lambda *args, **kwargs: sys.exit("subprocess started")\n'
+        'import conciseSchedules.config\n'
+        'assert "ctypes" not in sys.modules\n'
+    )
+    subprocess.check_call([sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_watch_tasks(scheduler, tmp_path):
+    path = tmp_path / 'tasks.json'
+    task = {'crontab': '0 * * * * *', 'target': 'os:getpid', 'id': 'a'}
+    write(path, {'schedule_tasks': [task]})
+    scheduler.watch_tasks(str(path), interval=0.05)
+    try:
+        assert scheduler.task_ids() == ['a']
+        write(path, {'schedule_tasks': [task, dict(task, id='b')]})
+        assert wait_until(lambda: sorted(scheduler.task_ids()) == ['a', 'b'])
+        # 写坏的配置不生效, 保留原来的任务
+        path.write_text('{not json')
+        write(path.with_name('other.json'), {})
+        assert sorted(scheduler.task_ids()) == ['a', 'b']
+    finally:
+        scheduler.watcher.close()
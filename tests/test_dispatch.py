@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_dispatch.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+调度线程: 到点的任务被执行, 单个任务出错不影响其他任务和调度线程.
+'''
+import pytest
+from helpers import wait_until
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+
+
+@pytest.mark.parametrize('backend', ['heap', 'wheel', 'poll'])
+def test_every_second(scheduler, loop, backend):
+    counter = Counter()
+    scheduler.set_tasks({'schedule_tasks': [{'crontab': '* * * * * *', 'target': counter, 'id': 'counter'}]})
+    run = loop(backend)
+    run.advance(3)
+    assert wait_until(lambda: counter.count >= 3)
+    assert scheduler.metrics.counter('fires', 'counter') >= 3
+
+
+@pytest.mark.parametrize('backend', ['heap', 'wheel', 'poll'])
+def test_bad_task_does_not_stop_the_loop(scheduler, loop, events, backend):
+    counter = Counter()
+    scheduler.set_tasks({'schedule_tasks': [
+        {'crontab': '* * * * * *', 'target': counter, 'id': 'good'},
+        {'crontab': '* * * * * *', 'target': Counter(), 'id': 'bad'},
+    ]})
+    # 注册之后才改坏, 绕过 set_tasks 的检查
+    scheduler.get_task('bad')['tz'] = 'Bad/Zone'
+    run = loop(backend)
+    run.advance(3)
+    assert wait_until(lambda: counter.count >= 3)
+    assert run.thread.is_alive()
+    scheduler.log.flush()
+    assert any(event.event == 'error' for event in events)
+
+
+def test_run_once(scheduler, clock):
+    counter = Counter()
+    scheduler.set_tasks({'schedule_tasks': [{'crontab': '* * * * * *', 'target': counter}]})
+    scheduler.run()
+    assert counter.count == 1
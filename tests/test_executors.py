@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_executors.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+有上限的线程池的溢出策略和伸缩, 以及进程池.
+'''
+import os
+import time
+import pytest
+from threading import Event
+from conciseSchedules.executors import BoundedExecutor, ProcessExecutor, RejectedExecution
+from helpers import wait_until
+
+
+@pytest.fixture
+def blocked():
+    '''让唯一的工作线程卡住, 之后提交的任务都在队列中'''
+    release = Event()
+    pools = []
+
+    def factory(**kwargs) -> BoundedExecutor:
+        pool = BoundedExecutor(1, **kwargs)
+        pools.append(pool)
+        started = Event()
+        pool.submit(lambda: (started.set(), release.wait(5)))
+        assert started.wait(5)
+        return pool
+
+    yield factory
+    release.set()
+    for pool in pools:
+        pool.shutdown()
+
+
+def test_reject(blocked):
+    pool = blocked(max_queue=1, overflow='reject')
+    pool.submit(time.sleep, 0)
+    with pytest.raises(RejectedExecution):
+        pool.submit(time.sleep, 0)
+    assert pool.rejected == 1 and pool.queue_depth == 1
+
+
+def test_drop_oldest(blocked):
+    pool = blocked(max_queue=1, overflow='drop_oldest')
+    first = pool.submit(time.sleep, 0)
+    second = pool.submit(time.sleep, 0)
+    assert first.cancelled() and not second.cancelled()
+    assert pool.dropped == 1
+
+
+def test_order_after_release():
+    pool = BoundedExecutor(1)
+    release = Event()
+    order = []
+    pool.submit(release.wait, 5)
+    pool.submit(order.append, 'late')
+    pool.submit_first(order.append, 'first')
+    release.set()
+    pool.shutdown(wait=True)
+    assert order == ['first', 'late']
+
+
+def test_autoscale():
+    scaled = []
+    pool = BoundedExecutor(
+        4, min_workers=1, target_wait=0.01, idle_timeout=0.1, on_scale=lambda *args: scaled.append(args)
+    )
+    try:
+        futures = [pool.submit(time.sleep, 0.1) for _ in range(8)]
+        for future in futures:
+            future.result(5)
+        assert pool.scale_ups >= 2 and pool.workers <= 4
+        assert wait_until(lambda: pool.workers == 1, 5)
+        assert pool.scale_downs >= 1
+        assert scaled[0][0] == 'up'
+    finally:
+        pool.shutdown()
+
+
+def test_process_executor():
+    pool = ProcessExecutor(1)
+    try:
+        pid = pool.submit(os.getpid).result(30)
+        assert pid != os.getpid()
+        with pytest.raises(ZeroDivisionError):
+            pool.submit(divmod, 1, 0).result(30)
+        assert pool.in_flight == 0
+    finally:
+        pool.shutdown()
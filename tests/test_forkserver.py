@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_forkserver.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+'runner': 'python-forkserver' 的子进程: 退出码, close 和服务端意外退出.
+'''
+import time
+import pytest
+from conciseSchedules.forkserver import ForkServer, parse_python_command
+
+pytestmark = pytest.mark.skipif(not ForkServer.available(), reason='needs os.fork')
+
+
+@pytest.fixture
+def script(tmp_path):
+    def factory(body: str) -> str:
+        path = tmp_path / ('job%s.py' % len(list(tmp_path.iterdir())))
+        path.write_text(body)
+        return str(path)
+    return factory
+
+
+def test_parse_python_command():
+    assert parse_python_command('python job.py a') == ['job.py', 'a']
+    assert parse_python_command('python3 -m json.tool') == ['-m', 'json.tool']
+    assert parse_python_command('python job.py | tee log') is None
+    assert parse_python_command('ls -l') is None
+
+
+def test_exit_code(script):
+    server = ForkServer()
+    try:
+        ok = server.spawn('ok', 'python ok.py', [script('pass\n')])
+        bad = server.spawn('bad', 'python bad.py', [script('raise SystemExit(3)\n')])
+        assert server.join(10)
+        assert ok.returncode == 0 and bad.returncode == 3
+        assert not ok.cancelled
+    finally:
+        server.close(wait=True)
+
+
+def test_close_keeps_running_children(script):
+    '''close 不等子进程, 子进程正常退出后仍然拿到真实的退出码'''
+    server = ForkServer()
+    record = server.spawn('slow', 'python slow.py', [script('import time\ntime.sleep(0.5)\n')])
+    assert record.pid is not None
+    started = time.time()
+    server.close()
+    assert time.time() - started < 0.4
+    assert record.finished is None
+    assert server.join(10)
+    assert record.returncode == 0 and not record.cancelled
+
+
+def test_server_crash_cancels_jobs(script):
+    exits = []
+    server = ForkServer(on_exit=exits.append)
+    record = server.spawn('slow', 'python slow.py', [script('import time\ntime.sleep(0.5)\n')])
+    server._ForkServer__process.kill()
+    assert server.join(10)
+    assert record.cancelled and record.returncode is None
+    assert exits == [record]
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_metrics.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+监控指标和结构化日志.
+'''
+import io
+import json
+from urllib.request import urlopen
+from datetime import datetime, timezone
+from conciseSchedules.metrics import Metrics
+from conciseSchedules.events import EventLog, JsonSink, TextSink
+from helpers import wait_until
+
+
+def noop():
+    pass
+
+
+def test_render():
+    metrics = Metrics()
+    metrics.inc('fires', 'job "a"')
+    metrics.observe('lateness_seconds', 'job "a"', 0.002)
+    metrics.gauge('queue_depth', lambda: 3, 'waiting tasks')
+    text = metrics.render()
+    assert 'conciseSchedules_fires_total{task="job \\"a\\""} 1' in text
+    assert 'conciseSchedules_queue_depth 3' in text
+    assert 'conciseSchedules_lateness_seconds_count{task="job \\"a\\""} 1' in text
+
+
+def test_serve():
+    metrics = Metrics()
+    metrics.inc('fires', 'a')
+    server = metrics.serve(0)
+    try:
+        body = urlopen('http://127.0.0.1:%s/metrics' % server.server_address[1], timeout=5).read().decode('utf-8')
+    finally:
+        server.shutdown()
+    assert 'conciseSchedules_fires_total{task="a"} 1' in body
+
+
+def test_scheduler_metrics(scheduler):
+    scheduler.set_tasks({'schedule_tasks': [{'crontab': '* * * * * *', 'target': noop, 'id': 'n'}]})
+    scheduler.run()
+    assert scheduler.metrics.counter('fires', 'n') == 1
+    assert scheduler.metrics.histogram('duration_seconds', 'n').count == 1
+
+
+def test_json_sink():
+    stream = io.StringIO()
+    log = EventLog(JsonSink(stream))
+    log.emit('exec', datetime(2026, 1, 5, tzinfo=timezone.utc), 'job', {'late': 0.5})
+    assert log.flush(5)
+    record = json.loads(stream.getvalue())
+    assert record['event'] == 'exec' and record['task'] == 'job' and record['late'] == 0.5
+
+
+def test_dropped_when_full():
+    stream = io.StringIO()
+    log = EventLog(TextSink(stream), max_queue=1)
+    date_time = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    results = [log.emit('exec', date_time, 'job') for _ in range(1000)]
+    assert log.flush(5)
+    assert results.count(False) == log.dropped
+    assert wait_until(lambda: stream.getvalue().count('exec') == results.count(True))
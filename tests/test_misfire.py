@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_misfire.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+时钟一下子跳过很多个启动时间时, 按任务的 misfire 策略补执行.
+'''
+import time
+import pytest
+from helpers import wait_until
+
+# 跳过 10 秒之后的执行次数: heap/wheel 只看到最早错过的那一次, poll 的当前节拍没有迟到, 照常执行
+EXPECTED = {
+    'heap': {'fire_all': 10, 'fire_once': 1, 'skip': 0},
+    'wheel': {'fire_all': 10, 'fire_once': 1, 'skip': 0},
+    'poll': {'fire_all': 10, 'fire_once': 1, 'skip': 1},
+}
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+
+
+@pytest.mark.parametrize('misfire', ['fire_all', 'fire_once', 'skip'])
+@pytest.mark.parametrize('backend', ['heap', 'wheel', 'poll'])
+def test_misfire(scheduler, loop, events, backend, misfire):
+    counter = Counter()
+    scheduler.set_tasks({'schedule_tasks': [
+        {'crontab': '* * * * * *', 'target': counter, 'id': 'late', 'misfire': misfire, 'grace': 0}
+    ]})
+    run = loop(backend)
+    run.advance(10, step=10)
+    expected = EXPECTED[backend][misfire]
+    wait_until(lambda: counter.count >= expected, 2)
+    time.sleep(0.05)
+    assert counter.count == expected
+    assert scheduler.metrics.counter('misfires', 'late') >= 1
+    if misfire == 'skip':
+        scheduler.log.flush()
+        assert any(event.event == 'misfire' for event in events)
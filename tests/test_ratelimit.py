@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_ratelimit.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+'''
+import pytest
+from conciseSchedules.ratelimit import TokenBucket
+from helpers import wait_until
+
+
+def test_reserve(clock):
+    bucket = TokenBucket(2, burst=2, clock=clock)
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    clock.advance(1.0)
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+    with pytest.raises(ValueError):
+        TokenBucket(1, burst=0.5)
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+
+
+@pytest.mark.parametrize('backend', ['heap', 'wheel', 'poll'])
+def test_throttled_fires_do_not_block(scheduler, loop, backend):
+    scheduler.set_rate_limit(1, burst=1)
+    slow = [Counter() for _ in range(5)]
+    fast = Counter()
+    scheduler.set_tasks({'schedule_tasks': [
+        {'crontab': '1 0 0 * * *', 'target': counter, 'id': str(i)} for i, counter in enumerate(slow)
+    ] + [{'interval': 0.25, 'target': fast, 'id': 'fast'}]})
+    run = loop(backend)
+    # 1 秒内只能启动 1 个秒级任务, 其余的排队, 毫秒级的任务照常每 250 毫秒启动
+    run.advance(1, step=0.25)
+    assert wait_until(lambda: fast.count >= 4)
+    assert wait_until(lambda: sum(counter.count for counter in slow) == 1)
+    assert scheduler.metrics.counter('throttled', '0') + scheduler.metrics.counter('throttled', '1') >= 1
+    run.advance(4, step=0.25)
+    assert wait_until(lambda: fast.count >= 20)
+    assert wait_until(lambda: [counter.count for counter in slow] == [1] * 5)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_readme.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+README 中使用装饰器的例子都要能运行.
+'''
+import os
+import re
+import pytest
+import conciseSchedules
+from helpers import make_scheduler
+
+README = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'README.md')
+
+
+def decorator_examples() -> list:
+    with open(README, encoding='utf-8') as f:
+        text = f.read()
+    return [block for block in re.findall(r'```[ \t]*\n(.*?)```', text, re.S) if '@scheduler.task(' in block]
+
+
+def warm_up():
+    pass
+
+
+@pytest.fixture
+def default_scheduler(monkeypatch):
+    '''模块级的函数使用一个新的 scheduler, 不影响其他测试'''
+    scheduler = make_scheduler()
+    monkeypatch.setattr(conciseSchedules, '_scheduler', scheduler)
+    return scheduler
+
+
+def test_examples_found():
+    assert len(decorator_examples()) >= 5
+
+
+@pytest.mark.parametrize('index', range(len(decorator_examples())))
+def test_decorator_example(default_scheduler, index):
+    '''没有 import 的例子中 scheduler 是 from conciseSchedules import scheduler'''
+    block = decorator_examples()[index]
+    namespace = {'__name__': 'readme', 'scheduler': default_scheduler, 'warm_up': warm_up}
+    exec(compile(block, 'README.md', 'exec'), namespace)
+    tasks = default_scheduler.conf['schedule_tasks']
+    assert len(tasks) == block.count('@scheduler.task(')
+    for task in tasks:
+        assert callable(task['target'])
+
+
+@pytest.mark.parametrize('line', sorted(set(
+    line.strip() for block in decorator_examples() for line in block.splitlines() if line.startswith('@scheduler.task(')
+)))
+def test_module_decorator(default_scheduler, line):
+    '''每个装饰器的写法在 import conciseSchedules as scheduler 时也能用'''
+    source = '%s\ndef example():\n    pass\n' % line
+    exec(compile(source, 'README.md', 'exec'), {'scheduler': conciseSchedules})
+    assert len(default_scheduler.conf['schedule_tasks']) == 1
+
+
+def test_decorator_options(default_scheduler):
+    @conciseSchedules.task(crontab='0 * * * * *', misfire='fire_all', grace=5, id='report')
+    def report():
+        pass
+
+    item = default_scheduler.get_task('report')
+    assert item['target'] is report
+    assert item['misfire'] == 'fire_all' and item['grace'] == 5
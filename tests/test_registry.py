@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_registry.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+按 id 管理任务: 删除, 暂停, 恢复, 修改和标签.
+'''
+import pytest
+from threading import Thread
+from conciseSchedules.registry import Task, TaskRegistry
+from helpers import wait_until
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def test_ids_and_tags(scheduler):
+    scheduler.set_tasks({'schedule_tasks': [
+        {'crontab': '0 * * * * *', 'target': Counter(), 'id': 'a', 'tags': ['x']},
+        {'crontab': '0 * * * * *', 'target': Counter(), 'id': 'b', 'tags': ['x', 'y']},
+    ]})
+    assert sorted(scheduler.task_ids()) == ['a', 'b']
+    assert sorted(scheduler.task_ids('x')) == ['a', 'b'] and scheduler.task_ids('y') == ['b']
+    assert scheduler.remove_task('b')['id'] == 'b'
+    assert scheduler.remove_task('b') is None
+    assert scheduler.task_ids('y') == []
+
+
+def test_same_tasks_without_id(scheduler):
+    target = Counter()
+    item = {'crontab': '0 * * * * *', 'target': target}
+    scheduler.set_tasks({'schedule_tasks': [dict(item), dict(item)]})
+    ids = scheduler.task_ids()
+    assert len(ids) == 2 and ids[1] == ids[0] + '#2'
+
+
+def test_pause_resume_update(scheduler, loop):
+    counter = Counter()
+    scheduler.set_tasks({'schedule_tasks': [{'crontab': '* * * * * *', 'target': counter, 'id': 'c'}]})
+    run = loop('heap')
+    run.advance(2)
+    assert wait_until(lambda: counter.count == 2)
+    assert scheduler.pause_task('c')
+    run.advance(2)
+    assert counter.count == 2
+    assert scheduler.resume_task('c')
+    run.advance(2)
+    assert wait_until(lambda: counter.count == 4)
+    item = scheduler.update_task('c', {'crontab': '*/2 * * * * *', 'args': (1,)})
+    assert item['args'] == (1,) and scheduler.get_task('c') is not None
+    run.advance(4)
+    assert wait_until(lambda: counter.count == 6)
+    assert not scheduler.pause_task('missing') and scheduler.update_task('missing', {}) is None
+
+
+def test_update_tasks(scheduler):
+    a = {'crontab': '0 * * * * *', 'target': Counter(), 'id': 'a'}
+    b = {'crontab': '0 * * * * *', 'target': Counter(), 'id': 'b'}
+    scheduler.set_tasks({'schedule_tasks': [a, b]})
+    counts = scheduler.update_tasks({'schedule_tasks': [
+        a, dict(b, crontab='30 * * * * *'), {'crontab': '0 * * * * *', 'target': Counter(), 'id': 'c'}
+    ]})
+    assert counts == {'added': 1, 'changed': 1, 'removed': 0}
+    counts = scheduler.update_tasks({'schedule_tasks': [a]})
+    assert counts == {'added': 0, 'changed': 0, 'removed': 2}
+    assert scheduler.task_ids() == ['a']
+
+
+@pytest.mark.parametrize('backend', ['heap', 'wheel'])
+def test_churn_leaves_no_timers(scheduler, loop, backend):
+    run = loop(backend)
+    timer = scheduler._Schedules__timer
+    for i in range(2000):
+        scheduler.add_task({'schedule_tasks': {'crontab': '0 0 * * * *', 'target': Counter(), 'id': str(i)}})
+    assert len(timer) == 2000
+    for i in range(0, 2000, 2):
+        scheduler.update_task(str(i), {'crontab': '0 30 * * * *'})
+    assert len(timer) == 2000
+    for i in range(1, 2000, 2):
+        scheduler.pause_task(str(i))
+    assert len(timer) == 1000
+    for i in range(2000):
+        scheduler.remove_task(str(i))
+    assert len(timer) == 0
+    assert run.thread.is_alive()
+
+
+def test_view_is_rebuilt_when_read():
+    registry = TaskRegistry(('schedule_tasks',))
+    empty = registry.view('schedule_tasks')
+    for i in range(3):
+        registry.add(Task('schedule_tasks', None, {}, str(i)))
+    view = registry.view('schedule_tasks')
+    assert view is not empty and [task.task_id for task in view] == ['0', '1', '2']
+    # 没有修改时不重新打包
+    assert registry.view('schedule_tasks') is view
+    registry.pause('1')
+    assert [task.task_id for task in registry.view('schedule_tasks')] == ['0', '2']
+    with registry.batch():
+        registry.remove('0')
+        registry.add(Task('schedule_tasks', None, {}, '3'))
+        # batch 结束之前其他线程读不到修改了一半的任务表
+        other = []
+        reader = Thread(target=lambda: other.append(registry.view('schedule_tasks')))
+        reader.start()
+        reader.join(0.05)
+        assert not other
+    reader.join()
+    assert [task.task_id for task in other[0]] == ['2', '3']
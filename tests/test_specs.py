@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_specs.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+crontab / schedule 语法编译成 CompiledSpec, 以及下一次启动时间的计算.
+'''
+import pytest
+from datetime import datetime
+from conciseSchedules import Schedules, CompiledSpec, SubSecondSpec
+
+
+def test_compile_crontab():
+    spec = Schedules.compile_crontab('*/15 9,17 * * *')
+    assert spec.second is None
+    assert spec.match(datetime(2026, 1, 5, 9, 30))
+    assert spec.match(datetime(2026, 1, 5, 17, 45))
+    assert not spec.match(datetime(2026, 1, 5, 9, 31))
+    assert not spec.match(datetime(2026, 1, 5, 10, 0))
+
+
+def test_compile_schedule():
+    spec = Schedules.compile_schedule({'second': -10, 'hour': (8, 9)})
+    assert spec.match(datetime(2026, 1, 5, 8, 0, 20))
+    assert not spec.match(datetime(2026, 1, 5, 8, 0, 21))
+    assert not spec.match(datetime(2026, 1, 5, 10, 0, 20))
+    assert Schedules.compile_schedule(crontab='0 30 * * * *') == CompiledSpec.from_collec(
+        {'second': [0], 'minute': [30], 'hour': list(range(24)), 'day': list(range(1, 32)),
+         'month': list(range(1, 13)), 'weekday': list(range(7))}
+    )
+
+
+@pytest.mark.parametrize('crontab', ['61 * * * * *', '* * * 32 * *', 'x * * * * *'])
+def test_invalid_crontab(crontab):
+    with pytest.raises(Exception):
+        Schedules.compile_schedule(crontab=crontab)
+
+
+def test_next_fire():
+    spec = Schedules.compile_crontab('30 2 * * *')
+    assert spec.next_fire(datetime(2026, 1, 5, 2, 30)) == datetime(2026, 1, 6, 2, 30)
+    assert spec.next_fire(datetime(2026, 1, 5, 1, 0)) == datetime(2026, 1, 5, 2, 30)
+    every = Schedules.compile_schedule(crontab='*/20 * * * * *')
+    assert every.next_fire(datetime(2026, 1, 5, 0, 0, 59)) == datetime(2026, 1, 5, 0, 1, 0)
+    never = Schedules.compile_schedule({'day': 30, 'month': 2})
+    assert never.next_fire(datetime(2026, 1, 1)) is None
+
+
+def test_millisecond():
+    assert Schedules.parse_millisecond('*/250') == (0, 250, 500, 750)
+    assert Schedules.parse_millisecond('100-300/100') == (100, 200, 300)
+    assert Schedules.parse_millisecond([500, 0]) == (0, 500)
+    with pytest.raises(TypeError):
+        Schedules.parse_millisecond(1000)
+
+
+def test_interval():
+    spec = Schedules.compile_subsecond(None, interval=0.25)
+    assert type(spec) is SubSecondSpec and spec.offsets == (0, 250, 500, 750) and spec.interval is None
+    spec = Schedules.compile_subsecond(None, interval=0.3)
+    assert spec.interval == 300
+    with pytest.raises(TypeError):
+        Schedules.compile_subsecond(Schedules.compile_schedule(crontab='* * * * * *'), interval=0.3)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_store.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+持久化的任务存储: 重启之后恢复任务和下一次启动时间, 停机期间错过的启动按 misfire 策略补执行.
+'''
+import os
+import sys
+import time
+import pytest
+import subprocess
+from threading import Thread, Event
+from conciseSchedules.store import SQLiteJobStore
+from helpers import make_scheduler, Loop, wait_until, EPOCH
+
+FIRES = []
+
+
+def record(name):
+    FIRES.append(name)
+
+
+@pytest.fixture(autouse=True)
+def clear():
+    del FIRES[:]
+
+
+def test_import_does_not_load_config():
+    code = 'import sys, conciseSchedules\nassert "conciseSchedules.config" not in sys.modules\n'
+    subprocess.check_call([sys.executable, '-c', code], cwd=os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_target_path():
+    text = SQLiteJobStore.dump({'crontab': '0 * * * * *', 'target': record})
+    assert '"%s:record"' % __name__ in text
+    assert SQLiteJobStore.dump({'crontab': '0 * * * * *', 'target': lambda: None}) is None
+
+
+def test_reload_added_tasks(tmp_path, clock):
+    path = str(tmp_path / 'jobs.db')
+    scheduler = make_scheduler(clock)
+    scheduler.set_store(SQLiteJobStore(path))
+    scheduler.add_task({'schedule_tasks': {'crontab': '0 * * * * *', 'target': record, 'args': ('a',), 'id': 'a'}})
+    scheduler.store.close()
+
+    restarted = make_scheduler(clock)
+    restarted.set_store(SQLiteJobStore(path))
+    item = restarted.get_task('a')
+    assert item is not None and item['args'] == ('a',)
+    restarted.run()
+    assert FIRES == ['a']
+    restarted.store.close()
+
+
+@pytest.mark.parametrize('misfire, expected', [('fire_all', 5), ('fire_once', 1), ('skip', 0)])
+@pytest.mark.parametrize('backend', ['heap', 'wheel', 'poll'])
+def test_replay_missed_runs(tmp_path, clock, backend, misfire, expected):
+    path = str(tmp_path / 'jobs.db')
+    conf = {'schedule_tasks': [
+        {'crontab': '* * * * * *', 'target': record, 'args': ('m',), 'id': 'm', 'misfire': misfire, 'grace': 0}
+    ]}
+    scheduler = make_scheduler(clock)
+    scheduler.set_tasks(conf)
+    scheduler.set_store(SQLiteJobStore(path))
+    run = Loop(scheduler, clock, backend).start()
+    run.advance(2)
+    assert wait_until(lambda: len(FIRES) == 2)
+    run.stop()
+    scheduler.store.close()
+
+    # 停机 5 秒
+    clock.advance(5)
+    del FIRES[:]
+    restarted = make_scheduler(clock)
+    restarted.set_tasks(conf)
+    restarted.set_store(SQLiteJobStore(path))
+    run = Loop(restarted, clock, backend).start()
+    try:
+        wait_until(lambda: len(FIRES) >= expected, 2)
+        time.sleep(0.05)
+        assert len(FIRES) == expected
+    finally:
+        run.stop()
+        restarted.store.close()
+
+
+class Locked(SQLiteJobStore):
+    '''
+ 第一次写入启动时间时失败, 模拟数据库被其他进程锁住.
+    '''
+    failures = 1
+
+    def _SQLiteJobStore__execute(self, sql: str, rows: list = None) -> None:
+        if self.failures and sql.startswith('UPDATE'):
+            self.failures -= 1
+            import sqlite3
+            raise sqlite3.OperationalError('database is locked')
+        super()._SQLiteJobStore__execute(sql, rows)
+
+
+def test_failed_flush_is_retried(tmp_path, clock, events):
+    path = str(tmp_path / 'jobs.db')
+    scheduler = make_scheduler(clock, events)
+    scheduler.set_tasks({'schedule_tasks': [{'crontab': '0 * * * * *', 'target': record, 'id': 'r'}]})
+    store = Locked(path, flush_interval=0.01)
+    scheduler.set_store(store)
+    store.record('r', last_fire=EPOCH)
+    failed = lambda: any(event.event == 'store' and event.fields.get('action') == 'flush' for event in events)
+    assert wait_until(lambda: scheduler.log.flush(1) and failed())
+    # 失败的一批放回了内存, 和之后的更新一起写入
+    store.record('r', next_fire=EPOCH + 60)
+    store.close()
+    restarted = SQLiteJobStore(path)
+    assert [row[4:] for row in restarted.load()] == [(EPOCH, EPOCH + 60)]
+    restarted.close()
+
+
+class Slow(SQLiteJobStore):
+    '''
+ 写任务定义时很慢, 模拟很慢的磁盘.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writing = Event()
+        self.release = Event()
+
+    def save(self, tasks: list) -> None:
+        self.writing.set()
+        self.release.wait(5)
+        super().save(tasks)
+
+
+def test_store_writes_do_not_block_snapshot_reads(tmp_path, scheduler):
+    store = Slow(str(tmp_path / 'jobs.db'))
+    store.release.set()
+    scheduler.set_store(store)
+    store.release.clear()
+    conf = {'schedule_tasks': [{'crontab': '0 * * * * *', 'target': record, 'id': str(i)} for i in range(3)]}
+    for reload in (scheduler.set_tasks, scheduler.update_tasks):
+        store.writing.clear()
+        thread = Thread(target=reload, args=(conf,))
+        thread.start()
+        assert store.writing.wait(5)
+        # 存储还在写的时候, 调度线程已经能读到新的任务表
+        reader = Thread(target=scheduler.registry.view, args=('schedule_tasks',))
+        reader.start()
+        reader.join(1)
+        alive = reader.is_alive()
+        store.release.set()
+        thread.join()
+        reader.join()
+        store.release.clear()
+        assert not alive
+        assert len(scheduler.registry.view('schedule_tasks')) == 3
+        conf = {'schedule_tasks': conf['schedule_tasks'][:2] + [dict(conf['schedule_tasks'][2], args=('x',))]}
+    store.release.set()
+    store.close()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_subprocs.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+crontab_tasks 的子进程: 回收, 退出码, 输出和并发上限.
+'''
+import sys
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from conciseSchedules.subprocs import Supervisor
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='uses /bin/sh commands')
+
+
+def test_exit_code_and_output():
+    lines = []
+    supervisor = Supervisor(sink=lambda record, stream, line: lines.append((stream, line)))
+    record = supervisor.spawn('echo', 'echo hello; echo oops >&2; exit 3')
+    assert supervisor.join(5)
+    assert record.returncode == 3
+    assert list(record.stdout) == ['hello'] and list(record.stderr) == ['oops']
+    assert ('stdout', 'hello') in lines
+
+
+def test_without_capture():
+    '''不读取输出 (Windows) 时按 poll_interval 检查子进程是否退出'''
+    supervisor = Supervisor(poll_interval=0.01)
+    supervisor.capture = False
+    record = supervisor.spawn('exit', 'exit 4')
+    assert supervisor.join(5)
+    assert record.returncode == 4
+    record = supervisor.spawn('exit', 'exit 5')
+    assert supervisor.join(5)
+    assert record.returncode == 5
+
+
+def test_limits():
+    supervisor = Supervisor(max_children=2, sink=None)
+    assert supervisor.spawn('a', 'sleep 1', max_instances=1) is not None
+    assert supervisor.spawn('a', 'sleep 1', max_instances=1) is None
+    assert supervisor.spawn('b', 'sleep 1') is not None
+    assert supervisor.spawn('c', 'sleep 1') is None
+    assert supervisor.count() == 2 and supervisor.count('a') == 1
+    assert supervisor.join(5)
+
+
+def test_async_shell_uses_the_same_limits(scheduler):
+    scheduler.set_supervisor(output_lines=10, sink=lambda record, stream, line: None)
+    scheduler.set_tasks({'crontab_tasks': [{'crontab': '* * * * *', 'shell': 'sleep 1', 'id': 'slow', 'max_instances': 1}]})
+    task = scheduler.registry.get('slow')
+    date_time = datetime.now(timezone.utc)
+    fire = scheduler._Schedules__fire_async
+
+    async def main():
+        await asyncio.gather(fire(task, date_time), fire(task, date_time))
+
+    asyncio.run(main())
+    assert scheduler.supervisor.count('slow') == 1
+    assert scheduler.metrics.counter('skips', 'slow') == 1
+    assert scheduler.supervisor.join(5)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_tasks.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+任务的注册, 校验和按 id 管理.
+'''
+import pytest
+
+
+def noop():
+    pass
+
+
+@pytest.mark.parametrize('backend', ['heap', 'wheel', 'poll'])
+def test_invalid_tz_is_rejected_before_registering(scheduler, loop, backend):
+    scheduler.set_tasks({'schedule_tasks': [{'crontab': '* * * * * *', 'target': noop, 'id': 'keep'}]})
+    loop(backend)
+    with pytest.raises(TypeError):
+        scheduler.add_task({'schedule_tasks': {'crontab': '* * * * * *', 'target': noop, 'id': 'bad', 'tz': 'Bad/Zone'}})
+    with pytest.raises(TypeError):
+        scheduler.set_tasks({'schedule_tasks': [{'crontab': '* * * * * *', 'target': noop, 'tz': 'Bad/Zone'}]})
+    with pytest.raises(TypeError):
+        scheduler.update_task('keep', {'tz': 'Bad/Zone'})
+    assert scheduler.task_ids() == ['keep']
+    assert 'tz' not in scheduler.get_task('keep')
+
+
+def test_valid_tz(scheduler):
+    scheduler.add_task({'schedule_tasks': {'crontab': '0 0 9 * * *', 'target': noop, 'id': 'sh', 'tz': 'Asia/Shanghai'}})
+    assert scheduler.get_task('sh')['tz'] == 'Asia/Shanghai'
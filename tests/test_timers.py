@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+@File  : test_timers.py
+@Author: ChenXinqun
+@Date  : 2026/10/19 09:00
+
+最小堆和时间轮定时队列: 到期顺序和取消.
+'''
+import pytest
+from conciseSchedules.timers import TimerHeap, TimingWheel
+from helpers import EPOCH
+
+never = lambda: False
+
+
+@pytest.fixture(params=[TimerHeap, TimingWheel])
+def timer(request, clock):
+    return request.param(clock)
+
+
+def test_pop_due(timer, clock):
+    timer.push(EPOCH + 2, 'b')
+    timer.push(EPOCH + 1, 'a')
+    timer.push(EPOCH + 90000, 'tomorrow')
+    clock.advance(2)
+    assert sorted(item for _, item in timer.pop_due(never)) == ['a', 'b']
+    clock.advance(90000)
+    assert [item for _, item in timer.pop_due(never)] == ['tomorrow']
+
+
+def test_cancel(timer, clock):
+    handle = timer.push(EPOCH + 1, 'cancelled')
+    timer.push(EPOCH + 1, 'kept')
+    timer.cancel(handle)
+    timer.cancel(handle)
+    assert len(timer) == 1
+    clock.advance(1)
+    assert [item for _, item in timer.pop_due(never)] == ['kept']
+
+
+def test_cancel_many(timer, clock):
+    handles = [timer.push(EPOCH + 10 + i, i) for i in range(1000)]
+    for handle in handles[:900]:
+        timer.cancel(handle)
+    assert len(timer) == 100
+    clock.advance(2000)
+    assert [item for _, item in timer.pop_due(never)] == list(range(900, 1000))
+    assert len(timer) == 0
+
+
+def test_stopped(timer):
+    assert timer.pop_due(lambda: True) == []